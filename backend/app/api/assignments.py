@@ -1,17 +1,32 @@
 """
 반편성 실행 API
 """
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select, or_
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import List, Optional, Dict, Any
 from pydantic import BaseModel
+from urllib.parse import quote
+from itertools import groupby
+from operator import itemgetter
+import numpy as np
 import logging
 
-from ..core.database import get_db
+from ..core.config import settings
+from ..core.database import get_db, get_async_db, SessionLocal
 from ..models.student import Student
-from ..models.rule import ClassAssignmentRule
-from ..models.assignment import ClassAssignment, StudentAssignment
+from ..models.school import School
+from ..models.assignment import ClassAssignment
+from ..models.assignment_version import AssignmentVersion
 from ..engine.assignment_algorithm import AssignmentAlgorithm
+from ..engine.field_encoder import FieldEncoder
+from ..engine.rule_engine import RuleEngine
+from ..services.excel_parser import ExcelParser
+from ..services.streaming import iter_written_bytes
+from ..services import assignment_store, cohort_cache
+from ..services.list_query import parse_fields, parse_sort, fetch_list
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -26,6 +41,20 @@ class AssignmentRequest(BaseModel):
     name: str
     method: str = "genetic"  # random, greedy, genetic
     iterations: int = 1000
+    workers: Optional[int] = None  # 병렬 프로세스 수 (기본값: SOLVER_WORKERS)
+
+
+class DraftMove(BaseModel):
+    """초안에서 옮길 학생"""
+    student_id: int
+    to_class: int
+
+
+class DraftRequest(BaseModel):
+    """기존 반편성을 수정한 초안 저장 요청"""
+    moves: List[DraftMove]
+    name: Optional[str] = None  # 기본값: 부모 이름 + " (수정)"
+    note: Optional[str] = None
 
 
 class AssignmentResponse(BaseModel):
@@ -51,11 +80,11 @@ def generate_assignment(
     """
     반편성 생성
     """
-    # 학생 조회
-    students = db.query(Student).filter(
-        Student.school_id == request.school_id,
-        Student.grade == request.grade
-    ).all()
+    # 학생/활성 규칙/필드 정의 (학교 데이터가 바뀌지 않았으면 캐시된 스냅샷 사용)
+    snapshot = cohort_cache.get_snapshot(request.school_id, request.grade)
+    students = list(snapshot.students)
+    rules = list(snapshot.rules)
+    field_definitions = list(snapshot.field_definitions) or None
     
     if not students:
         raise HTTPException(status_code=404, detail="학생 데이터가 없습니다")
@@ -63,26 +92,23 @@ def generate_assignment(
     if len(students) < request.num_classes:
         raise HTTPException(status_code=400, detail="학생 수가 반 개수보다 적습니다")
     
-    # 규칙 조회
-    rules = db.query(ClassAssignmentRule).filter(
-        ClassAssignmentRule.school_id == request.school_id,
-        ClassAssignmentRule.is_active == True
-    ).all()
-    
     logger.info(f"반편성 시작: {len(students)}명 학생, {len(rules)}개 규칙, {request.num_classes}개 반")
     
-    # 반편성 알고리즘 실행
-    algorithm = AssignmentAlgorithm(students, rules, request.num_classes)
+    # 반편성 알고리즘 실행 (인코딩된 특성은 피처 저장소에서 메모리 매핑)
+    features = cohort_cache.get_features(snapshot)
+    algorithm = AssignmentAlgorithm(students, rules, request.num_classes, field_definitions, features)
     assignment_result = algorithm.generate_assignment(
         method=request.method,
-        iterations=request.iterations
+        iterations=request.iterations,
+        workers=max(1, request.workers or settings.SOLVER_WORKERS)
     )
     
     # 평가
     evaluation = algorithm.rule_engine.evaluate_assignment(assignment_result)
     
     # 통계 계산
-    statistics = _calculate_statistics(assignment_result)
+    statistics = _calculate_statistics(assignment_result, algorithm.rule_engine.encoder)
+    statistics["convergence"] = algorithm.get_convergence_trace()
     
     # 데이터베이스에 저장
     db_assignment = ClassAssignment(
@@ -98,15 +124,8 @@ def generate_assignment(
     db.add(db_assignment)
     db.flush()
     
-    # 학생별 배정 저장
-    for class_num, students_in_class in assignment_result.items():
-        for student in students_in_class:
-            student_assignment = StudentAssignment(
-                assignment_id=db_assignment.id,
-                student_id=student.id,
-                assigned_class=class_num
-            )
-            db.add(student_assignment)
+    # 학생별 배정 저장 (기본: 압축 배열 1행)
+    assignment_store.save_placements(db, db_assignment.id, assignment_result)
     
     db.commit()
     db.refresh(db_assignment)
@@ -122,18 +141,143 @@ def generate_assignment(
     }
 
 
-@router.get("/", response_model=List[AssignmentResponse])
-def get_assignments(school_id: int, db: Session = Depends(get_db)):
-    """반편성 목록 조회"""
-    assignments = db.query(ClassAssignment).filter(
-        ClassAssignment.school_id == school_id
-    ).order_by(ClassAssignment.created_at.desc()).all()
-    return assignments
+# 목록 조회에서 선택할 수 있는 필드
+ASSIGNMENT_LIST_COLUMNS = {
+    "id": ClassAssignment.id,
+    "name": ClassAssignment.name,
+    "grade": ClassAssignment.grade,
+    "year": ClassAssignment.year,
+    "num_classes": ClassAssignment.num_classes,
+    "total_score": ClassAssignment.total_score,
+    "rule_scores": ClassAssignment.rule_scores,
+    "statistics": ClassAssignment.statistics,
+    "created_at": ClassAssignment.created_at,
+}
+
+# 기본 응답 필드 (AssignmentResponse와 동일)
+ASSIGNMENT_DEFAULT_FIELDS = list(AssignmentResponse.model_fields)
+
+ASSIGNMENT_SORT_KEYS = ("id", "name", "grade", "year", "total_score", "created_at")
+
+
+def _assignment_sort(key: str):
+    """정렬 키 → SQL 식"""
+    if key in ASSIGNMENT_SORT_KEYS:
+        return ASSIGNMENT_LIST_COLUMNS[key]
+    raise ValueError(f"정렬할 수 없는 필드: {key}")
+
+
+@router.get("/")
+async def get_assignments(
+    school_id: int,
+    grade: Optional[int] = None,
+    year: Optional[int] = None,
+    name: Optional[str] = None,
+    sort: Optional[str] = Query(None, description="정렬 (기본값: -created_at)"),
+    fields: Optional[str] = Query(None, description="응답 필드 (예: id,name,total_score)"),
+    limit: Optional[int] = Query(None, ge=1, description="페이지 크기 (지정하면 페이지 단위 응답)"),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    반편성 목록 조회
+    
+    limit를 지정하면 {"items", "total", "limit", "next_cursor"} 형식으로 한 페이지씩 반환합니다.
+    통계(statistics)가 필요 없으면 fields로 제외하면 응답이 훨씬 작아집니다.
+    """
+    conditions = [ClassAssignment.school_id == school_id]
+    if grade:
+        conditions.append(ClassAssignment.grade == grade)
+    if year:
+        conditions.append(ClassAssignment.year == year)
+    if name:
+        conditions.append(ClassAssignment.name.contains(name.strip()))
+    
+    try:
+        selected = parse_fields(fields, ASSIGNMENT_LIST_COLUMNS, default=ASSIGNMENT_DEFAULT_FIELDS)
+        sort_expr, descending = parse_sort(sort, _assignment_sort, default="-created_at")
+        return await fetch_list(db, ASSIGNMENT_LIST_COLUMNS, selected, conditions, sort_expr, descending,
+                                ClassAssignment.id, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 @router.get("/{assignment_id}")
-def get_assignment_detail(assignment_id: int, db: Session = Depends(get_db)):
-    """반편성 상세 조회"""
+async def get_assignment_detail(
+    assignment_id: int,
+    format: str = Query("nested", pattern="^(nested|columnar)$"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    반편성 상세 조회
+    
+    - format=nested (기본값): 반 번호별 학생 객체 목록
+    - format=columnar: 학생 속성별 병렬 배열 (같은 인덱스가 같은 학생, 응답 크기가 작음)
+    """
+    assignment = await db.get(ClassAssignment, assignment_id)
+    
+    if not assignment:
+        raise HTTPException(status_code=404, detail="반편성을 찾을 수 없습니다")
+    
+    if format == "columnar":
+        return {
+            "assignment": assignment,
+            "format": "columnar",
+            "students": await db.run_sync(_assignment_columns, assignment),
+            "convergence": (assignment.statistics or {}).get("convergence")
+        }
+    
+    # 반별로 그룹화 (배정 결과 조회 후 학생은 묶음 단위로 조회)
+    classes = await db.run_sync(_assignment_classes, assignment_id)
+    
+    return {
+        "assignment": assignment,
+        "classes": classes,
+        "convergence": (assignment.statistics or {}).get("convergence")
+    }
+
+
+def _assignment_classes(db: Session, assignment_id: int) -> Dict[int, List[dict]]:
+    """반 번호별 학생 목록"""
+    classes = {}
+    for assigned_class, student in assignment_store.iter_assigned_students(db, assignment_id, Student):
+        classes.setdefault(assigned_class, []).append(student.to_dict())
+    return classes
+
+
+def _assignment_columns(db: Session, assignment: ClassAssignment) -> Dict[str, Any]:
+    """
+    반편성 결과를 컬럼별 배열로 변환 (ORM 객체 없이 컬럼 값만 조회)
+    
+    Returns:
+        {"assigned_class", "id", "name", "gender", "grade", "original_class", "number": [...],
+         "fields": {커스텀 필드: [...]}}
+    """
+    rows = list(assignment_store.iter_assigned_students(
+        db, assignment.id, Student.id, Student.name, Student.gender, Student.grade,
+        Student.original_class, Student.number, Student.custom_fields
+    ))
+    
+    keys = ("assigned_class", "id", "name", "gender", "grade", "original_class", "number")
+    columns = dict(zip(keys, map(list, zip(*rows)))) if rows else {key: [] for key in keys}
+    
+    # 커스텀 필드: 학교 필드 정의 순서, 정의에 없는 필드는 뒤에
+    custom_fields = [row[-1] or {} for row in rows]
+    school = db.query(School).filter(School.id == assignment.school_id).first()
+    names = [d['name'] for d in ((school.custom_field_definitions or []) if school else [])]
+    names += sorted({name for fields in custom_fields for name in fields} - set(names))
+    columns["fields"] = {name: [fields.get(name) for fields in custom_fields] for name in names}
+    return columns
+
+
+@router.get("/{assignment_id}/export")
+def export_assignment(assignment_id: int, db: Session = Depends(get_db)):
+    """
+    반편성 결과 Excel 다운로드 (요약 시트 + 반별 시트)
+    
+    반 시트를 다 쓸 때마다 바로 전송하므로 첫 반을 쓰고 나면 다운로드가 시작되며,
+    학생 수와 관계없이 메모리 사용량이 일정합니다.
+    """
     assignment = db.query(ClassAssignment).filter(
         ClassAssignment.id == assignment_id
     ).first()
@@ -141,27 +285,227 @@ def get_assignment_detail(assignment_id: int, db: Session = Depends(get_db)):
     if not assignment:
         raise HTTPException(status_code=404, detail="반편성을 찾을 수 없습니다")
     
-    # 학생별 배정 조회
-    student_assignments = db.query(StudentAssignment).filter(
-        StudentAssignment.assignment_id == assignment_id
-    ).all()
+    school = db.query(School).filter(School.id == assignment.school_id).first()
+    custom_columns = [d['name'] for d in (school.custom_field_definitions or [])] if school else []
+    assignment_info = {
+        "name": assignment.name,
+        "grade": assignment.grade,
+        "year": assignment.year,
+        "num_classes": assignment.num_classes,
+        "total_score": assignment.total_score
+    }
     
-    # 반별로 그룹화
-    classes = {}
-    for sa in student_assignments:
-        if sa.assigned_class not in classes:
-            classes[sa.assigned_class] = []
-        
-        student = db.query(Student).filter(Student.id == sa.student_id).first()
-        if student:
-            classes[sa.assigned_class].append(student.to_dict())
+    keys = ("assigned_class", "grade", "original_class", "number", "name", "gender", "custom_fields")
+    
+    def iter_rows(session: Session):
+        """반별 학생 행 (반 안에서는 성별, 이름순)"""
+        students = assignment_store.iter_assigned_students(
+            session, assignment_id, Student.grade, Student.original_class, Student.number,
+            Student.name, Student.gender, Student.custom_fields
+        )
+        for _, class_rows in groupby(students, key=itemgetter(0)):
+            for row in sorted(class_rows, key=lambda r: (r[5] or '', r[4] or '')):
+                yield dict(zip(keys, row))
+    
+    def write_workbook(output):
+        # 응답 전송 중에 실행되므로 별도 세션 사용
+        with SessionLocal() as session:
+            ExcelParser.write_assignment_workbook(output, assignment_info, iter_rows(session), custom_columns)
+    
+    filename = quote(f"{assignment.name or '반편성'}_{assignment.grade}학년.xlsx")
+    return StreamingResponse(
+        iter_written_bytes(write_workbook),
+        media_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        headers={'Content-Disposition': f"attachment; filename*=UTF-8''{filename}"}
+    )
+
+
+@router.post("/{assignment_id}/drafts")
+def create_draft(assignment_id: int, request: DraftRequest, db: Session = Depends(get_db)):
+    """
+    기존 반편성에서 학생을 옮긴 초안 저장
+    
+    부모 대비 이동한 학생만 저장하며(일정 단계마다 전체 결과를 체크포인트로 저장),
+    점수와 통계는 현재 학생/규칙으로 다시 계산합니다.
+    같은 학생을 여러 번 옮기면 마지막 이동만 반영됩니다.
+    """
+    parent = db.query(ClassAssignment).filter(ClassAssignment.id == assignment_id).first()
+    
+    if not parent:
+        raise HTTPException(status_code=404, detail="반편성을 찾을 수 없습니다")
+    
+    student_ids, classes = assignment_store.load_placements(db, assignment_id)
+    current = dict(zip(student_ids.tolist(), classes.tolist()))
+    
+    moves: Dict[int, int] = {}
+    for move in request.moves:
+        if move.student_id not in current:
+            raise HTTPException(status_code=400, detail=f"반편성에 없는 학생입니다: {move.student_id}")
+        if not 1 <= move.to_class <= parent.num_classes:
+            raise HTTPException(status_code=400, detail=f"잘못된 반 번호입니다: {move.to_class}")
+        moves[move.student_id] = move.to_class
+    moves = {student_id: to_class for student_id, to_class in moves.items() if current[student_id] != to_class}
+    
+    if not moves:
+        raise HTTPException(status_code=400, detail="변경된 배정이 없습니다")
+    
+    current.update(moves)
+    draft_classes = np.array([current[student_id] for student_id in student_ids.tolist()], dtype=np.int64)
+    
+    # 점수/통계 재계산 (현재 학생 데이터 기준, 삭제된 학생은 제외)
+    snapshot = cohort_cache.get_snapshot(parent.school_id, parent.grade)
+    records = {student.id: student for student in snapshot.students}
+    assignment_dict = {class_num: [] for class_num in range(1, parent.num_classes + 1)}
+    for student_id, class_num in zip(student_ids.tolist(), draft_classes.tolist()):
+        if student_id in records:
+            assignment_dict[class_num].append(records[student_id])
+    
+    rule_engine = RuleEngine(list(snapshot.students), list(snapshot.rules),
+                             list(snapshot.field_definitions) or None, cohort_cache.get_features(snapshot))
+    evaluation = rule_engine.evaluate_assignment(assignment_dict)
+    statistics = _calculate_statistics(assignment_dict, rule_engine.encoder)
+    
+    db_assignment = ClassAssignment(
+        school_id=parent.school_id,
+        name=request.name or f"{parent.name} (수정)",
+        grade=parent.grade,
+        year=parent.year,
+        num_classes=parent.num_classes,
+        total_score=evaluation['total_score'],
+        rule_scores=evaluation['rule_scores'],
+        statistics=statistics
+    )
+    db.add(db_assignment)
+    db.flush()
+    
+    version = assignment_store.save_draft(
+        db, db_assignment.id, assignment_id, student_ids, draft_classes,
+        np.fromiter(moves.keys(), dtype=np.int64, count=len(moves)),
+        np.fromiter(moves.values(), dtype=np.int64, count=len(moves)),
+        note=request.note
+    )
+    
+    db.commit()
+    
+    logger.info(f"초안 저장: ID={db_assignment.id} (부모 {assignment_id}, {len(moves)}명 이동, "
+                f"{'체크포인트' if version.depth == 0 else '변경분'})")
     
     return {
-        "assignment": assignment,
-        "classes": classes
+        "id": db_assignment.id,
+        "parent_id": assignment_id,
+        "version": version.version,
+        "moved": version.moved,
+        "checkpoint": version.depth == 0,
+        "total_score": evaluation['total_score'],
+        "rule_scores": evaluation['rule_scores'],
+        "statistics": statistics,
+        "message": "초안이 저장되었습니다"
     }
 
 
+@router.get("/{assignment_id}/history")
+def get_assignment_history(assignment_id: int, db: Session = Depends(get_db)):
+    """
+    반편성 이력 (최초 반편성과 그로부터 파생된 모든 초안, 버전순)
+    """
+    assignment = db.query(ClassAssignment).filter(ClassAssignment.id == assignment_id).first()
+    
+    if not assignment:
+        raise HTTPException(status_code=404, detail="반편성을 찾을 수 없습니다")
+    
+    info = assignment_store.version_info(db, assignment_id)
+    root_id = info.root_id if info else assignment_id
+    
+    rows = db.execute(
+        select(
+            ClassAssignment.id, ClassAssignment.name, ClassAssignment.total_score, ClassAssignment.created_at,
+            AssignmentVersion.parent_id, AssignmentVersion.version, AssignmentVersion.moved,
+            AssignmentVersion.depth, AssignmentVersion.note
+        )
+        .outerjoin(AssignmentVersion, AssignmentVersion.assignment_id == ClassAssignment.id)
+        .where(or_(ClassAssignment.id == root_id, AssignmentVersion.root_id == root_id))
+    ).all()
+    
+    versions = [
+        {
+            "id": row.id,
+            "name": row.name,
+            "version": row.version or 1,
+            "parent_id": row.parent_id,
+            "moved": row.moved or 0,
+            "checkpoint": row.depth in (None, 0),
+            "note": row.note,
+            "total_score": row.total_score,
+            "created_at": row.created_at
+        }
+        for row in rows
+    ]
+    versions.sort(key=itemgetter("version"))
+    
+    return {"root_id": root_id, "current_id": assignment_id, "versions": versions}
+
+
+@router.get("/{assignment_id}/diff")
+def get_assignment_diff(
+    assignment_id: int,
+    against: Optional[int] = Query(None, description="비교할 반편성 ID (기본값: 부모)"),
+    db: Session = Depends(get_db)
+):
+    """
+    두 반편성 사이에 반이 바뀐 학생 목록
+    
+    한쪽에만 있는 학생은 from_class 또는 to_class가 null입니다.
+    """
+    assignment = db.query(ClassAssignment).filter(ClassAssignment.id == assignment_id).first()
+    
+    if not assignment:
+        raise HTTPException(status_code=404, detail="반편성을 찾을 수 없습니다")
+    
+    if against is None:
+        info = assignment_store.version_info(db, assignment_id)
+        against = info.parent_id if info else None
+        if against is None:
+            raise HTTPException(status_code=400, detail="비교할 반편성을 지정해 주세요 (부모 반편성이 없습니다)")
+    
+    if not db.query(ClassAssignment.id).filter(ClassAssignment.id == against).first():
+        raise HTTPException(status_code=404, detail="비교할 반편성을 찾을 수 없습니다")
+    
+    before = dict(zip(*(array.tolist() for array in assignment_store.load_placements(db, against))))
+    after = dict(zip(*(array.tolist() for array in assignment_store.load_placements(db, assignment_id))))
+    changed = [
+        (student_id, before.get(student_id), after.get(student_id))
+        for student_id in after.keys() | before.keys()
+        if before.get(student_id) != after.get(student_id)
+    ]
+    
+    # 학생 정보는 묶음 단위로 조회
+    found = {}
+    changed_ids = [student_id for student_id, _, _ in changed]
+    for start in range(0, len(changed_ids), assignment_store.STUDENT_BATCH_SIZE):
+        batch_ids = changed_ids[start:start + assignment_store.STUDENT_BATCH_SIZE]
+        for row in db.execute(
+            select(Student.id, Student.name, Student.gender, Student.original_class, Student.number)
+            .where(Student.id.in_(batch_ids))
+        ):
+            found[row.id] = row
+    
+    changes = []
+    for student_id, from_class, to_class in changed:
+        student = found.get(student_id)
+        changes.append({
+            "student_id": student_id,
+            "name": student.name if student else None,
+            "gender": student.gender if student else None,
+            "original_class": student.original_class if student else None,
+            "number": student.number if student else None,
+            "from_class": from_class,
+            "to_class": to_class
+        })
+    changes.sort(key=lambda c: (c["to_class"] or 0, c["from_class"] or 0, c["name"] or ""))
+    
+    return {"assignment_id": assignment_id, "against": against, "moved": len(changes), "changes": changes}
+
+
 @router.delete("/{assignment_id}")
 def delete_assignment(assignment_id: int, db: Session = Depends(get_db)):
     """반편성 삭제"""
@@ -172,13 +516,14 @@ def delete_assignment(assignment_id: int, db: Session = Depends(get_db)):
     if not assignment:
         raise HTTPException(status_code=404, detail="반편성을 찾을 수 없습니다")
     
+    assignment_store.delete_placements(db, assignment_id)
     db.delete(assignment)
     db.commit()
     
     return {"message": "반편성이 삭제되었습니다"}
 
 
-def _calculate_statistics(assignment: dict) -> dict:
+def _calculate_statistics(assignment: dict, encoder: FieldEncoder) -> dict:
     """통계 계산"""
     statistics = {
         "total_students": 0,
@@ -198,14 +543,15 @@ def _calculate_statistics(assignment: dict) -> dict:
         for student in students:
             gender_count[student.gender] = gender_count.get(student.gender, 0) + 1
             
-            # 성적이 있으면 수집
+            # 성적이 있으면 수집 (상/중/하 등은 인코딩된 값)
             if "성적" in student.custom_fields:
-                scores.append(student.custom_fields["성적"])
+                score = encoder.encode_value("성적", student.custom_fields["성적"])
+                if not np.isnan(score):
+                    scores.append(score)
         
         statistics["gender_distribution"][class_num] = gender_count
         
         if scores:
-            import numpy as np
             statistics["average_scores"][class_num] = round(np.mean(scores), 2)
     
     return statistics
@@ -0,0 +1,100 @@
+"""
+백업/복구 API
+"""
+from fastapi import APIRouter, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from typing import Optional
+from pydantic import BaseModel
+import logging
+
+from ..core.config import settings
+from ..core.database import async_engine
+from ..services import backup as backup_service
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+class BackupCreate(BaseModel):
+    """수동 백업 요청"""
+    description: Optional[str] = None
+
+
+@router.get("/")
+def get_backups(kind: Optional[str] = None):
+    """백업 목록 (최신순)"""
+    if kind is not None and kind not in backup_service.BACKUP_KINDS:
+        raise HTTPException(status_code=400, detail=f"알 수 없는 백업 종류입니다: {kind}")
+    return backup_service.list_backups(kind)
+
+
+@router.get("/schedule")
+def get_backup_schedule():
+    """자동 백업 설정과 다음 실행 시각"""
+    next_run = backup_service.next_run_time()
+    return {
+        "enabled": settings.AUTO_BACKUP_ENABLED,
+        "frequency": settings.BACKUP_FREQUENCY,
+        "time": settings.BACKUP_TIME,
+        "encrypted": bool(settings.DATABASE_ENCRYPTION_KEY),
+        "next_run_time": next_run.isoformat() if next_run else None
+    }
+
+
+@router.post("/")
+def create_backup(request: BackupCreate):
+    """
+    수동 백업 생성
+    """
+    try:
+        return backup_service.create_backup("manual", request.description)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/{backup_id}/verify")
+def verify_backup(backup_id: str):
+    """백업 파일 검증 (복호화, 체크섬, DB 무결성)"""
+    try:
+        return backup_service.verify_backup(backup_id)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="백업을 찾을 수 없습니다")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/{backup_id}/restore")
+async def restore_backup(backup_id: str):
+    """
+    백업으로 복구
+
+    백업 파일을 검증한 뒤 현재 데이터를 수동 백업으로 남기고 복구한다.
+    검증에 실패하면 현재 데이터는 바뀌지 않는다.
+    """
+    try:
+        result = await run_in_threadpool(backup_service.restore_backup, backup_id)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="백업을 찾을 수 없습니다")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # 조회 API의 비동기 연결도 복구된 DB로 새로 열도록 풀을 비움
+    # (aiosqlite 연결은 이벤트 루프에서만 닫을 수 있어 서비스 스레드가 아닌 여기서 처리)
+    await async_engine.dispose()
+
+    return {
+        "message": "복구가 완료되었습니다",
+        "restored": result["restored"],
+        "safety_backup": result["safety_backup"]
+    }
+
+
+@router.delete("/{backup_id}")
+def delete_backup(backup_id: str):
+    """백업 삭제"""
+    try:
+        backup_service.delete_backup(backup_id)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="백업을 찾을 수 없습니다")
+    return {"message": "백업이 삭제되었습니다"}
@@ -2,12 +2,15 @@
 반편성 규칙 API
 """
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from pydantic import BaseModel
 
-from ..core.database import get_db
+from ..core.database import get_db, get_async_db
 from ..models.rule import ClassAssignmentRule, RULE_EXAMPLES
+from ..services import cohort_cache
 
 router = APIRouter()
 
@@ -47,11 +50,13 @@ def get_rule_examples():
 
 
 @router.get("/", response_model=List[RuleResponse])
-def get_rules(school_id: int, db: Session = Depends(get_db)):
+async def get_rules(school_id: int, db: AsyncSession = Depends(get_async_db)):
     """규칙 목록 조회"""
-    rules = db.query(ClassAssignmentRule).filter(
-        ClassAssignmentRule.school_id == school_id
-    ).order_by(ClassAssignmentRule.priority.desc()).all()
+    rules = (await db.scalars(
+        select(ClassAssignmentRule)
+        .where(ClassAssignmentRule.school_id == school_id)
+        .order_by(ClassAssignmentRule.priority.desc())
+    )).all()
     return rules
 
 
@@ -62,6 +67,7 @@ def create_rule(rule: RuleCreate, db: Session = Depends(get_db)):
     db.add(db_rule)
     db.commit()
     db.refresh(db_rule)
+    cohort_cache.bump_version(db_rule.school_id)
     return db_rule
 
 
@@ -72,11 +78,15 @@ def update_rule(rule_id: int, rule: RuleCreate, db: Session = Depends(get_db)):
     if not db_rule:
         raise HTTPException(status_code=404, detail="규칙을 찾을 수 없습니다")
     
+    previous_school_id = db_rule.school_id
     for key, value in rule.dict().items():
         setattr(db_rule, key, value)
     
     db.commit()
     db.refresh(db_rule)
+    cohort_cache.bump_version(previous_school_id)
+    if db_rule.school_id != previous_school_id:
+        cohort_cache.bump_version(db_rule.school_id)
     return db_rule
 
 
@@ -87,8 +97,10 @@ def delete_rule(rule_id: int, db: Session = Depends(get_db)):
     if not db_rule:
         raise HTTPException(status_code=404, detail="규칙을 찾을 수 없습니다")
     
+    school_id = db_rule.school_id
     db.delete(db_rule)
     db.commit()
+    cohort_cache.bump_version(school_id)
     return {"message": "규칙이 삭제되었습니다"}
 
 
@@ -101,6 +113,7 @@ def toggle_rule(rule_id: int, db: Session = Depends(get_db)):
     
     db_rule.is_active = not db_rule.is_active
     db.commit()
+    cohort_cache.bump_version(db_rule.school_id)
     
     return {"is_active": db_rule.is_active}
 
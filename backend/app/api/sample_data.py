@@ -1,9 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from app.core.database import get_db
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import get_async_db
 from app.models.student import Student
 from app.models.school import School
 from app.models.rule import ClassAssignmentRule
+from app.services import cohort_cache
 from io import BytesIO
 import pandas as pd
 import random
@@ -269,12 +271,12 @@ async def generate_sample_excel():
     )
 
 @router.post("/load-sample-data/{school_id}")
-async def load_sample_data(school_id: int, db: Session = Depends(get_db)):
+async def load_sample_data(school_id: int, db: AsyncSession = Depends(get_async_db)):
     """샘플 데이터를 데이터베이스에 로드"""
 
     # 기존 학생 데이터 삭제
-    db.query(Student).filter(Student.school_id == school_id).delete()
-    db.commit()
+    await db.execute(delete(Student).where(Student.school_id == school_id))
+    await db.commit()
 
     # 샘플 데이터 생성 (위와 동일한 로직)
     class_configs = [
@@ -478,7 +480,8 @@ async def load_sample_data(school_id: int, db: Session = Depends(get_db)):
 
     # DB에 저장
     db.add_all(students)
-    db.commit()
+    await db.commit()
+    cohort_cache.bump_version(school_id)
 
     return {
         "message": "샘플 데이터가 성공적으로 로드되었습니다.",
@@ -489,12 +492,12 @@ async def load_sample_data(school_id: int, db: Session = Depends(get_db)):
     }
 
 @router.post("/create-sample-rules/{school_id}")
-async def create_sample_rules(school_id: int, db: Session = Depends(get_db)):
+async def create_sample_rules(school_id: int, db: AsyncSession = Depends(get_async_db)):
     """샘플 규칙 생성"""
 
     # 기존 규칙 삭제
-    db.query(ClassAssignmentRule).filter(ClassAssignmentRule.school_id == school_id).delete()
-    db.commit()
+    await db.execute(delete(ClassAssignmentRule).where(ClassAssignmentRule.school_id == school_id))
+    await db.commit()
 
     rules = [
         ClassAssignmentRule(
@@ -601,7 +604,8 @@ async def create_sample_rules(school_id: int, db: Session = Depends(get_db)):
     ]
 
     db.add_all(rules)
-    db.commit()
+    await db.commit()
+    cohort_cache.bump_version(school_id)
 
     return {
         "message": "샘플 규칙이 성공적으로 생성되었습니다.",
@@ -2,12 +2,15 @@
 학교 관리 API
 """
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List
 from pydantic import BaseModel
 
-from ..core.database import get_db
+from ..core.database import get_db, get_async_db
 from ..models.school import School
+from ..services import cohort_cache
 
 router = APIRouter()
 
@@ -31,9 +34,9 @@ class SchoolResponse(BaseModel):
 
 
 @router.get("/", response_model=List[SchoolResponse])
-def get_schools(db: Session = Depends(get_db)):
+async def get_schools(db: AsyncSession = Depends(get_async_db)):
     """학교 목록 조회"""
-    schools = db.query(School).all()
+    schools = (await db.scalars(select(School))).all()
     return schools
 
 
@@ -48,9 +51,9 @@ def create_school(school: SchoolCreate, db: Session = Depends(get_db)):
 
 
 @router.get("/{school_id}", response_model=SchoolResponse)
-def get_school(school_id: int, db: Session = Depends(get_db)):
+async def get_school(school_id: int, db: AsyncSession = Depends(get_async_db)):
     """학교 조회"""
-    school = db.query(School).filter(School.id == school_id).first()
+    school = await db.get(School, school_id)
     if not school:
         raise HTTPException(status_code=404, detail="학교를 찾을 수 없습니다")
     return school
@@ -68,5 +71,24 @@ def update_school(school_id: int, school: SchoolCreate, db: Session = Depends(ge
     
     db.commit()
     db.refresh(db_school)
+    cohort_cache.bump_version(school_id)
     return db_school
 
+
+@router.get("/{school_id}/field-profile")
+async def get_field_profile(school_id: int, db: AsyncSession = Depends(get_async_db)):
+    """
+    필드 프로파일 조회 (마지막 임포트 기준 컬럼별 타입, 결측 비율, 범위, 고유값 수, 상위 값)
+    
+    학생 데이터를 다시 읽지 않고 규칙 편집기에서 필드 값 범위와 선택지를 보여줄 때 사용합니다.
+    """
+    school = await db.get(School, school_id)
+    if not school:
+        raise HTTPException(status_code=404, detail="학교를 찾을 수 없습니다")
+    
+    profile = (school.settings or {}).get("field_profile") or {"updated_at": None, "columns": {}}
+    return {
+        "school_id": school_id,
+        "field_definitions": school.custom_field_definitions or [],
+        **profile
+    }
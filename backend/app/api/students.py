@@ -1,16 +1,25 @@
 """
 학생 관리 API
 """
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Query
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func, or_
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List, Optional
-import tempfile
-import os
+from typing import List, Optional, BinaryIO
+from datetime import datetime
+import json
+import uuid
 
-from ..core.database import get_db
+from ..core.database import get_db, get_async_db
 from ..models.student import Student
 from ..models.school import School
 from ..services.excel_parser import ExcelParser
+from ..services.student_import import (
+    import_roster_stream, import_roster_batch, bulk_upsert_students, store_field_profile
+)
+from ..services import import_progress, cohort_cache
+from ..services.list_query import parse_fields, parse_sort, fetch_list
 from pydantic import BaseModel
 
 router = APIRouter()
@@ -48,25 +57,35 @@ class StudentResponse(BaseModel):
 async def upload_excel(
     school_id: int,
     file: UploadFile = File(...),
+    year: Optional[int] = None,
     db: Session = Depends(get_db)
 ):
     """
-    Excel 파일 업로드 및 학생 데이터 임포트
+    Excel/CSV 파일 업로드 및 학생 데이터 임포트
+    
+    같은 학년도/학년/반/번호/이름의 학생이 이미 있으면 새로 만들지 않고 갱신합니다.
     """
+    year = year or datetime.now().year
+    
+    # 업로드 파일은 Starlette가 이미 SpooledTemporaryFile에 받아 두었으므로 그대로 파싱
+    # (파싱과 DB 저장은 이벤트 루프를 막지 않도록 워커 스레드에서 실행)
+    file.file.seek(0)
+    return await run_in_threadpool(_import_roster, db, school_id, file.file, file.filename, year)
+
+
+def _import_roster(db: Session, school_id: int, buffer: BinaryIO,
+                   filename: Optional[str], year: int) -> dict:
+    """업로드된 명단 파싱 및 저장 (워커 스레드에서 실행)"""
     # 학교 확인
     school = db.query(School).filter(School.id == school_id).first()
     if not school:
         raise HTTPException(status_code=404, detail="학교를 찾을 수 없습니다")
     
-    # 임시 파일로 저장
-    with tempfile.NamedTemporaryFile(delete=False, suffix='.xlsx') as tmp_file:
-        content = await file.read()
-        tmp_file.write(content)
-        tmp_file_path = tmp_file.name
-    
     try:
-        # Excel 파싱
-        students_data, custom_columns, field_definitions = ExcelParser.parse_excel(tmp_file_path)
+        # Excel/CSV 파싱 (확장자로 구분, 파일 이름이 없으면 Excel)
+        students_data, custom_columns, field_definitions, parse_errors, profile = ExcelParser.parse_excel(
+            buffer, with_errors=True, filename=filename or 'upload.xlsx', with_profile=True
+        )
         
         # 데이터 검증
         errors = ExcelParser.validate_data(students_data)
@@ -76,52 +95,210 @@ async def upload_excel(
                 "errors": errors
             }
         
-        # 커스텀 필드 정의 업데이트
+        # 커스텀 필드 정의 및 컬럼 프로파일 업데이트
         school.custom_field_definitions = field_definitions
+        store_field_profile(school, profile)
         
-        # 학생 데이터 저장
-        created_students = []
-        for student_data in students_data:
-            student = Student(
-                school_id=school_id,
-                **student_data
-            )
-            db.add(student)
-            created_students.append(student)
-        
+        # 학생 데이터 저장 (일괄 upsert)
+        summary = bulk_upsert_students(db, school_id, students_data, year)
         db.commit()
+        cohort_cache.bump_version(school_id)
         
         return {
             "success": True,
-            "message": f"{len(created_students)}명의 학생 데이터를 임포트했습니다",
-            "count": len(created_students),
+            "message": f"{len(students_data)}명의 학생 데이터를 임포트했습니다",
+            "count": len(students_data),
+            **summary,
             "custom_columns": custom_columns,
-            "field_definitions": field_definitions
+            "field_definitions": field_definitions,
+            "skipped_rows": parse_errors.to_dict(orient="records")
         }
     
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/upload-batch")
+async def upload_batch(
+    school_id: int,
+    files: List[UploadFile] = File(...),
+    year: Optional[int] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    여러 시트/파일 일괄 임포트 (.xlsx, .xls, .csv, .tsv, .zip)
+    
+    학년별 시트가 있는 통합 문서나 반별 파일을 묶은 zip을 한 번에 올릴 수 있습니다.
+    시트와 파일은 여러 프로세스에서 동시에 파싱하며, 모두 하나의 트랜잭션으로 저장합니다.
+    """
+    year = year or datetime.now().year
+    # 업로드 파일은 Starlette가 스풀해 둔 파일 객체를 그대로 넘김 (메모리로 읽지 않음)
+    uploads = [(file.filename or 'upload.xlsx', file.file) for file in files]
+    
+    def run_import() -> dict:
+        school = db.query(School).filter(School.id == school_id).first()
+        if not school:
+            raise HTTPException(status_code=404, detail="학교를 찾을 수 없습니다")
+        try:
+            summary = import_roster_batch(db, school, uploads, year)
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        cohort_cache.bump_version(school_id)
+        return {
+            "success": True,
+            "message": f"{len(summary['sources'])}개 시트/파일에서 {summary['count']}명의 학생 데이터를 임포트했습니다",
+            **summary
+        }
+    
+    return await run_in_threadpool(run_import)
+
+
+@router.post("/upload-excel-stream")
+def upload_excel_stream(
+    school_id: int,
+    file: UploadFile = File(...),
+    job_id: Optional[str] = None,
+    chunk_size: int = 1000,
+    year: Optional[int] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    대용량 Excel/CSV 파일 스트리밍 임포트 (.xlsx, .csv, .tsv)
+    
+    모든 시트(CSV는 파일 전체)를 묶음 단위로 읽어 검증 후 저장합니다. 오류 행은 건너뛰고 보고합니다.
+    진행 상황은 GET /import-progress/{job_id}로 조회할 수 있습니다.
+    """
+    school = db.query(School).filter(School.id == school_id).first()
+    if not school:
+        raise HTTPException(status_code=404, detail="학교를 찾을 수 없습니다")
+    
+    year = year or datetime.now().year
+    job_id = job_id or uuid.uuid4().hex
+    import_progress.start_job(job_id, filename=file.filename)
     
+    try:
+        # 업로드 파일은 이미 디스크에 스풀되어 있으므로 그대로 읽음
+        summary = import_roster_stream(
+            db, school, file.file, year, file.filename,
+            chunk_size=max(chunk_size, 1),
+            on_progress=lambda progress: import_progress.update_job(job_id, **progress)
+        )
+    except Exception as e:
+        db.rollback()
+        import_progress.update_job(job_id, status="failed", error=str(e))
+        raise HTTPException(status_code=400, detail=str(e))
     finally:
-        # 임시 파일 삭제
-        os.unlink(tmp_file_path)
+        # 실패해도 앞선 묶음은 이미 저장되었음
+        cohort_cache.bump_version(school_id)
+    
+    import_progress.update_job(job_id, status="completed")
+    
+    return {
+        "success": True,
+        "job_id": job_id,
+        "message": f"{summary['count']}명의 학생 데이터를 임포트했습니다",
+        **summary
+    }
+
+
+@router.get("/import-progress/{job_id}")
+def get_import_progress(job_id: str):
+    """임포트 진행 상황 조회"""
+    progress = import_progress.get_job(job_id)
+    if not progress:
+        raise HTTPException(status_code=404, detail="임포트 작업을 찾을 수 없습니다")
+    return progress
+
+
+# 목록 조회에서 선택할 수 있는 필드
+STUDENT_LIST_COLUMNS = {
+    "id": Student.id,
+    "grade": Student.grade,
+    "name": Student.name,
+    "gender": Student.gender,
+    "original_class": Student.original_class,
+    "number": Student.number,
+    "custom_fields": Student.custom_fields,
+    "school_id": Student.school_id,
+    "year": Student.year,
+}
 
+# 정렬 가능한 필드 (그 외 "custom.필드명"으로 커스텀 필드 정렬)
+STUDENT_SORT_KEYS = ("id", "name", "gender", "original_class", "number", "grade", "year")
 
-@router.get("/", response_model=List[StudentResponse])
-def get_students(
+
+def _custom_field(name: str):
+    """커스텀 필드 값 식 (JSON 값 그대로 비교/정렬)"""
+    # 저장된 JSON 키는 json.dumps 기본값대로 \uXXXX로 이스케이프되어 있으므로 경로도 같은 형식으로
+    return func.json_extract(Student.custom_fields, '$.' + json.dumps(name))
+
+
+def _student_sort(key: str):
+    """정렬 키 → SQL 식"""
+    if key.startswith("custom."):
+        return _custom_field(key[len("custom."):])
+    if key in STUDENT_SORT_KEYS:
+        return STUDENT_LIST_COLUMNS[key]
+    raise ValueError(f"정렬할 수 없는 필드: {key}")
+
+
+@router.get("/")
+async def get_students(
     school_id: int,
     grade: Optional[int] = None,
-    db: Session = Depends(get_db)
+    year: Optional[int] = None,
+    name: Optional[str] = None,
+    gender: Optional[str] = None,
+    original_class: Optional[int] = None,
+    custom: Optional[List[str]] = Query(None, description="커스텀 필드 필터 (필드=값, 여러 개 가능)"),
+    sort: Optional[str] = Query(None, description="정렬 (예: name, -original_class, custom.성적)"),
+    fields: Optional[str] = Query(None, description="응답 필드 (예: id,name,gender)"),
+    limit: Optional[int] = Query(None, ge=1, description="페이지 크기 (지정하면 페이지 단위 응답)"),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """학생 목록 조회"""
-    query = db.query(Student).filter(Student.school_id == school_id)
+    """
+    학생 목록 조회
     
+    limit를 지정하면 {"items", "total", "limit", "next_cursor"} 형식으로 한 페이지씩 반환합니다.
+    다음 페이지는 같은 조건에 cursor=next_cursor를 붙여 조회합니다.
+    """
+    conditions = [Student.school_id == school_id]
     if grade:
-        query = query.filter(Student.grade == grade)
+        conditions.append(Student.grade == grade)
+    if year:
+        conditions.append(Student.year == year)
+    if name:
+        conditions.append(Student.name.contains(name.strip()))
+    if gender:
+        conditions.append(Student.gender == gender)
+    if original_class is not None:
+        conditions.append(Student.original_class == original_class)
     
-    students = query.all()
-    return students
+    try:
+        for item in custom or []:
+            field, sep, value = item.partition('=')
+            if not sep or not field.strip():
+                raise ValueError(f"커스텀 필드 필터 형식이 잘못되었습니다: {item} (필드=값)")
+            conditions.append(_custom_value_condition(field.strip(), value.strip()))
+        
+        selected = parse_fields(fields, STUDENT_LIST_COLUMNS, default=list(STUDENT_LIST_COLUMNS))
+        sort_expr, descending = parse_sort(sort, _student_sort, default="id")
+        return await fetch_list(db, STUDENT_LIST_COLUMNS, selected, conditions, sort_expr, descending,
+                                Student.id, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _custom_value_condition(field: str, value: str):
+    """커스텀 필드 = 값 조건 (숫자로 읽을 수 있으면 숫자 값도 일치)"""
+    expr = _custom_field(field)
+    try:
+        number = float(value)
+    except ValueError:
+        return expr == value
+    return or_(expr == value, expr == number)
 
 
 @router.post("/", response_model=StudentResponse)
@@ -131,6 +308,7 @@ def create_student(student: StudentCreate, db: Session = Depends(get_db)):
     db.add(db_student)
     db.commit()
     db.refresh(db_student)
+    cohort_cache.bump_version(db_student.school_id)
     return db_student
 
 
@@ -141,11 +319,15 @@ def update_student(student_id: int, student: StudentCreate, db: Session = Depend
     if not db_student:
         raise HTTPException(status_code=404, detail="학생을 찾을 수 없습니다")
     
+    previous_school_id = db_student.school_id
     for key, value in student.dict().items():
         setattr(db_student, key, value)
     
     db.commit()
     db.refresh(db_student)
+    cohort_cache.bump_version(previous_school_id)
+    if db_student.school_id != previous_school_id:
+        cohort_cache.bump_version(db_student.school_id)
     return db_student
 
 
@@ -156,7 +338,9 @@ def delete_student(student_id: int, db: Session = Depends(get_db)):
     if not db_student:
         raise HTTPException(status_code=404, detail="학생을 찾을 수 없습니다")
     
+    school_id = db_student.school_id
     db.delete(db_student)
     db.commit()
+    cohort_cache.bump_version(school_id)
     return {"message": "학생이 삭제되었습니다"}
 
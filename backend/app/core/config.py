@@ -17,6 +17,28 @@ class Settings(BaseSettings):
     DATABASE_URL: str = "sqlite:///./data/aichangeclass.db"
     DATABASE_ENCRYPTION_KEY: str = ""
     
+    # SQLite 성능 설정 (연결마다 PRAGMA로 적용)
+    SQLITE_JOURNAL_MODE: str = "WAL"          # 쓰기 중에도 읽기가 막히지 않음
+    SQLITE_SYNCHRONOUS: str = "NORMAL"        # WAL에서는 NORMAL도 손상 없이 안전
+    SQLITE_CACHE_SIZE_KB: int = 64 * 1024     # 연결당 페이지 캐시
+    SQLITE_MMAP_SIZE: int = 256 * 1024 * 1024 # 메모리 매핑 읽기 크기 (0이면 사용 안 함)
+    SQLITE_TEMP_STORE: str = "MEMORY"         # 정렬/임시 테이블을 메모리에
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000        # 잠금 대기 시간
+    
+    # 연결 풀 (FastAPI 스레드 풀 작업자 수에 맞춤)
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 30
+    DB_POOL_TIMEOUT: int = 30
+    
+    # 반편성 결과 저장 방식 (packed: 압축 배열 1행, rows: 학생별 행)
+    ASSIGNMENT_STORAGE: str = "packed"
+    
+    # 초안(이동만 저장) 몇 단계마다 전체 결과를 다시 저장할지
+    ASSIGNMENT_CHECKPOINT_INTERVAL: int = 10
+    
+    # 유전 알고리즘 병렬 프로세스 수 (1이면 요청 처리 스레드에서 실행)
+    SOLVER_WORKERS: int = 1
+    
     # Security
     SECRET_KEY: str = "your-secret-key-change-in-production"
     ALGORITHM: str = "HS256"
@@ -24,7 +46,15 @@ class Settings(BaseSettings):
     
     # Directories
     DATA_DIR: str = "./data"
-
+    
+    # Backup (DATABASE_ENCRYPTION_KEY가 있으면 백업 파일을 암호화)
+    BACKUP_DIR: str = "./data/backups"
+    AUTO_BACKUP_ENABLED: bool = True
+    BACKUP_FREQUENCY: str = "daily"           # hourly, daily, weekly, manual
+    BACKUP_TIME: str = "09:00"                # 실행 시각 (hourly는 분만 사용)
+    BACKUP_STEP_PAGES: int = 256              # 온라인 백업 한 단계에서 복사할 페이지 수
+    BACKUP_STEP_SLEEP_MS: int = 10            # 단계/청크 사이 대기 시간 (느린 디스크 보호)
+    
     # LLM (Optional)
     OLLAMA_ENABLED: bool = False
     OLLAMA_HOST: str = "http://localhost:11434"
@@ -1,19 +1,83 @@
 """
 데이터베이스 설정
 """
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from .config import settings
 
-# SQLAlchemy 엔진 생성
-engine = create_engine(
-    settings.DATABASE_URL,
-    connect_args={"check_same_thread": False}  # SQLite용
+# 연결마다 적용하는 SQLite PRAGMA
+SQLITE_PRAGMAS = {
+    "journal_mode": settings.SQLITE_JOURNAL_MODE,
+    "synchronous": settings.SQLITE_SYNCHRONOUS,
+    "cache_size": -settings.SQLITE_CACHE_SIZE_KB,  # 음수: KiB 단위
+    "mmap_size": settings.SQLITE_MMAP_SIZE,
+    "temp_store": settings.SQLITE_TEMP_STORE,
+    "busy_timeout": settings.SQLITE_BUSY_TIMEOUT_MS,
+}
+
+
+# 비동기 드라이버 (동기 드라이버 이름 → 비동기 드라이버 이름)
+ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite"}
+
+
+def _engine_options(url: str, is_async: bool = False) -> dict:
+    """DB 종류별 엔진 옵션 (파일 SQLite는 스레드 간 연결 공유 + 풀 크기 설정)"""
+    database_url = make_url(url)
+    pool_options = {"pool_size": settings.DB_POOL_SIZE, "max_overflow": settings.DB_MAX_OVERFLOW,
+                    "pool_timeout": settings.DB_POOL_TIMEOUT}
+    if database_url.get_backend_name() != "sqlite":
+        return {**pool_options, "pool_pre_ping": True}
+    
+    if is_async:
+        # aiosqlite는 연결마다 전용 스레드를 쓰므로 스레드 검사 옵션이 필요 없음
+        if database_url.database in (None, "", ":memory:"):
+            return {}
+        return {**pool_options, "poolclass": AsyncAdaptedQueuePool}
+    
+    options = {"connect_args": {"check_same_thread": False}}  # SQLite용
+    if database_url.database not in (None, "", ":memory:"):
+        options.update(pool_options)
+    return options
+
+
+def _async_url(url: str) -> str:
+    """동기 DB 주소 → 비동기 드라이버 주소 (sqlite:/// → sqlite+aiosqlite:///)"""
+    database_url = make_url(url)
+    driver = ASYNC_DRIVERS.get(database_url.drivername, database_url.drivername)
+    return database_url.set(drivername=driver).render_as_string(hide_password=False)
+
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    """새 연결마다 성능 PRAGMA 적용"""
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+
+
+# SQLAlchemy 엔진 생성 (쓰기/임포트/반편성 생성용 동기 엔진)
+engine = create_engine(settings.DATABASE_URL, **_engine_options(settings.DATABASE_URL))
+
+# 비동기 엔진 (조회 위주 API용, 스레드 풀을 쓰지 않음)
+async_engine = create_async_engine(
+    _async_url(settings.DATABASE_URL), **_engine_options(settings.DATABASE_URL, is_async=True)
 )
 
+if engine.dialect.name == "sqlite":
+    event.listen(engine, "connect", _apply_sqlite_pragmas)
+    event.listen(async_engine.sync_engine, "connect", _apply_sqlite_pragmas)
+
+
 # 세션 팩토리
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False,
+                                       expire_on_commit=False)
 
 # Base 클래스
 Base = declarative_base()
@@ -27,3 +91,8 @@ def get_db():
     finally:
         db.close()
 
+
+async def get_async_db():
+    """비동기 데이터베이스 세션 의존성"""
+    async with AsyncSessionLocal() as db:
+        yield db
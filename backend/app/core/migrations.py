@@ -0,0 +1,29 @@
+"""
+데이터베이스 마이그레이션 (Alembic)
+"""
+from pathlib import Path
+from alembic import command
+from alembic.config import Config
+from sqlalchemy.engine import Engine
+import logging
+
+logger = logging.getLogger(__name__)
+
+# backend 디렉토리 (alembic.ini, migrations/ 위치)
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+
+
+def alembic_config() -> Config:
+    """Alembic 설정 (실행 위치와 관계없이 backend 기준 경로 사용)"""
+    config = Config(str(BACKEND_DIR / "alembic.ini"))
+    config.set_main_option("script_location", str(BACKEND_DIR / "migrations"))
+    return config
+
+
+def run_migrations(engine: Engine) -> None:
+    """최신 마이그레이션까지 적용 (앱 시작 시 호출)"""
+    config = alembic_config()
+    with engine.begin() as connection:
+        config.attributes["connection"] = connection
+        command.upgrade(config, "head")
+    logger.info("데이터베이스 마이그레이션 적용 완료")
@@ -1,13 +1,16 @@
 """
 반편성 알고리즘
 """
-from typing import List, Dict, Tuple
-import random
+from typing import List, Dict, Tuple, Any, Optional
+from concurrent.futures import ProcessPoolExecutor
+import time
 import numpy as np
 import logging
-from ..models.student import Student
 from ..models.rule import ClassAssignmentRule
 from .rule_engine import RuleEngine
+from .field_encoder import EncodedFeatures
+from . import shared_cohort
+from .student_record import StudentRecord, to_student_records
 
 logger = logging.getLogger(__name__)
 
@@ -15,109 +18,154 @@ logger = logging.getLogger(__name__)
 class AssignmentAlgorithm:
     """반편성 알고리즘"""
     
-    def __init__(self, students: List[Student], rules: List[ClassAssignmentRule], num_classes: int):
+    # 저장되는 수렴 기록의 최대 지점 수 (초과 시 다운샘플링)
+    TRACE_MAX_POINTS = 200
+    
+    def __init__(self, students: List[Any], rules: List[ClassAssignmentRule], num_classes: int,
+                 field_definitions: Optional[List[Dict]] = None,
+                 features: Optional[EncodedFeatures] = None):
         """
         Args:
-            students: 학생 리스트
+            students: 학생 리스트 (Student 모델이면 StudentRecord로 변환)
             rules: 규칙 리스트
             num_classes: 반 개수
+            field_definitions: 학교의 커스텀 필드 정의
+            features: 피처 저장소에서 읽은 미리 인코딩된 특성 (선택)
         """
-        self.students = students
+        self.students = to_student_records(students)
         self.rules = rules
-        self.num_classes = num_classes
-        self.rule_engine = RuleEngine(students, rules)
+        self._setup(RuleEngine(self.students, rules, field_definitions, features),
+                    len(self.students), num_classes)
         
         logger.info(f"AssignmentAlgorithm 초기화: {len(students)}명 → {num_classes}개 반")
     
-    def generate_assignment(self, method: str = 'genetic', iterations: int = 1000) -> Dict[int, List[Student]]:
+    @classmethod
+    def from_rule_engine(cls, rule_engine: RuleEngine, size: int, num_classes: int) -> "AssignmentAlgorithm":
+        """
+        학생 객체 없이 평가 전용 엔진으로 생성 (병렬 작업자용)
+        
+        반 번호 배열을 만드는 내부 메서드(_genetic_labels 등)만 사용할 수 있다.
+        """
+        algorithm = cls.__new__(cls)
+        algorithm.students = []
+        algorithm.rules = rule_engine.rules
+        algorithm._setup(rule_engine, size, num_classes)
+        return algorithm
+    
+    def _setup(self, rule_engine: RuleEngine, size: int, num_classes: int):
+        self.rule_engine = rule_engine
+        self.size = size
+        self.num_classes = num_classes
+        self.class_ids = np.arange(1, num_classes + 1, dtype=np.int32)
+        self._rng = np.random.default_rng()
+        self.trace: List[Dict[str, float]] = []
+        self._trace_start = time.perf_counter()
+    
+    def generate_assignment(self, method: str = 'genetic', iterations: int = 1000,
+                            workers: int = 1) -> Dict[int, List[StudentRecord]]:
         """
         반편성 생성
         
         Args:
             method: 'random', 'greedy', 'genetic'
             iterations: 반복 횟수
+            workers: 유전 알고리즘 병렬 프로세스 수 (2 이상이면 프로세스마다 독립 개체군을
+                     돌리고 가장 좋은 결과 사용)
             
         Returns:
             {반번호: [학생들]} 형태의 딕셔너리
         """
+        self.trace = []
+        self._trace_start = time.perf_counter()
+        
         if method == 'random':
-            return self._random_assignment()
+            labels = self._random_labels()
+            result = self.rule_engine.evaluate_labels(labels, self.class_ids)
+            self._record_trace(result['total_score'], result['total_score'])
         elif method == 'greedy':
-            return self._greedy_assignment()
+            labels = self._greedy_labels()
+        elif method == 'genetic' and workers > 1:
+            labels = self._parallel_genetic_labels(iterations, workers)
         elif method == 'genetic':
-            return self._genetic_assignment(iterations)
+            labels = self._genetic_labels(iterations)
         else:
             raise ValueError(f"알 수 없는 방법: {method}")
+        return self._to_assignment(labels)
     
-    def _random_assignment(self) -> Dict[int, List[Student]]:
-        """무작위 배정"""
-        students_copy = self.students.copy()
-        random.shuffle(students_copy)
-        
+    # 내부 표현: 학생 인덱스 순서의 반 번호 배열 (int32, 미배정: -1)
+    
+    def _to_assignment(self, labels: np.ndarray) -> Dict[int, List[StudentRecord]]:
+        """반 번호 배열 → {반번호: [학생들]}"""
         assignment = {i: [] for i in range(1, self.num_classes + 1)}
-        
-        for idx, student in enumerate(students_copy):
-            class_num = (idx % self.num_classes) + 1
-            assignment[class_num].append(student)
-        
+        for student, class_num in zip(self.students, labels.tolist()):
+            if class_num in assignment:
+                assignment[class_num].append(student)
         return assignment
     
-    def _greedy_assignment(self) -> Dict[int, List[Student]]:
+    def _random_labels(self) -> np.ndarray:
+        """무작위 배정 (반별 인원이 최대 1명 차이)"""
+        labels = (np.arange(self.size, dtype=np.int32) % self.num_classes) + 1
+        self._rng.shuffle(labels)
+        return labels
+    
+    def _greedy_labels(self) -> np.ndarray:
         """탐욕 알고리즘 - 규칙을 고려하여 순차적으로 배정"""
-        assignment = {i: [] for i in range(1, self.num_classes + 1)}
-        students_copy = self.students.copy()
+        labels = np.full(self.size, -1, dtype=np.int32)
         
         # 우선순위가 높은 규칙부터 처리
         # 1. 성별 균형을 위해 성별로 정렬
-        students_copy.sort(key=lambda s: (s.gender, random.random()))
+        tie_breaks = self._rng.random(self.size)
+        order = sorted(range(self.size), key=lambda i: (self.students[i].gender, tie_breaks[i]))
         
-        for student in students_copy:
+        for idx in order:
             # 각 반에 배정했을 때의 점수 계산
             best_class = None
             best_score = -1
+            candidate_scores = []
             
             for class_num in range(1, self.num_classes + 1):
                 # 임시 배정
-                assignment[class_num].append(student)
+                labels[idx] = class_num
                 
                 # 점수 계산
-                result = self.rule_engine.evaluate_assignment(assignment)
+                result = self.rule_engine.evaluate_labels(labels, self.class_ids)
                 score = result['total_score']
+                candidate_scores.append(score)
                 
                 if score > best_score:
                     best_score = score
                     best_class = class_num
-                
-                # 임시 배정 취소
-                assignment[class_num].pop()
             
             # 최적의 반에 배정
-            assignment[best_class].append(student)
+            labels[idx] = best_class
+            self._record_trace(best_score, float(np.mean(candidate_scores)))
         
-        return assignment
+        return labels
     
-    def _genetic_assignment(self, iterations: int = 1000) -> Dict[int, List[Student]]:
-        """유전 알고리즘"""
+    def _genetic_labels(self, iterations: int = 1000) -> np.ndarray:
+        """유전 알고리즘 (개체 = 반 번호 배열)"""
         population_size = 50
         mutation_rate = 0.1
         
         # 초기 개체군 생성
-        population = [self._random_assignment() for _ in range(population_size)]
+        population = [self._random_labels() for _ in range(population_size)]
         
-        best_assignment = None
+        best_labels = None
         best_score = -1
         
         for iteration in range(iterations):
             # 평가
             scores = []
-            for assignment in population:
-                result = self.rule_engine.evaluate_assignment(assignment)
+            for labels in population:
+                result = self.rule_engine.evaluate_labels(labels, self.class_ids)
                 score = result['total_score']
                 scores.append(score)
                 
                 if score > best_score:
                     best_score = score
-                    best_assignment = assignment
+                    best_labels = labels
+            
+            self._record_trace(best_score, float(np.mean(scores)))
             
             if iteration % 100 == 0:
                 logger.info(f"반복 {iteration}/{iterations}: 최고 점수 = {best_score:.2f}")
@@ -138,14 +186,14 @@ class AssignmentAlgorithm:
             # 교차 및 돌연변이
             while len(new_population) < population_size:
                 # 부모 선택
-                parent1 = population[random.choice(elite_indices)]
-                parent2 = population[random.choice(elite_indices)]
+                parent1 = population[self._rng.choice(elite_indices)]
+                parent2 = population[self._rng.choice(elite_indices)]
                 
                 # 교차
                 child = self._crossover(parent1, parent2)
                 
                 # 돌연변이
-                if random.random() < mutation_rate:
+                if self._rng.random() < mutation_rate:
                     child = self._mutate(child)
                 
                 new_population.append(child)
@@ -153,56 +201,109 @@ class AssignmentAlgorithm:
             population = new_population
         
         logger.info(f"최종 점수: {best_score:.2f}")
-        return best_assignment
-    
-    def _crossover(self, parent1: Dict[int, List[Student]], 
-                   parent2: Dict[int, List[Student]]) -> Dict[int, List[Student]]:
-        """교차 연산"""
-        child = {i: [] for i in range(1, self.num_classes + 1)}
-        
-        for student in self.students:
-            # 부모 중 하나에서 무작위로 선택
-            if random.random() < 0.5:
-                # parent1에서 학생이 속한 반 찾기
-                for class_num, students in parent1.items():
-                    if student in students:
-                        child[class_num].append(student)
-                        break
-            else:
-                # parent2에서 학생이 속한 반 찾기
-                for class_num, students in parent2.items():
-                    if student in students:
-                        child[class_num].append(student)
-                        break
-        
-        return child
-    
-    def _mutate(self, assignment: Dict[int, List[Student]]) -> Dict[int, List[Student]]:
+        return best_labels
+    
+    def _parallel_genetic_labels(self, iterations: int, workers: int) -> np.ndarray:
+        """
+        유전 알고리즘 병렬 실행 (작업자마다 독립 개체군, 가장 높은 점수의 결과 사용)
+        
+        규칙 엔진 배열은 공유 메모리로 한 번만 전달하고, 수렴 기록은 선택된 작업자의 것을 사용한다.
+        """
+        with shared_cohort.SharedCohort(self.rule_engine) as shared:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = [pool.submit(_solve_island, shared.handle, self.num_classes, iterations)
+                           for _ in range(workers)]
+                results = [future.result() for future in futures]
+        
+        best_score, best_labels, trace = max(results, key=lambda result: result[0])
+        self.rule_engine.evaluation_count += sum(result[2][-1]["evaluations"] for result in results if result[2])
+        self.trace = trace
+        logger.info(f"병렬 유전 알고리즘 완료: 작업자 {workers}개, 최종 점수: {best_score:.2f}")
+        return best_labels
+    
+    def _record_trace(self, best_score: float, mean_score: float):
+        """수렴 기록 추가 (세대/단계별 최고 점수, 평균 점수, 경과 시간, 평가 횟수)"""
+        self.trace.append({
+            "best": round(float(best_score), 2),
+            "mean": round(float(mean_score), 2),
+            "elapsed": round(time.perf_counter() - self._trace_start, 4),
+            "evaluations": self.rule_engine.evaluation_count
+        })
+    
+    def get_convergence_trace(self, max_points: int = None) -> Dict[str, Any]:
+        """
+        다운샘플링된 수렴 기록 반환
+        
+        Args:
+            max_points: 최대 지점 수 (기본값: TRACE_MAX_POINTS)
+            
+        Returns:
+            {
+                "step": [0, 5, ...], "best": [...], "mean": [...],
+                "elapsed": [...], "evaluations": [...],
+                "total_steps": 1000, "plateau_step": 120
+            }
+        """
+        max_points = max_points or self.TRACE_MAX_POINTS
+        total_steps = len(self.trace)
+        
+        # 첫 지점과 마지막 지점은 항상 포함
+        if total_steps > max_points:
+            steps = np.unique(np.linspace(0, total_steps - 1, max_points).round().astype(int)).tolist()
+        else:
+            steps = list(range(total_steps))
+        
+        # 최고 점수가 마지막으로 개선된 단계 (이후는 정체 구간)
+        plateau_step = 0
+        for step in range(1, total_steps):
+            if self.trace[step]["best"] > self.trace[step - 1]["best"]:
+                plateau_step = step
+        
+        convergence = {key: [self.trace[i][key] for i in steps]
+                       for key in ("best", "mean", "elapsed", "evaluations")}
+        convergence["step"] = steps
+        convergence["total_steps"] = total_steps
+        convergence["plateau_step"] = plateau_step
+        return convergence
+    
+    def _crossover(self, parent1: np.ndarray, parent2: np.ndarray) -> np.ndarray:
+        """교차 연산 - 학생마다 부모 중 하나의 반을 무작위로 물려받음"""
+        from_parent1 = self._rng.random(self.size) < 0.5
+        return np.where(from_parent1, parent1, parent2)
+    
+    def _mutate(self, labels: np.ndarray) -> np.ndarray:
         """돌연변이 연산 - 일부 학생의 반을 변경"""
-        mutated = {k: v.copy() for k, v in assignment.items()}
+        mutated = labels.copy()
+        if self.num_classes < 2:
+            return mutated
         
         # 5% 학생의 반을 변경
-        num_mutations = max(1, len(self.students) // 20)
+        num_mutations = max(1, self.size // 20)
+        indices = self._rng.integers(self.size, size=num_mutations)
+        shifts = self._rng.integers(1, self.num_classes, size=num_mutations)
         
-        for _ in range(num_mutations):
-            # 무작위 학생 선택
-            student = random.choice(self.students)
-            
-            # 현재 반 찾기
-            current_class = None
-            for class_num, students in mutated.items():
-                if student in students:
-                    current_class = class_num
-                    break
-            
-            if current_class is None:
-                continue
-            
-            # 다른 반으로 이동
-            new_class = random.choice([c for c in range(1, self.num_classes + 1) if c != current_class])
-            
-            mutated[current_class].remove(student)
-            mutated[new_class].append(student)
+        # 다른 반으로 이동 (같은 학생이 여러 번 뽑히면 차례로 적용)
+        for idx, shift in zip(indices.tolist(), shifts.tolist()):
+            mutated[idx] = (mutated[idx] - 1 + shift) % self.num_classes + 1
         
         return mutated
 
+
+def _solve_island(handle: "shared_cohort.CohortHandle", num_classes: int,
+                  iterations: int) -> Tuple[float, np.ndarray, List[Dict[str, float]]]:
+    """
+    병렬 작업자: 공유 메모리의 규칙 엔진으로 유전 알고리즘 1회 실행
+    
+    Returns:
+        (최고 점수, 반 번호 배열, 수렴 기록)
+    """
+    shm, rule_engine = shared_cohort.attach(handle)
+    try:
+        algorithm = AssignmentAlgorithm.from_rule_engine(rule_engine, handle.meta["size"], num_classes)
+        labels = algorithm._genetic_labels(iterations)
+        trace = algorithm.trace
+        best_score = trace[-1]["best"] if trace else 0.0
+        del algorithm, rule_engine
+        return best_score, np.array(labels), trace
+    finally:
+        shared_cohort.detach(shm)
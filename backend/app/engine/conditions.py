@@ -0,0 +1,108 @@
+"""
+복합 규칙 조건 컴파일러
+
+조건식을 반편성 1회당 한 번 학생별 불리언 마스크로 변환한다.
+
+조건식 형식:
+    - 단일 조건: {"field": "성적", "operator": ">=", "value": "중"}
+    - 리스트: 모든 조건을 만족 (and)
+    - {"and": [...]}, {"or": [...]}, {"not": 조건식}
+
+연산자: ==, !=, >, >=, <, <=, in, not_in, between ([최소, 최대])
+"""
+from typing import Any, Dict, List, Union
+import numpy as np
+from .field_encoder import FieldEncoder
+
+Condition = Union[Dict[str, Any], List[Any]]
+
+COMPARISON_OPERATORS = {
+    '>': np.greater,
+    '>=': np.greater_equal,
+    '<': np.less,
+    '<=': np.less_equal,
+}
+
+
+def compile_conditions(conditions: Condition, encoder: FieldEncoder) -> np.ndarray:
+    """
+    조건식 → 학생별 불리언 마스크
+
+    Args:
+        conditions: 조건식
+        encoder: 학생 필드 인코더
+
+    Returns:
+        (학생 수,) 불리언 배열
+
+    Raises:
+        ValueError: 알 수 없는 연산자 또는 범주형 필드의 대소 비교
+    """
+    if isinstance(conditions, list):
+        mask = np.ones(encoder.size, dtype=bool)
+        for condition in conditions:
+            mask &= compile_conditions(condition, encoder)
+        return mask
+
+    if 'and' in conditions:
+        return compile_conditions(list(conditions['and']), encoder)
+
+    if 'or' in conditions:
+        mask = np.zeros(encoder.size, dtype=bool)
+        for condition in conditions['or']:
+            mask |= compile_conditions(condition, encoder)
+        return mask
+
+    if 'not' in conditions:
+        return ~compile_conditions(conditions['not'], encoder)
+
+    return _compile_leaf(conditions, encoder)
+
+
+def _compile_leaf(condition: Dict[str, Any], encoder: FieldEncoder) -> np.ndarray:
+    """단일 조건 → 마스크"""
+    field = condition['field']
+    operator = condition['operator']
+    value = condition.get('value')
+
+    if encoder.encoding(field)['encoding'] == 'onehot':
+        return _compile_categorical(field, operator, value, encoder)
+
+    values = encoder.numeric(field)
+
+    if operator == '==':
+        return values == encoder.encode_value(field, value)
+    if operator == '!=':
+        return ~(values == encoder.encode_value(field, value))
+    if operator in COMPARISON_OPERATORS:
+        # 결측값(NaN)은 항상 False
+        return COMPARISON_OPERATORS[operator](values, encoder.encode_value(field, value))
+    if operator == 'in':
+        return np.isin(values, [encoder.encode_value(field, v) for v in value])
+    if operator in ('not_in', 'not in'):
+        return ~np.isin(values, [encoder.encode_value(field, v) for v in value])
+    if operator == 'between':
+        min_val, max_val = (encoder.encode_value(field, v) for v in value)
+        return (values >= min_val) & (values <= max_val)
+
+    raise ValueError(f"알 수 없는 연산자: {operator}")
+
+
+def _compile_categorical(field: str, operator: str, value: Any, encoder: FieldEncoder) -> np.ndarray:
+    """범주형(원-핫) 필드 조건 → 마스크"""
+    codes, categories = encoder.codes(field)
+    lookup = {label: i for i, label in enumerate(categories)}
+
+    def to_codes(targets: List[Any]) -> List[int]:
+        return [lookup[str(t).strip()] for t in targets if str(t).strip() in lookup]
+
+    if operator == '==':
+        return np.isin(codes, to_codes([value]))
+    if operator == '!=':
+        return ~np.isin(codes, to_codes([value]))
+    if operator == 'in':
+        return np.isin(codes, to_codes(value))
+    if operator in ('not_in', 'not in'):
+        return ~np.isin(codes, to_codes(value))
+
+    raise ValueError(f"범주형 필드 '{field}'에는 '{operator}' 연산자를 사용할 수 없습니다")
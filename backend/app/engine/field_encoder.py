@@ -0,0 +1,224 @@
+"""
+학생 필드 인코딩 (Excel 임포트와 규칙 엔진에서 공통 사용)
+
+커스텀 필드 값을 규칙 평가에 쓸 수 있는 숫자 배열로 변환한다.
+
+- numeric: 숫자 그대로 (예: 성적 85)
+- ordinal: 순서가 있는 범주 → 1부터 시작하는 순위 (예: 하=1, 중=2, 상=3)
+- boolean: 예/아니오 → 1/0 (예: 특별관리='예')
+- onehot: 순서가 없는 범주 → 범주 코드 (반별 범주 비율 비교에 사용, 예: 특기)
+"""
+from typing import List, Dict, Any, Iterable, Optional, Tuple
+from dataclasses import dataclass, field as dataclass_field
+import numbers
+import numpy as np
+import logging
+from .student_record import StudentRecord
+
+logger = logging.getLogger(__name__)
+
+# 성별 필드 이름 (학생의 gender 속성을 가리킴)
+GENDER_FIELDS = ('gender', '성별')
+
+# 알려진 순서형 척도 (낮음 → 높음)
+ORDINAL_SCALES = [
+    ['하', '중', '상'],
+    ['하', '중하', '중', '중상', '상'],
+    ['미흡', '보통', '우수'],
+    ['미흡', '보통', '우수', '매우우수'],
+    ['노력요함', '보통', '잘함', '매우잘함'],
+    ['낮음', '보통', '높음'],
+    ['C', 'B', 'A'],
+    ['D', 'C', 'B', 'A'],
+]
+
+# 참/거짓으로 해석하는 값
+TRUE_VALUES = {'예', '네', 'O', 'o', 'Y', 'y', 'yes', 'Yes', 'YES', 'true', 'True', 'TRUE', '1', '있음', 'V', 'v', '✓'}
+FALSE_VALUES = {'아니오', '아니요', 'X', 'x', 'N', 'n', 'no', 'No', 'NO', 'false', 'False', 'FALSE', '0', '없음', '-', ''}
+
+
+def _is_missing(value: Any) -> bool:
+    """값이 비어있는지 확인 (None, NaN, 빈 문자열)"""
+    if value is None:
+        return True
+    if isinstance(value, float) and np.isnan(value):
+        return True
+    return isinstance(value, str) and value.strip() == ''
+
+
+def infer_field_encoding(values: Iterable[Any]) -> Dict[str, Any]:
+    """
+    필드 값들로부터 인코딩 방식 추론
+
+    Args:
+        values: 필드의 (고유) 값들
+
+    Returns:
+        {"encoding": "numeric"} / {"encoding": "boolean"} /
+        {"encoding": "ordinal", "levels": ["하", "중", "상"]} /
+        {"encoding": "onehot", "categories": ["축구", "미술"]}
+    """
+    present = [v for v in values if not _is_missing(v)]
+
+    if present and all(isinstance(v, bool) for v in present):
+        return {"encoding": "boolean"}
+    if present and all(isinstance(v, numbers.Number) for v in present):
+        return {"encoding": "numeric"}
+
+    labels = sorted({str(v).strip() for v in present})
+    if labels and set(labels) <= (TRUE_VALUES | FALSE_VALUES):
+        return {"encoding": "boolean"}
+
+    # 가장 작은 척도부터 확인 (모든 값이 척도에 포함되면 순서형)
+    for scale in ORDINAL_SCALES:
+        if labels and set(labels) <= set(scale):
+            return {"encoding": "ordinal", "levels": list(scale)}
+
+    return {"encoding": "onehot", "categories": labels}
+
+
+@dataclass
+class EncodedFeatures:
+    """
+    미리 인코딩된 학생 특성 (피처 저장소에 저장/메모리 매핑되는 단위)
+
+    모든 배열은 student_ids와 같은 학생 인덱스 순서이다.
+    """
+    student_ids: np.ndarray                                   # 학생 ID (int64)
+    encodings: Dict[str, Dict[str, Any]] = dataclass_field(default_factory=dict)
+    numeric: Dict[str, np.ndarray] = dataclass_field(default_factory=dict)      # 필드 → 실수 배열
+    codes: Dict[str, Tuple[np.ndarray, List[str]]] = dataclass_field(default_factory=dict)  # 범주형 필드 → (코드, 범주)
+    relations: Dict[str, np.ndarray] = dataclass_field(default_factory=dict)    # 참조 필드 → (쌍 개수, 2) 인덱스 쌍
+
+    def matches(self, students: List[StudentRecord]) -> bool:
+        """같은 학생 목록(같은 순서)으로 만든 특성인지 확인"""
+        return (len(self.student_ids) == len(students)
+                and bool(np.array_equal(self.student_ids, [s.id if s.id is not None else -1 for s in students])))
+
+
+class FieldEncoder:
+    """학생 필드 → 숫자 배열 인코더 (반편성 1회당 1번 생성)"""
+
+    def __init__(self, students: List[StudentRecord], field_definitions: Optional[List[Dict]] = None,
+                 features: Optional[EncodedFeatures] = None):
+        """
+        Args:
+            students: 학생 리스트 (배열의 인덱스 순서)
+            field_definitions: 학교의 custom_field_definitions
+            features: 미리 인코딩된 특성 (있으면 해당 필드는 다시 인코딩하지 않음)
+        """
+        self.students = students
+        self.size = len(students)
+        self.definitions = {d['name']: d for d in (field_definitions or []) if d.get('name')}
+
+        # 필드별 인코딩 결과 캐시
+        self._encodings: Dict[str, Dict[str, Any]] = {}
+        self._numeric: Dict[str, np.ndarray] = {}
+        self._codes: Dict[str, Tuple[np.ndarray, List[str]]] = {}
+
+        if features is not None:
+            self._encodings.update(features.encodings)
+            self._numeric.update(features.numeric)
+            self._codes.update(features.codes)
+
+    def fields(self) -> List[str]:
+        """인코딩 대상 필드 목록 (성별 + 정의된 필드 + 학생 값에 있는 필드)"""
+        names = set(self.definitions)
+        for s in self.students:
+            names.update(s.custom_fields or {})
+        return [GENDER_FIELDS[0]] + sorted(names - set(GENDER_FIELDS))
+
+    def raw_values(self, field: str) -> List[Any]:
+        """필드의 원래 값 목록 (학생 인덱스 순서)"""
+        if field in GENDER_FIELDS:
+            return [s.gender for s in self.students]
+        return [(s.custom_fields or {}).get(field) for s in self.students]
+
+    def encoding(self, field: str) -> Dict[str, Any]:
+        """필드 인코딩 방식 (필드 정의 우선, 없으면 값으로 추론)"""
+        if field in self._encodings:
+            return self._encodings[field]
+
+        if field in GENDER_FIELDS:
+            encoding = {"encoding": "gender"}
+        else:
+            definition = self.definitions.get(field, {})
+            if definition.get('encoding'):
+                encoding = {k: definition[k] for k in ('encoding', 'levels', 'categories') if k in definition}
+            elif definition.get('type') == 'number':
+                encoding = {"encoding": "numeric"}
+            elif definition.get('type') == 'boolean':
+                encoding = {"encoding": "boolean"}
+            else:
+                encoding = infer_field_encoding(set(map(_hashable, self.raw_values(field))))
+
+        self._encodings[field] = encoding
+        return encoding
+
+    def encode_value(self, field: str, value: Any) -> float:
+        """단일 값을 숫자로 변환 (변환할 수 없으면 NaN)"""
+        if _is_missing(value) and self.encoding(field)['encoding'] != 'boolean':
+            return np.nan
+
+        kind = self.encoding(field)['encoding']
+        if kind == 'gender':
+            return 1.0 if value == '남' else 0.0
+        if kind == 'boolean':
+            if isinstance(value, bool):
+                return float(value)
+            return 1.0 if str(value).strip() in TRUE_VALUES else 0.0
+        if kind == 'ordinal':
+            levels = self.encoding(field)['levels']
+            label = str(value).strip()
+            return float(levels.index(label) + 1) if label in levels else np.nan
+
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return np.nan
+
+    def numeric(self, field: str) -> np.ndarray:
+        """
+        필드를 실수 배열로 인코딩 (결측값: NaN)
+
+        Raises:
+            ValueError: 순서가 없는 범주형 필드 (codes 사용)
+        """
+        if field in self._numeric:
+            return self._numeric[field]
+        if self.encoding(field)['encoding'] == 'onehot':
+            raise ValueError(f"범주형 필드는 숫자로 변환할 수 없습니다: {field}")
+
+        values = np.array([self.encode_value(field, v) for v in self.raw_values(field)], dtype=np.float64)
+        self._numeric[field] = values
+        return values
+
+    def codes(self, field: str) -> Tuple[np.ndarray, List[str]]:
+        """
+        필드를 범주 코드 배열로 인코딩
+
+        Returns:
+            (범주 인덱스 배열 (결측값: -1), 범주 목록)
+        """
+        if field in self._codes:
+            return self._codes[field]
+
+        raw = [None if _is_missing(v) else str(v).strip() for v in self.raw_values(field)]
+        encoding = self.encoding(field)
+        categories = list(encoding.get('categories') or encoding.get('levels') or [])
+        for label in sorted({v for v in raw if v is not None} - set(categories)):
+            categories.append(label)
+
+        lookup = {label: i for i, label in enumerate(categories)}
+        codes = np.array([lookup[v] if v is not None else -1 for v in raw], dtype=np.int32)
+        self._codes[field] = (codes, categories)
+        return codes, categories
+
+
+def _hashable(value: Any) -> Any:
+    """집합에 넣을 수 있도록 값 변환 (리스트 등은 문자열로)"""
+    try:
+        hash(value)
+        return value
+    except TypeError:
+        return str(value)
@@ -0,0 +1,78 @@
+"""
+학생 관계 그래프 (친구/갈등 관계망)
+
+가중치가 있는 무방향 관계를 희소 인접 행렬로 보관하고,
+반 배정 배열(학생 인덱스별 반 번호)에 대해 반 내부 관계를 계산한다.
+"""
+from typing import Dict, Tuple
+import numpy as np
+from scipy import sparse
+
+
+class RelationGraph:
+    """희소 인접 행렬 기반 관계 그래프"""
+
+    def __init__(self, size: int, sources: np.ndarray, targets: np.ndarray, weights: np.ndarray):
+        """
+        Args:
+            size: 학생 수
+            sources: 관계 시작 학생 인덱스 배열
+            targets: 관계 대상 학생 인덱스 배열
+            weights: 관계 가중치 배열 (같은 쌍이 여러 번 나오면 합산)
+        """
+        off_diagonal = sources != targets
+        matrix = sparse.coo_matrix(
+            (weights[off_diagonal], (sources[off_diagonal], targets[off_diagonal])), shape=(size, size)
+        ).tocsr()
+        matrix = (matrix + matrix.T).tocsr()  # 무방향
+        matrix.eliminate_zeros()
+        self.size = size
+
+        # 평가용 간선 목록 (대칭 행렬이므로 양방향 모두 포함)
+        coo = matrix.tocoo()
+        self._rows = coo.row.astype(np.int32)
+        self._cols = coo.col.astype(np.int32)
+        self._weights = coo.data.astype(np.float64)
+        self.degree = np.asarray(matrix.sum(axis=1)).ravel()
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        """평가에 필요한 배열 (공유 메모리 전달용, from_arrays로 복원)"""
+        return {"rows": self._rows, "cols": self._cols, "weights": self._weights, "degree": self.degree}
+
+    @classmethod
+    def from_arrays(cls, size: int, arrays: Dict[str, np.ndarray]) -> "RelationGraph":
+        """arrays() 결과로 그래프 복원 (배열은 복사하지 않음)"""
+        graph = cls.__new__(cls)
+        graph.size = size
+        graph._rows = arrays["rows"]
+        graph._cols = arrays["cols"]
+        graph._weights = arrays["weights"]
+        graph.degree = arrays["degree"]
+        return graph
+
+    @property
+    def num_edges(self) -> int:
+        """관계(무방향 간선) 수"""
+        return len(self._weights) // 2
+
+    def _same_class(self, labels: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """(양쪽 모두 배정된 간선 마스크, 같은 반 간선 마스크)"""
+        class_a = labels[self._rows]
+        class_b = labels[self._cols]
+        placed = (class_a >= 0) & (class_b >= 0)
+        return placed, placed & (class_a == class_b)
+
+    def intra_weight(self, labels: np.ndarray) -> Tuple[float, float]:
+        """
+        반 내부 관계 가중치
+
+        Returns:
+            (같은 반 간선 가중치 합, 배정된 간선 가중치 합)
+        """
+        placed, same = self._same_class(labels)
+        return float(self._weights[same].sum()) / 2, float(self._weights[placed].sum()) / 2
+
+    def friend_weight(self, labels: np.ndarray) -> np.ndarray:
+        """학생별 같은 반 관계 가중치 합"""
+        _, same = self._same_class(labels)
+        return np.bincount(self._rows[same], weights=self._weights[same], minlength=self.size)
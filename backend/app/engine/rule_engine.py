@@ -1,29 +1,101 @@
 """
 반편성 규칙 엔진
 """
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
+from types import SimpleNamespace
+import re
 import numpy as np
 import logging
-from ..models.student import Student
 from ..models.rule import ClassAssignmentRule
+from .student_record import StudentRecord
+from .field_encoder import FieldEncoder, EncodedFeatures
+from .conditions import compile_conditions
+from .relation_graph import RelationGraph
 
 logger = logging.getLogger(__name__)
 
+# 학생 참조 구분자 (한 필드에 여러 명을 적는 경우: "3-1-5-김철수, 3-2-7-이영희")
+_REFERENCE_SEPARATOR = re.compile(r'[,;/\n]')
+
+
+def student_key(student: StudentRecord) -> Tuple:
+    """학생 식별 키 (학년, 반, 번호, 이름)"""
+    return (student.grade, student.original_class, student.number, student.name)
+
+
+def parse_student_reference(reference: str) -> Optional[Tuple]:
+    """
+    학생 참조 문자열 파싱
+    
+    Args:
+        reference: "학년-반-번호-이름" 형식 (예: "3-1-5-김철수")
+        
+    Returns:
+        (학년, 반, 번호, 이름) 또는 형식이 맞지 않으면 None
+    """
+    parts = reference.strip().split('-', 3)
+    if len(parts) != 4:
+        return None
+    try:
+        return (int(parts[0]), int(parts[1]), int(parts[2]), parts[3].strip())
+    except ValueError:
+        return None
+
 
 class RuleEngine:
     """반편성 규칙 엔진"""
     
-    def __init__(self, students: List[Student], rules: List[ClassAssignmentRule]):
+    def __init__(self, students: List[StudentRecord], rules: List[ClassAssignmentRule],
+                 field_definitions: Optional[List[Dict]] = None,
+                 features: Optional[EncodedFeatures] = None):
         """
         Args:
-            students: 학생 리스트
+            students: 학생 리스트 (StudentRecord 권장, 같은 속성을 가진 객체도 가능)
             rules: 규칙 리스트
+            field_definitions: 학교의 커스텀 필드 정의 (필드 인코딩에 사용)
+            features: 미리 인코딩된 특성 (같은 학생 목록으로 만든 경우에만 사용)
         """
+        if features is not None and not features.matches(students):
+            logger.warning("미리 인코딩된 특성의 학생 목록이 달라 사용하지 않습니다")
+            features = None
+        
         self.students = students
         self.rules = sorted(rules, key=lambda r: r.priority, reverse=True)
+        self.encoder = FieldEncoder(students, field_definitions, features)
+        self._relations: Dict[str, np.ndarray] = dict(features.relations) if features else {}
+        self.evaluation_count = 0  # 평가 횟수 (수렴 기록용)
+        
+        # 학생 객체 → 인덱스 (평가 시 반 배정 배열 생성용)
+        self._student_index = {id(s): i for i, s in enumerate(students)}
+        self._key_index = {student_key(s): i for i, s in enumerate(students)}
+        self._id_index = {s.id: i for i, s in enumerate(students) if s.id is not None}
+        self._name_index: Dict[str, List[int]] = {}
+        for i, s in enumerate(students):
+            self._name_index.setdefault(s.name, []).append(i)
+        
+        # 규칙별 사전 컴파일 결과 (규칙 객체 id → 컴파일 데이터)
+        self._compiled: Dict[int, Any] = {}
+        for rule in self.rules:
+            if not rule.is_active:
+                continue
+            try:
+                rule_type = self._rule_type(rule)
+                if rule_type == 'constraint':
+                    self._compiled[id(rule)] = self._compile_constraint_rule(rule)
+                elif rule_type == 'distribution':
+                    self._compiled[id(rule)] = self._compile_distribution_mask(rule.rule_definition)
+                elif rule_type == 'complex':
+                    self._compiled[id(rule)] = compile_conditions(
+                        rule.rule_definition.get('conditions', []), self.encoder
+                    )
+                elif rule_type == 'graph':
+                    self._compiled[id(rule)] = self._compile_graph_rule(rule)
+            except Exception as e:
+                logger.error(f"규칙 '{rule.name}' 컴파일 오류: {e}")
+        
         logger.info(f"RuleEngine 초기화: {len(students)}명 학생, {len(rules)}개 규칙")
     
-    def evaluate_assignment(self, assignment: Dict[int, List[Student]]) -> Dict[str, Any]:
+    def evaluate_assignment(self, assignment: Dict[int, List[StudentRecord]]) -> Dict[str, Any]:
         """
         반편성 결과를 평가
         
@@ -37,6 +109,22 @@ class RuleEngine:
                 "details": {...}
             }
         """
+        labels = self._labels(assignment)
+        class_ids = np.array(sorted(assignment.keys()), dtype=np.int32)
+        return self.evaluate_labels(labels, class_ids)
+    
+    def evaluate_labels(self, labels: np.ndarray, class_ids: np.ndarray) -> Dict[str, Any]:
+        """
+        학생 인덱스별 반 번호 배열로 평가 (반편성 알고리즘의 내부 표현)
+        
+        Args:
+            labels: 학생 인덱스 순서의 반 번호 배열 (미배정: -1)
+            class_ids: 반 번호 배열
+            
+        Returns:
+            evaluate_assignment와 같은 형식
+        """
+        self.evaluation_count += 1
         total_score = 0
         total_weight = 0
         rule_scores = {}
@@ -47,7 +135,7 @@ class RuleEngine:
                 continue
             
             try:
-                score = self._evaluate_rule(rule, assignment)
+                score = self._evaluate_rule(rule, labels, class_ids)
                 rule_scores[rule.name] = round(score, 2)
                 total_score += score * rule.weight
                 total_weight += rule.weight
@@ -65,57 +153,184 @@ class RuleEngine:
             "details": details
         }
     
+    def _labels(self, assignment: Dict[int, List[StudentRecord]]) -> np.ndarray:
+        """반 배정 딕셔너리를 학생 인덱스별 반 번호 배열로 변환 (미배정: -1)"""
+        labels = np.full(len(self.students), -1, dtype=np.int32)
+        for class_num, students in assignment.items():
+            for student in students:
+                idx = self._student_index.get(id(student))
+                if idx is not None:
+                    labels[idx] = class_num
+        return labels
+    
+    def export_state(self) -> Tuple[Dict[Tuple, np.ndarray], Dict[str, Any]]:
+        """
+        평가에 필요한 상태를 배열과 메타데이터로 분리 (공유 메모리 전달용)
+        
+        Returns:
+            (배열 딕셔너리, 메타데이터) - from_state로 평가 전용 엔진을 복원
+        """
+        # 균형 규칙은 평가 때 필드를 인코딩하므로 미리 인코딩해 둠
+        for rule in self.rules:
+            if rule.is_active and self._rule_type(rule) == 'balance':
+                try:
+                    field = rule.rule_definition['field']
+                    if self.encoder.encoding(field)['encoding'] == 'onehot':
+                        self.encoder.codes(field)
+                    else:
+                        self.encoder.numeric(field)
+                except Exception as e:
+                    logger.error(f"규칙 '{rule.name}' 필드 인코딩 오류: {e}")
+        
+        arrays: Dict[Tuple, np.ndarray] = {}
+        rules = []
+        for i, rule in enumerate(self.rules):
+            spec = {key: getattr(rule, key) for key in
+                    ('name', 'rule_type', 'rule_definition', 'priority', 'weight', 'is_active')}
+            compiled = self._compiled.get(id(rule))
+            if isinstance(compiled, RelationGraph):
+                spec['compiled'] = 'graph'
+                for name, array in compiled.arrays().items():
+                    arrays[('rule', i, name)] = array
+            elif compiled is not None:
+                spec['compiled'] = 'array'
+                arrays[('rule', i)] = compiled
+            rules.append(spec)
+        
+        categories = {}
+        for field, values in self.encoder._numeric.items():
+            arrays[('numeric', field)] = values
+        for field, (codes, field_categories) in self.encoder._codes.items():
+            arrays[('codes', field)] = codes
+            categories[field] = field_categories
+        
+        meta = {
+            "size": len(self.students),
+            "rules": rules,
+            "encodings": dict(self.encoder._encodings),
+            "categories": categories,
+            "definitions": list(self.encoder.definitions.values())
+        }
+        return arrays, meta
+    
+    @classmethod
+    def from_state(cls, arrays: Dict[Tuple, np.ndarray], meta: Dict[str, Any]) -> "RuleEngine":
+        """
+        export_state 결과로 평가 전용 엔진 생성 (배열은 복사하지 않음)
+        
+        학생 객체가 없으므로 evaluate_labels만 사용할 수 있다.
+        """
+        features = EncodedFeatures(
+            student_ids=np.empty(0, dtype=np.int64),
+            encodings=meta['encodings'],
+            numeric={key[1]: array for key, array in arrays.items() if key[0] == 'numeric'},
+            codes={key[1]: (array, meta['categories'][key[1]])
+                   for key, array in arrays.items() if key[0] == 'codes'}
+        )
+        
+        engine = cls.__new__(cls)
+        engine.students = []
+        engine.rules = [SimpleNamespace(**{k: v for k, v in spec.items() if k != 'compiled'})
+                        for spec in meta['rules']]
+        engine.encoder = FieldEncoder([], meta['definitions'], features)
+        engine.evaluation_count = 0
+        engine._student_index = {}
+        engine._key_index = {}
+        engine._id_index = {}
+        engine._name_index = {}
+        engine._relations = {}
+        engine._compiled = {}
+        for i, (rule, spec) in enumerate(zip(engine.rules, meta['rules'])):
+            if spec.get('compiled') == 'graph':
+                engine._compiled[id(rule)] = RelationGraph.from_arrays(meta['size'], {
+                    key[2]: array for key, array in arrays.items() if key[:2] == ('rule', i) and len(key) == 3
+                })
+            elif spec.get('compiled') == 'array':
+                engine._compiled[id(rule)] = arrays[('rule', i)]
+        return engine
+    
+    @staticmethod
+    def _rule_type(rule: ClassAssignmentRule) -> Optional[str]:
+        """규칙 유형 (rule_definition의 type이 없으면 rule_type 컬럼 사용)"""
+        return (rule.rule_definition or {}).get('type') or rule.rule_type
+    
+    @staticmethod
+    def _class_counts(labels: np.ndarray, class_ids: np.ndarray,
+                      mask: Optional[np.ndarray] = None,
+                      weights: Optional[np.ndarray] = None) -> np.ndarray:
+        """반별 학생 수 (또는 가중치 합) 집계"""
+        selected = labels >= 0 if mask is None else (labels >= 0) & mask
+        counts = np.bincount(labels[selected],
+                             weights=None if weights is None else weights[selected],
+                             minlength=int(class_ids.max()) + 1)
+        return counts[class_ids]
+    
     def _evaluate_rule(self, rule: ClassAssignmentRule, 
-                       assignment: Dict[int, List[Student]]) -> float:
+                       labels: np.ndarray, class_ids: np.ndarray) -> float:
         """개별 규칙 평가"""
         rule_def = rule.rule_definition
-        rule_type = rule_def.get('type')
+        rule_type = self._rule_type(rule)
         
         if rule_type == 'balance':
-            return self._evaluate_balance_rule(rule_def, assignment)
+            return self._evaluate_balance_rule(rule_def, labels, class_ids)
         elif rule_type == 'constraint':
-            return self._evaluate_constraint_rule(rule_def, assignment)
+            return self._evaluate_constraint_rule(rule_def, self._compiled[id(rule)], labels)
         elif rule_type == 'distribution':
-            return self._evaluate_distribution_rule(rule_def, assignment)
+            return self._evaluate_distribution_rule(rule_def, self._compiled[id(rule)], labels, class_ids)
         elif rule_type == 'complex':
-            return self._evaluate_complex_rule(rule_def, assignment)
+            return self._evaluate_complex_rule(rule_def, self._compiled[id(rule)], labels, class_ids)
+        elif rule_type == 'graph':
+            return self._evaluate_graph_rule(rule_def, self._compiled[id(rule)], labels)
         else:
             logger.warning(f"알 수 없는 규칙 유형: {rule_type}")
             return 0
     
     def _evaluate_balance_rule(self, rule_def: dict, 
-                               assignment: Dict[int, List[Student]]) -> float:
+                               labels: np.ndarray, class_ids: np.ndarray) -> float:
         """균형 규칙 평가"""
         field = rule_def['field']
         tolerance = rule_def.get('tolerance', 0)
         
-        # 각 반의 필드 값 계산
-        class_values = []
+        if len(class_ids) == 0:
+            return 0
         
-        for class_num, students in assignment.items():
-            if field == 'gender':
-                # 성별 균형: 남학생 비율
-                total = len(students)
-                male_count = sum(1 for s in students if s.gender == '남')
-                value = (male_count / total * 100) if total > 0 else 50
-            else:
-                # 숫자 필드: 평균
-                values = []
-                for s in students:
-                    val = s.custom_fields.get(field)
-                    if val is not None:
-                        values.append(float(val))
-                value = np.mean(values) if values else 0
-            
-            class_values.append(value)
+        totals = self._class_counts(labels, class_ids)
+        encoding = self.encoder.encoding(field)['encoding']
         
-        if not class_values:
+        if encoding == 'gender':
+            # 성별 균형: 남학생 비율
+            male_counts = self._class_counts(labels, class_ids, weights=self.encoder.numeric(field))
+            class_values = np.where(totals > 0, male_counts / np.maximum(totals, 1) * 100, 50)
+        elif encoding == 'onehot':
+            # 범주형 필드: 범주별 반 내 비율(%)의 표준편차 평균
+            codes, categories = self.encoder.codes(field)
+            if not categories:
+                return 100
+            selected = (labels >= 0) & (codes >= 0)
+            num_slots = int(class_ids.max()) + 1
+            joint = np.bincount(labels[selected] * len(categories) + codes[selected],
+                                minlength=num_slots * len(categories))
+            shares = joint.reshape(num_slots, len(categories))[class_ids] / np.maximum(totals, 1)[:, None] * 100
+            std_dev = float(np.mean(np.std(shares, axis=0)))
+            return self._score_deviation(std_dev, tolerance)
+        else:
+            # 숫자/순서형/참거짓 필드: 평균
+            values = self.encoder.numeric(field)
+            valid = ~np.isnan(values)
+            sums = self._class_counts(labels, class_ids, mask=valid, weights=values)
+            counts = self._class_counts(labels, class_ids, mask=valid)
+            class_values = np.where(counts > 0, sums / np.maximum(counts, 1), 0)
+        
+        if len(class_values) == 0:
             return 0
         
         # 표준편차 계산
         std_dev = np.std(class_values)
-        
-        # 점수 계산 (표준편차가 작을수록 높은 점수)
+        return self._score_deviation(std_dev, tolerance)
+    
+    @staticmethod
+    def _score_deviation(std_dev: float, tolerance: float) -> float:
+        """표준편차 → 점수 (표준편차가 작을수록 높은 점수)"""
         if std_dev <= tolerance:
             return 100
         else:
@@ -123,78 +338,226 @@ class RuleEngine:
             penalty = (std_dev - tolerance) * 10
             return max(0, 100 - penalty)
     
-    def _evaluate_constraint_rule(self, rule_def: dict,
-                                  assignment: Dict[int, List[Student]]) -> float:
-        """제약 규칙 평가"""
+    def _compile_constraint_rule(self, rule: ClassAssignmentRule) -> np.ndarray:
+        """
+        제약 규칙을 학생 인덱스 쌍 배열로 컴파일
+        
+        - students: 명시된 학생 목록 → 목록 내 모든 쌍
+        - field: 각 학생의 필드에 적힌 상대 학생 참조 ("3-1-5-김철수") → (학생, 상대) 쌍
+        
+        Returns:
+            (쌍 개수, 2) 형태의 정수 배열
+        """
+        rule_def = rule.rule_definition
+        pairs = set()
+        
+        if rule_def.get('students'):
+            indices = []
+            for entry in rule_def['students']:
+                idx = self._resolve_student(entry)
+                if idx is None:
+                    logger.warning(f"제약 규칙 '{rule.name}': 학생을 찾을 수 없음 ({entry})")
+                else:
+                    indices.append(idx)
+            for pos, a in enumerate(indices):
+                for b in indices[pos + 1:]:
+                    if a != b:
+                        pairs.add((min(a, b), max(a, b)))
+        
+        if rule_def.get('field'):
+            for a, b in self.reference_pairs(rule_def['field']).tolist():
+                pairs.add((min(a, b), max(a, b)))
+        
+        logger.debug(f"제약 규칙 '{rule.name}': {len(pairs)}개 쌍 컴파일")
+        return np.array(sorted(pairs), dtype=np.int32).reshape(-1, 2)
+    
+    def reference_pairs(self, field: str) -> np.ndarray:
+        """
+        필드에 적힌 학생 참조 ("3-1-5-김철수") → (학생, 상대) 인덱스 쌍
+        
+        Returns:
+            (쌍 개수, 2) 형태의 정수 배열 (자기 자신 참조와 찾을 수 없는 참조는 제외)
+        """
+        if field in self._relations:
+            return self._relations[field]
+        
+        pairs = []
+        for a, student in enumerate(self.students):
+            value = (student.custom_fields or {}).get(field)
+            if not value:
+                continue
+            for reference in _REFERENCE_SEPARATOR.split(str(value)):
+                if not reference.strip():
+                    continue
+                b = self._resolve_reference(reference)
+                if b is None:
+                    logger.warning(f"필드 '{field}': 참조 학생을 찾을 수 없음 ({reference.strip()})")
+                elif a != b:
+                    pairs.append((a, b))
+        
+        self._relations[field] = np.array(pairs, dtype=np.int32).reshape(-1, 2)
+        return self._relations[field]
+    
+    def _resolve_student(self, entry: dict) -> Optional[int]:
+        """명시된 학생 정보 → 학생 인덱스 (학년/반/번호가 없으면 이름으로 검색)"""
+        key = (entry.get('grade'), entry.get('original_class', entry.get('class')),
+               entry.get('number'), entry.get('name'))
+        if key in self._key_index:
+            return self._key_index[key]
+        candidates = self._name_index.get(entry.get('name'), [])
+        return candidates[0] if len(candidates) == 1 else None
+    
+    def _resolve_reference(self, reference: str) -> Optional[int]:
+        """학생 참조 문자열 → 학생 인덱스"""
+        key = parse_student_reference(reference)
+        if key is not None and key in self._key_index:
+            return self._key_index[key]
+        # 형식이 다르거나 반/번호가 바뀐 경우 동명이인이 없을 때만 이름으로 매칭
+        name = key[3] if key is not None else reference.strip()
+        candidates = self._name_index.get(name, [])
+        return candidates[0] if len(candidates) == 1 else None
+    
+    def _evaluate_constraint_rule(self, rule_def: dict, pairs: np.ndarray,
+                                  labels: np.ndarray) -> float:
+        """제약 규칙 평가 (만족한 쌍의 비율)"""
         constraint_type = rule_def['constraint_type']
-        student_names = [s['name'] for s in rule_def['students']]
         
-        # 학생들이 어느 반에 배정되었는지 찾기
-        student_classes = {}
-        for class_num, students in assignment.items():
-            for student in students:
-                if student.name in student_names:
-                    student_classes[student.name] = class_num
+        if len(pairs) == 0:
+            return 100  # 평가할 쌍 없음
         
-        # 모든 학생을 찾지 못한 경우
-        if len(student_classes) < len(student_names):
-            logger.warning(f"제약 규칙: 일부 학생을 찾을 수 없음 ({student_names})")
-            return 50  # 부분 점수
+        class_a = labels[pairs[:, 0]]
+        class_b = labels[pairs[:, 1]]
         
-        if constraint_type == 'separate':
-            # 분리: 모두 다른 반이어야 함
-            classes = list(student_classes.values())
-            if len(classes) == len(set(classes)):
-                return 100  # 모두 다른 반
-            else:
-                return 0    # 같은 반에 있음
+        # 아직 배정되지 않은 학생이 포함된 쌍은 제외
+        placed = (class_a >= 0) & (class_b >= 0)
+        if not placed.any():
+            return 100
+        same_class = class_a[placed] == class_b[placed]
         
+        if constraint_type == 'separate':
+            # 분리: 다른 반이어야 함
+            return float(np.mean(~same_class) * 100)
         elif constraint_type == 'together':
-            # 결합: 모두 같은 반이어야 함
-            classes = list(student_classes.values())
-            if len(set(classes)) == 1:
-                return 100  # 모두 같은 반
-            else:
-                return 0    # 다른 반에 있음
+            # 결합: 같은 반이어야 함
+            return float(np.mean(same_class) * 100)
         
         return 0
     
-    def _evaluate_distribution_rule(self, rule_def: dict,
-                                    assignment: Dict[int, List[Student]]) -> float:
-        """분산 규칙 평가"""
+    def _compile_graph_rule(self, rule: ClassAssignmentRule) -> RelationGraph:
+        """
+        관계 그래프 규칙을 희소 인접 행렬로 컴파일
+        
+        - edges: [{"source": 학생, "target": 학생, "weight": 1.0}, ...]
+          (학생은 "3-1-5-김철수" 참조, 학생 ID, 또는 {"name": ...})
+        - fields: 학생 참조가 적힌 필드 목록 (예: ["친구"]) → 가중치 1의 관계
+        """
+        rule_def = rule.rule_definition
+        sources, targets, weights = [], [], []
+        
+        for edge in rule_def.get('edges', []):
+            a = self._resolve_endpoint(edge.get('source'))
+            b = self._resolve_endpoint(edge.get('target'))
+            if a is None or b is None:
+                logger.warning(f"관계 규칙 '{rule.name}': 학생을 찾을 수 없음 ({edge})")
+                continue
+            sources.append(a)
+            targets.append(b)
+            weights.append(float(edge.get('weight', 1.0)))
+        
+        for field in rule_def.get('fields', []):
+            for a, b in self.reference_pairs(field).tolist():
+                sources.append(a)
+                targets.append(b)
+                weights.append(1.0)
+        
+        graph = RelationGraph(
+            len(self.students),
+            np.array(sources, dtype=np.int32),
+            np.array(targets, dtype=np.int32),
+            np.array(weights, dtype=np.float64)
+        )
+        logger.debug(f"관계 규칙 '{rule.name}': {graph.num_edges}개 관계 컴파일")
+        return graph
+    
+    def _resolve_endpoint(self, endpoint: Any) -> Optional[int]:
+        """관계 끝점 (학생 ID / 참조 문자열 / 학생 정보) → 학생 인덱스"""
+        if isinstance(endpoint, bool) or endpoint is None:
+            return None
+        if isinstance(endpoint, int):
+            return self._id_index.get(endpoint)
+        if isinstance(endpoint, dict):
+            return self._resolve_student(endpoint)
+        return self._resolve_reference(str(endpoint))
+    
+    def _evaluate_graph_rule(self, rule_def: dict, graph: RelationGraph,
+                             labels: np.ndarray) -> float:
+        """
+        관계 그래프 규칙 평가
+        
+        - separate: 같은 반에 배정된 관계 가중치가 적을수록 높은 점수
+        - friends: 관계가 있는 학생 중 같은 반에 min_friends 이상의 친구가 있는 학생 비율
+        """
+        mode = rule_def.get('mode', 'separate')
+        
+        if mode == 'separate':
+            intra, total = graph.intra_weight(labels)
+            if total == 0:
+                return 100
+            return 100 * (1 - intra / total)
+        
+        elif mode == 'friends':
+            min_friends = rule_def.get('min_friends', 1)
+            eligible = (graph.degree > 0) & (labels >= 0)
+            if not eligible.any():
+                return 100
+            covered = graph.friend_weight(labels)[eligible] >= min_friends
+            return float(np.mean(covered) * 100)
+        
+        logger.warning(f"알 수 없는 관계 규칙 모드: {mode}")
+        return 0
+    
+    def _compile_distribution_mask(self, rule_def: dict) -> np.ndarray:
+        """
+        분산 규칙의 대상 학생을 불리언 마스크로 컴파일
+        
+        - value: 값과 일치 (참/거짓 필드는 '예'/True 등을 같은 값으로 취급)
+        - range: [최소, 최대] 범위 내 (순서형 필드는 "중"~"상"처럼 지정 가능)
+        - 둘 다 없으면: 참/거짓 필드는 참인 학생, 그 외는 값이 있는 학생
+        """
         field = rule_def['field']
+        encoding = self.encoder.encoding(field)['encoding']
+        
+        if 'value' in rule_def:
+            return compile_conditions({'field': field, 'operator': '==', 'value': rule_def['value']}, self.encoder)
+        
+        if 'range' in rule_def:
+            return compile_conditions({'field': field, 'operator': 'between', 'value': rule_def['range']}, self.encoder)
+        
+        if encoding == 'onehot':
+            return self.encoder.codes(field)[0] >= 0
+        values = self.encoder.numeric(field)
+        return values > 0 if encoding == 'boolean' else ~np.isnan(values)
+    
+    def _evaluate_distribution_rule(self, rule_def: dict, mask: np.ndarray,
+                                    labels: np.ndarray, class_ids: np.ndarray) -> float:
+        """분산 규칙 평가"""
         max_per_class = rule_def.get('max_per_class', float('inf'))
         
         # 각 반의 해당 학생 수 계산
-        class_counts = []
-        
-        for class_num, students in assignment.items():
-            count = 0
-            for student in students:
-                # 조건 확인
-                if 'value' in rule_def:
-                    # 특정 값과 일치
-                    if student.custom_fields.get(field) == rule_def['value']:
-                        count += 1
-                elif 'range' in rule_def:
-                    # 범위 내
-                    val = student.custom_fields.get(field)
-                    if val is not None:
-                        min_val, max_val = rule_def['range']
-                        if min_val <= val <= max_val:
-                            count += 1
-            
-            class_counts.append(count)
+        class_counts = self._class_counts(labels, class_ids, mask=mask)
+        return self._score_distribution(class_counts, max_per_class)
+    
+    @staticmethod
+    def _score_distribution(class_counts: np.ndarray, max_per_class: float) -> float:
+        """반별 대상 학생 수 → 점수"""
+        if len(class_counts) == 0:
+            return 100
         
-        # 평가
         # 1. 최대 인원 제한 확인
-        if max(class_counts) > max_per_class:
+        if class_counts.max() > max_per_class:
             return 0  # 제한 위반
         
         # 2. 균등 분산 확인
-        if not class_counts:
-            return 100
-        
         std_dev = np.std(class_counts)
         # 표준편차가 1 이하면 만점
         if std_dev <= 1:
@@ -202,72 +565,47 @@ class RuleEngine:
         else:
             return max(0, 100 - (std_dev - 1) * 20)
     
-    def _evaluate_complex_rule(self, rule_def: dict,
-                               assignment: Dict[int, List[Student]]) -> float:
-        """복합 규칙 평가"""
-        conditions = rule_def.get('conditions', [])
+    def _evaluate_complex_rule(self, rule_def: dict, matched: np.ndarray,
+                               labels: np.ndarray, class_ids: np.ndarray) -> float:
+        """복합 규칙 평가 (조건 마스크는 생성 시 컴파일)"""
         action = rule_def.get('action', {})
         
-        # 조건에 맞는 학생 찾기
-        matching_students = []
-        for students in assignment.values():
-            for student in students:
-                if self._check_conditions(student, conditions):
-                    matching_students.append(student)
-        
         # 액션 평가
         if action.get('type') == 'distribution':
             # 분산 규칙으로 평가
-            temp_rule_def = {
-                'field': '_matched',
-                'max_per_class': action.get('max_per_class', float('inf')),
-                'strategy': action.get('strategy', 'spread')
-            }
-            
-            # 임시로 매칭된 학생들을 표시
-            for student in matching_students:
-                student.custom_fields['_matched'] = True
-            
-            score = self._evaluate_distribution_rule(
-                {'field': '_matched', 'value': True, 'max_per_class': action.get('max_per_class', float('inf'))},
-                assignment
-            )
-            
-            # 임시 필드 제거
-            for student in matching_students:
-                student.custom_fields.pop('_matched', None)
-            
-            return score
+            class_counts = self._class_counts(labels, class_ids, mask=matched)
+            return self._score_distribution(class_counts, action.get('max_per_class', float('inf')))
         
         return 0
-    
-    def _check_conditions(self, student: Student, conditions: List[Dict]) -> bool:
-        """조건 확인"""
-        for condition in conditions:
-            field = condition['field']
-            operator = condition['operator']
-            value = condition['value']
-            
-            student_value = student.custom_fields.get(field)
-            
-            if operator == '==':
-                if student_value != value:
-                    return False
-            elif operator == '!=':
-                if student_value == value:
-                    return False
-            elif operator == '>=':
-                if student_value is None or student_value < value:
-                    return False
-            elif operator == '<=':
-                if student_value is None or student_value > value:
-                    return False
-            elif operator == '>':
-                if student_value is None or student_value <= value:
-                    return False
-            elif operator == '<':
-                if student_value is None or student_value >= value:
-                    return False
-        
-        return True
 
+
+def encode_features(students: List[StudentRecord],
+                    field_definitions: Optional[List[Dict]] = None) -> EncodedFeatures:
+    """
+    학생 목록의 모든 필드를 미리 인코딩 (피처 저장소용)
+    
+    - 범주형 필드: 범주 코드, 그 외: 실수 배열
+    - 학생 참조("3-1-5-김철수")가 적힌 범주형 필드: 참조 인덱스 쌍
+    """
+    engine = RuleEngine(students, [], field_definitions)
+    encoder = engine.encoder
+    features = EncodedFeatures(
+        student_ids=np.array([s.id if s.id is not None else -1 for s in students], dtype=np.int64)
+    )
+    
+    for field in encoder.fields():
+        encoding = encoder.encoding(field)
+        features.encodings[field] = encoding
+        if encoding['encoding'] != 'onehot':
+            features.numeric[field] = encoder.numeric(field)
+            continue
+        features.codes[field] = encoder.codes(field)
+        has_reference = any(
+            parse_student_reference(reference) is not None
+            for value in encoder.raw_values(field) if value
+            for reference in _REFERENCE_SEPARATOR.split(str(value))
+        )
+        if has_reference:
+            features.relations[field] = engine.reference_pairs(field)
+    
+    return features
@@ -0,0 +1,89 @@
+"""
+병렬 반편성용 공유 메모리 (multiprocessing.shared_memory)
+
+부모 프로세스가 컴파일된 규칙 엔진의 배열(필드 인코딩, 규칙 마스크, 제약 쌍, 관계 그래프)을
+공유 메모리 블록 하나에 한 번 복사하고, 작업자에게는 블록 이름과 배치 정보만 넘긴다.
+작업자는 블록에 연결해 복사 없이 배열을 사용한다.
+"""
+from typing import Any, Dict, NamedTuple, Tuple
+from multiprocessing import shared_memory
+import logging
+import numpy as np
+
+from .rule_engine import RuleEngine
+
+logger = logging.getLogger(__name__)
+
+# 배열 시작 위치 정렬 (바이트)
+_ALIGNMENT = 64
+
+
+class CohortHandle(NamedTuple):
+    """작업자에게 전달하는 공유 메모리 핸들 (pickle 크기가 작음)"""
+    name: str                                      # 공유 메모리 블록 이름
+    layout: Dict[Tuple, Tuple[int, str, Tuple]]    # 배열 키 → (오프셋, dtype, shape)
+    meta: Dict[str, Any]                           # RuleEngine.export_state 메타데이터
+
+
+class SharedCohort:
+    """
+    규칙 엔진 상태를 공유 메모리에 올림 (블록은 부모 프로세스가 소유)
+
+    사용 예:
+        with SharedCohort(rule_engine) as shared:
+            pool.submit(worker, shared.handle, ...)
+    """
+
+    def __init__(self, rule_engine: RuleEngine):
+        arrays, meta = rule_engine.export_state()
+
+        layout = {}
+        offset = 0
+        for key, array in arrays.items():
+            offset = -(-offset // _ALIGNMENT) * _ALIGNMENT
+            layout[key] = (offset, array.dtype.str, tuple(array.shape))
+            offset += array.nbytes
+
+        self._shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+        for key, array in arrays.items():
+            start, dtype, shape = layout[key]
+            np.ndarray(shape, dtype=dtype, buffer=self._shm.buf, offset=start)[...] = array
+
+        self.handle = CohortHandle(self._shm.name, layout, meta)
+        logger.debug(f"공유 메모리 생성: {self._shm.name} ({offset} bytes, 배열 {len(arrays)}개)")
+
+    def close(self):
+        """공유 메모리 해제 (작업자가 모두 끝난 뒤 호출)"""
+        self._shm.close()
+        self._shm.unlink()
+
+    def __enter__(self) -> "SharedCohort":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def attach(handle: CohortHandle) -> Tuple[shared_memory.SharedMemory, RuleEngine]:
+    """
+    작업자에서 공유 메모리에 연결해 평가 전용 엔진 생성
+
+    Returns:
+        (공유 메모리, 엔진) - 엔진을 다 쓴 뒤 detach(공유 메모리) 호출
+    """
+    shm = shared_memory.SharedMemory(name=handle.name)
+    arrays = {}
+    for key, (start, dtype, shape) in handle.layout.items():
+        array = np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=start)
+        array.flags.writeable = False
+        arrays[key] = array
+    return shm, RuleEngine.from_state(arrays, handle.meta)
+
+
+def detach(shm: shared_memory.SharedMemory) -> None:
+    """작업자에서 공유 메모리 연결 해제 (삭제는 소유한 부모 프로세스가 수행)"""
+    try:
+        shm.close()
+    except BufferError:
+        # 아직 참조 중인 배열이 있으면 프로세스 종료 시 해제됨
+        logger.debug(f"공유 메모리 연결 해제 지연: {shm.name}")
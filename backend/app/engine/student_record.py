@@ -0,0 +1,61 @@
+"""
+반편성 계산용 학생 레코드
+
+규칙 엔진과 반편성 알고리즘은 SQLAlchemy Student 객체 대신 이 레코드를 사용한다.
+(세션과 무관하고, 속성 접근이 빠르며, 작업자 프로세스로 pickle 전달 가능)
+"""
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+class StudentRecord:
+    """반편성 계산용 학생 정보 (읽기 전용)"""
+
+    __slots__ = ('id', 'school_id', 'year', 'grade', 'original_class',
+                 'number', 'name', 'gender', 'custom_fields')
+
+    def __init__(self, id: Optional[int], school_id: Optional[int], year: Optional[int],
+                 grade: Optional[int], original_class: Optional[int], number: Optional[int],
+                 name: str, gender: str, custom_fields: Optional[Dict[str, Any]] = None):
+        set_field = object.__setattr__
+        set_field(self, 'id', id)
+        set_field(self, 'school_id', school_id)
+        set_field(self, 'year', year)
+        set_field(self, 'grade', grade)
+        set_field(self, 'original_class', original_class)
+        set_field(self, 'number', number)
+        set_field(self, 'name', name)
+        set_field(self, 'gender', gender)
+        # 원본과 공유하지 않도록 복사 (수정하지 말 것)
+        set_field(self, 'custom_fields', dict(custom_fields or {}))
+
+    @classmethod
+    def from_student(cls, student: Any) -> "StudentRecord":
+        """Student 모델 (또는 같은 속성을 가진 객체) → 레코드"""
+        return cls(
+            id=student.id,
+            school_id=student.school_id,
+            year=student.year,
+            grade=student.grade,
+            original_class=student.original_class,
+            number=student.number,
+            name=student.name,
+            gender=student.gender,
+            custom_fields=student.custom_fields
+        )
+
+    def __setattr__(self, key: str, value: Any):
+        raise AttributeError("StudentRecord는 수정할 수 없습니다")
+
+    def __delattr__(self, key: str):
+        raise AttributeError("StudentRecord는 수정할 수 없습니다")
+
+    def __reduce__(self) -> Tuple:
+        return (StudentRecord, tuple(getattr(self, field) for field in self.__slots__))
+
+    def __repr__(self) -> str:
+        return f"<StudentRecord(id={self.id}, name={self.name}, grade={self.grade}, class={self.original_class})>"
+
+
+def to_student_records(students: Iterable[Any]) -> List[StudentRecord]:
+    """학생 목록 → 레코드 목록 (이미 레코드인 항목은 그대로 사용)"""
+    return [s if isinstance(s, StudentRecord) else StudentRecord.from_student(s) for s in students]
@@ -0,0 +1,18 @@
+"""
+반편성 결과 압축 저장 모델
+"""
+from sqlalchemy import Column, Integer, String, LargeBinary, ForeignKey
+from ..core.database import Base
+from .assignment import ClassAssignment
+
+
+class AssignmentPlacementPack(Base):
+    """반편성 결과 (학생 ID, 배정 반) 쌍 전체를 하나의 압축 배열로 저장"""
+    __tablename__ = "assignment_placement_packs"
+    
+    assignment_id = Column(
+        Integer, ForeignKey(ClassAssignment.__table__.c.id, ondelete="CASCADE"), primary_key=True
+    )
+    encoding = Column(String(20), nullable=False)  # 배열 형식 (예: int32-pairs-le)
+    count = Column(Integer, nullable=False)  # 학생 수
+    data = Column(LargeBinary, nullable=False)
@@ -0,0 +1,30 @@
+"""
+반편성 초안 버전 모델
+"""
+from sqlalchemy import Column, Integer, String, LargeBinary, ForeignKey
+from ..core.database import Base
+from .assignment import ClassAssignment
+
+
+class AssignmentVersion(Base):
+    """
+    기존 반편성에서 파생된 초안 (부모 대비 이동한 학생만 저장)
+    
+    depth가 0이면 전체 배정 결과를 저장한 체크포인트이고(data 없음),
+    그 외에는 부모 결과에 data의 이동을 적용해 복원한다.
+    """
+    __tablename__ = "assignment_versions"
+    
+    assignment_id = Column(
+        Integer, ForeignKey(ClassAssignment.__table__.c.id, ondelete="CASCADE"), primary_key=True
+    )
+    root_id = Column(Integer, nullable=False, index=True)  # 최초 반편성 ID (이력 단위)
+    parent_id = Column(
+        Integer, ForeignKey(ClassAssignment.__table__.c.id, ondelete="SET NULL"), nullable=True, index=True
+    )
+    version = Column(Integer, nullable=False)  # 이력 안에서의 순번 (최초 반편성 = 1)
+    depth = Column(Integer, nullable=False)  # 마지막 체크포인트 이후 단계 수 (0: 체크포인트)
+    moved = Column(Integer, nullable=False)  # 부모 대비 이동한 학생 수
+    encoding = Column(String(20), nullable=True)  # 이동 배열 형식 (예: int32-pairs-le)
+    data = Column(LargeBinary, nullable=True)  # (학생 ID, 새 반) 쌍
+    note = Column(String(200), nullable=True)
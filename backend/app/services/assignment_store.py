@@ -0,0 +1,289 @@
+"""
+반편성 결과 저장소
+
+반편성 결과(학생 → 배정 반)를 설정에 따라 두 가지 방식으로 저장한다.
+
+- packed (기본값): (학생 ID, 반) int32 쌍 배열을 BLOB 하나로 저장 → 저장/조회 모두 1문장
+- rows: 학생마다 StudentAssignment 행
+
+조회는 저장 방식과 관계없이 load_placements / iter_assigned_students를 사용한다.
+학생 정보가 필요한 조회는 배정 결과를 읽은 뒤 학생 ID 묶음 단위로 조회해 합친다.
+
+기존 반편성에서 파생된 초안(save_draft)은 부모 대비 이동한 학생만 AssignmentVersion에 저장한다.
+조회할 때는 부모를 따라 올라가 전체 결과가 저장된 버전(최초 반편성 또는 체크포인트)부터
+이동을 차례로 적용하며, ASSIGNMENT_CHECKPOINT_INTERVAL 단계마다 전체 결과를 다시 저장해
+따라 올라가는 길이를 제한한다.
+"""
+from typing import Dict, List, Tuple, Iterator, Any, Optional
+from sqlalchemy import select, insert, delete, update, func
+from sqlalchemy.orm import Session
+import numpy as np
+import logging
+
+from ..core.config import settings
+from ..models.student import Student
+from ..models.assignment import StudentAssignment
+from ..models.assignment_pack import AssignmentPlacementPack
+from ..models.assignment_version import AssignmentVersion
+
+logger = logging.getLogger(__name__)
+
+# 압축 배열 형식: 학생마다 (학생 ID, 반) little-endian int32 두 개
+PACK_ENCODING = "int32-pairs-le"
+PACK_DTYPE = np.dtype("<i4")
+
+# 학생 정보 조회 시 IN 절 하나에 넣는 학생 수
+STUDENT_BATCH_SIZE = 500
+
+STORAGE_MODES = ("packed", "rows")
+
+
+def pack_placements(student_ids: np.ndarray, classes: np.ndarray) -> bytes:
+    """(학생 ID 배열, 반 배열) → BLOB"""
+    return np.column_stack([student_ids, classes]).astype(PACK_DTYPE).tobytes()
+
+
+def unpack_placements(data: bytes, encoding: str = PACK_ENCODING) -> Tuple[np.ndarray, np.ndarray]:
+    """BLOB → (학생 ID 배열, 반 배열)"""
+    if encoding != PACK_ENCODING:
+        raise ValueError(f"알 수 없는 배정 저장 형식: {encoding}")
+    pairs = np.frombuffer(data, dtype=PACK_DTYPE).reshape(-1, 2)
+    return pairs[:, 0], pairs[:, 1]
+
+
+def save_placements(db: Session, assignment_id: int, assignment: Dict[int, List[Student]],
+                    storage: Optional[str] = None) -> None:
+    """
+    반편성 결과 저장 (커밋은 호출자가 수행)
+    
+    Args:
+        db: 데이터베이스 세션
+        assignment_id: 반편성 ID
+        assignment: {반 번호: [학생, ...]}
+        storage: 저장 방식 (packed / rows, 기본값: 설정의 ASSIGNMENT_STORAGE)
+    """
+    student_ids = [student.id for students in assignment.values() for student in students]
+    classes = [class_num for class_num, students in assignment.items() for _ in students]
+    _save_arrays(db, assignment_id, np.asarray(student_ids), np.asarray(classes), storage)
+
+
+def _save_arrays(db: Session, assignment_id: int, student_ids: np.ndarray, classes: np.ndarray,
+                 storage: Optional[str] = None) -> None:
+    """(학생 ID 배열, 반 배열) 전체 저장"""
+    storage = storage or settings.ASSIGNMENT_STORAGE
+    if storage not in STORAGE_MODES:
+        raise ValueError(f"알 수 없는 배정 저장 방식: {storage}")
+    
+    if storage == "packed":
+        db.execute(insert(AssignmentPlacementPack).values(
+            assignment_id=assignment_id,
+            encoding=PACK_ENCODING,
+            count=len(student_ids),
+            data=pack_placements(student_ids, classes)
+        ))
+    elif len(student_ids):
+        db.execute(insert(StudentAssignment), [
+            {"assignment_id": assignment_id, "student_id": student_id, "assigned_class": class_num}
+            for student_id, class_num in zip(student_ids.tolist(), classes.tolist())
+        ])
+
+
+def save_draft(db: Session, assignment_id: int, parent_id: int,
+               student_ids: np.ndarray, classes: np.ndarray,
+               moved_ids: np.ndarray, moved_classes: np.ndarray,
+               note: Optional[str] = None) -> AssignmentVersion:
+    """
+    부모 반편성에서 파생된 초안 저장 (커밋은 호출자가 수행)
+    
+    보통은 이동한 학생만 저장하고, 마지막 체크포인트 이후 단계 수가
+    ASSIGNMENT_CHECKPOINT_INTERVAL에 이르거나 학생 절반 이상이 이동했으면 전체 결과를 저장한다.
+    
+    Args:
+        db: 데이터베이스 세션
+        assignment_id: 새 반편성 ID
+        parent_id: 부모 반편성 ID
+        student_ids, classes: 초안의 전체 배정 결과 (체크포인트로 저장할 때 사용)
+        moved_ids, moved_classes: 부모 대비 이동한 학생과 새 반
+        note: 메모
+        
+    Returns:
+        저장한 버전 정보
+    """
+    parent = db.get(AssignmentVersion, parent_id)
+    root_id = parent.root_id if parent is not None else parent_id
+    latest = db.execute(
+        select(func.max(AssignmentVersion.version)).where(AssignmentVersion.root_id == root_id)
+    ).scalar()
+    
+    depth = (parent.depth if parent is not None else 0) + 1
+    checkpoint = depth >= settings.ASSIGNMENT_CHECKPOINT_INTERVAL or len(moved_ids) * 2 >= len(student_ids)
+    
+    version = AssignmentVersion(
+        assignment_id=assignment_id,
+        root_id=root_id,
+        parent_id=parent_id,
+        version=(latest or 1) + 1,
+        depth=0 if checkpoint else depth,
+        moved=len(moved_ids),
+        encoding=None if checkpoint else PACK_ENCODING,
+        data=None if checkpoint else pack_placements(moved_ids, moved_classes),
+        note=note
+    )
+    db.add(version)
+    if checkpoint:
+        _save_arrays(db, assignment_id, student_ids, classes)
+    db.flush()
+    return version
+
+
+def load_placements(db: Session, assignment_id: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    반편성 결과 조회 (반 번호순, 같은 반 안에서는 저장 순서)
+    
+    Returns:
+        (학생 ID 배열, 반 배열)
+    """
+    stored = _load_stored(db, assignment_id)
+    if stored is None:
+        student_ids, classes = _reconstruct(db, assignment_id)
+    else:
+        student_ids, classes = stored
+    
+    order = np.argsort(classes, kind="stable")
+    return student_ids[order], classes[order]
+
+
+def _load_stored(db: Session, assignment_id: int) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    """
+    전체 결과가 저장된 반편성 조회 (이동만 저장된 초안이면 None)
+    """
+    pack = db.execute(
+        select(AssignmentPlacementPack.encoding, AssignmentPlacementPack.data)
+        .where(AssignmentPlacementPack.assignment_id == assignment_id)
+    ).first()
+    if pack is not None:
+        return unpack_placements(pack.data, pack.encoding)
+    
+    depth = db.execute(
+        select(AssignmentVersion.depth).where(AssignmentVersion.assignment_id == assignment_id)
+    ).scalar()
+    if depth:
+        return None
+    
+    rows = db.execute(
+        select(StudentAssignment.student_id, StudentAssignment.assigned_class)
+        .where(StudentAssignment.assignment_id == assignment_id)
+        .order_by(StudentAssignment.id)
+    ).all()
+    student_ids = np.array([row[0] for row in rows], dtype=np.int64)
+    classes = np.array([row[1] for row in rows], dtype=np.int64)
+    return student_ids, classes
+
+
+def _reconstruct(db: Session, assignment_id: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    이동만 저장된 초안 복원
+    
+    같은 이력의 버전 정보를 한 번에 읽어 전체 결과가 저장된 조상까지 따라 올라간 뒤,
+    그 결과에 이동을 오래된 순서대로 적용한다.
+    """
+    root_id = db.execute(
+        select(AssignmentVersion.root_id).where(AssignmentVersion.assignment_id == assignment_id)
+    ).scalar()
+    links = {
+        row.assignment_id: row
+        for row in db.execute(
+            select(AssignmentVersion.assignment_id, AssignmentVersion.parent_id, AssignmentVersion.depth)
+            .where(AssignmentVersion.root_id == root_id)
+        )
+    }
+    
+    chain = []
+    current = assignment_id
+    while current in links and links[current].depth > 0:
+        if len(chain) > len(links):
+            raise ValueError(f"반편성 이력이 순환합니다: {assignment_id}")
+        chain.append(current)
+        current = links[current].parent_id
+        if current is None:
+            raise ValueError(f"초안의 기준 반편성을 찾을 수 없습니다: {assignment_id}")
+    
+    student_ids, classes = _load_stored(db, current)
+    classes = np.array(classes, dtype=np.int64)
+    moves = {
+        row.assignment_id: unpack_placements(row.data, row.encoding)
+        for row in db.execute(
+            select(AssignmentVersion.assignment_id, AssignmentVersion.encoding, AssignmentVersion.data)
+            .where(AssignmentVersion.assignment_id.in_(chain))
+        )
+    }
+    
+    # 학생 ID 정렬 인덱스로 이동한 학생의 위치를 찾음 (기준 결과에 없는 학생은 무시)
+    order = np.argsort(student_ids, kind="stable")
+    sorted_ids = student_ids[order]
+    for version_id in reversed(chain):
+        moved_ids, moved_classes = moves[version_id]
+        positions = np.minimum(np.searchsorted(sorted_ids, moved_ids), max(len(sorted_ids) - 1, 0))
+        found = sorted_ids[positions] == moved_ids if len(sorted_ids) else np.zeros(len(moved_ids), dtype=bool)
+        classes[order[positions[found]]] = moved_classes[found]
+    
+    return student_ids, classes
+
+
+def version_info(db: Session, assignment_id: int) -> Optional[AssignmentVersion]:
+    """반편성의 버전 정보 (다른 반편성에서 파생되지 않았으면 None)"""
+    return db.get(AssignmentVersion, assignment_id)
+
+
+def delete_placements(db: Session, assignment_id: int) -> None:
+    """
+    반편성 결과 삭제 (압축 배열과 버전 정보; StudentAssignment 행은 반편성 삭제 시 함께 삭제됨)
+    
+    이 반편성에서 파생된 초안은 삭제 전에 전체 결과로 저장해 이력에서 떼어낸다.
+    """
+    children = db.execute(
+        select(AssignmentVersion.assignment_id, AssignmentVersion.depth)
+        .where(AssignmentVersion.parent_id == assignment_id)
+    ).all()
+    for child in children:
+        if child.depth > 0:
+            student_ids, classes = load_placements(db, child.assignment_id)
+            _save_arrays(db, child.assignment_id, student_ids, classes)
+    if children:
+        db.execute(
+            update(AssignmentVersion)
+            .where(AssignmentVersion.parent_id == assignment_id)
+            .values(parent_id=None, depth=0, encoding=None, data=None)
+        )
+        logger.info(f"반편성 {assignment_id} 삭제: 파생 초안 {len(children)}개를 전체 결과로 저장")
+    
+    db.execute(delete(AssignmentVersion).where(AssignmentVersion.assignment_id == assignment_id))
+    db.execute(delete(AssignmentPlacementPack).where(AssignmentPlacementPack.assignment_id == assignment_id))
+
+
+def iter_assigned_students(db: Session, assignment_id: int, *columns: Any,
+                           batch_size: int = STUDENT_BATCH_SIZE) -> Iterator[Tuple]:
+    """
+    배정된 학생 정보 조회 (반 번호순)
+    
+    Args:
+        db: 데이터베이스 세션
+        assignment_id: 반편성 ID
+        columns: 조회할 학생 컬럼 또는 Student 엔티티
+        batch_size: 한 번에 조회하는 학생 수
+        
+    Yields:
+        (배정 반, *columns 값) - 삭제된 학생은 건너뜀
+    """
+    student_ids, classes = load_placements(db, assignment_id)
+    
+    for start in range(0, len(student_ids), batch_size):
+        batch_ids = student_ids[start:start + batch_size].tolist()
+        found = {
+            row[0]: tuple(row[1:])
+            for row in db.execute(select(Student.id, *columns).where(Student.id.in_(batch_ids)))
+        }
+        for student_id, class_num in zip(batch_ids, classes[start:start + batch_size].tolist()):
+            values = found.get(student_id)
+            if values is not None:
+                yield (class_num, *values)
@@ -0,0 +1,617 @@
+"""
+데이터베이스 백업/복구
+
+- 스냅샷: SQLite 온라인 백업 API를 작은 페이지 단위로 실행 (단계 사이에 쉬어 쓰기와 디스크를 막지 않음)
+- 저장: gzip 압축 → AES-256-GCM 청크 암호화를 스트리밍으로 처리 (DB 전체를 메모리에 올리지 않음)
+  (DATABASE_ENCRYPTION_KEY가 없으면 압축만 함)
+- 변경 없음: 스냅샷 SHA-256이 마지막 백업과 같으면 자동 백업 생략
+- 보관: 자동 백업은 GFS 정책 (일일 7개, 주간 4개, 월간 12개, 연간 무기한)
+- 복구: 복호화/압축 해제 → 체크섬과 PRAGMA integrity_check 확인 → 현재 DB를 백업한 뒤 교체
+
+파일 구성 (BACKUP_DIR):
+- auto/, manual/: backup_{날짜_시각}.enc (암호화) 또는 .bak + 같은 이름의 .json 메타데이터
+- tmp/: 작업 중 임시 파일
+"""
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional
+from pathlib import Path
+from datetime import datetime, timedelta
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import struct
+import threading
+import time
+import uuid
+import zlib
+import logging
+
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+from sqlalchemy.engine import make_url
+
+from ..core.config import settings
+from ..core.database import engine, Base
+from ..core.migrations import run_migrations
+from . import cohort_cache
+from .student_import import detect_natural_key_index
+
+logger = logging.getLogger(__name__)
+
+# 파일 형식: MAGIC(4) + 버전(1) + 플래그(1) + 솔트(16) + 논스 접두사(8) + 스냅샷 SHA-256(32)
+#            이후 프레임 반복: 길이(4, 최상위 비트 = 마지막 프레임) + 데이터
+FORMAT_MAGIC = b"ACBK"
+FORMAT_VERSION = 1
+FLAG_ENCRYPTED = 0x01
+HEADER_SIZE = 4 + 1 + 1 + 16 + 8 + 32
+FINAL_FRAME = 0x80000000
+
+CHUNK_SIZE = 1024 * 1024
+KDF_ITERATIONS = 100_000
+
+BACKUP_KINDS = ("auto", "manual")
+
+# GFS 보관 정책 (기간별로 가장 최근 백업 1개씩, None이면 무기한)
+RETENTION = {"daily": 7, "weekly": 4, "monthly": 12, "yearly": None}
+
+# 자동 백업 주기 (manual이면 자동 백업 안 함)
+BACKUP_FREQUENCIES = {"hourly": timedelta(hours=1), "daily": timedelta(days=1), "weekly": timedelta(weeks=1)}
+
+# 앱 시작 직후에는 백업하지 않음 (밀린 자동 백업은 이 시간 뒤에 실행)
+STARTUP_DELAY_SECONDS = 60
+
+_BACKUP_ID = re.compile(r"^(auto|manual)-(\d{4}-\d{2}-\d{2}_\d{2}-\d{2}-\d{2})(?:-(\d+))?$")
+
+# 백업/복구는 한 번에 하나씩
+_lock = threading.Lock()
+_scheduler = None
+
+
+# ---------------------------------------------------------------------------
+# 조회
+# ---------------------------------------------------------------------------
+
+def list_backups(kind: Optional[str] = None) -> List[Dict[str, Any]]:
+    """백업 목록 (최신순)"""
+    kinds = [kind] if kind else list(BACKUP_KINDS)
+    backups = []
+    for name in kinds:
+        for path in (_backup_root() / name).glob("backup_*.json"):
+            try:
+                metadata = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                logger.warning(f"백업 메타데이터를 읽을 수 없음: {path}")
+                continue
+            if (path.parent / metadata.get("file", "")).exists():
+                backups.append(metadata)
+    backups.sort(key=lambda b: b["created_at"], reverse=True)
+    return backups
+
+
+def get_backup(backup_id: str) -> Dict[str, Any]:
+    """
+    백업 메타데이터 조회
+
+    Raises:
+        FileNotFoundError: 백업이 없음
+    """
+    match = _BACKUP_ID.match(backup_id)
+    if not match:
+        raise FileNotFoundError(backup_id)
+    path = _backup_root() / match.group(1) / f"backup_{_id_suffix(backup_id)}.json"
+    try:
+        metadata = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        raise FileNotFoundError(backup_id)
+    if not (path.parent / metadata["file"]).exists():
+        raise FileNotFoundError(backup_id)
+    return metadata
+
+
+# ---------------------------------------------------------------------------
+# 백업
+# ---------------------------------------------------------------------------
+
+def create_backup(kind: str = "manual", description: Optional[str] = None,
+                  skip_unchanged: bool = False) -> Optional[Dict[str, Any]]:
+    """
+    백업 생성
+
+    Args:
+        kind: auto / manual
+        description: 설명 (수동 백업)
+        skip_unchanged: 마지막 백업과 내용이 같으면 생략
+
+    Returns:
+        백업 메타데이터 (생략했으면 None)
+    """
+    if kind not in BACKUP_KINDS:
+        raise ValueError(f"알 수 없는 백업 종류: {kind}")
+    with _lock:
+        _clean_tmp()
+        return _create_backup(kind, description, skip_unchanged)
+
+
+def run_auto_backup() -> Optional[Dict[str, Any]]:
+    """자동 백업 (스케줄러 작업): 변경이 있을 때만 백업하고 GFS 정책으로 정리"""
+    try:
+        with _lock:
+            _clean_tmp()
+            metadata = _create_backup("auto", None, skip_unchanged=True)
+            removed = _prune_auto_backups()
+        if removed:
+            logger.info(f"오래된 자동 백업 {len(removed)}개 삭제")
+        return metadata
+    except Exception as e:
+        logger.error(f"자동 백업 실패: {e}")
+        return None
+
+
+def delete_backup(backup_id: str) -> None:
+    """백업 삭제"""
+    with _lock:
+        metadata = get_backup(backup_id)
+        directory = _backup_root() / metadata["kind"]
+        _remove(directory / metadata["file"])
+        _remove(directory / f"backup_{_id_suffix(backup_id)}.json")
+    logger.info(f"백업 삭제: {backup_id}")
+
+
+def _create_backup(kind: str, description: Optional[str],
+                   skip_unchanged: bool) -> Optional[Dict[str, Any]]:
+    """백업 생성 (_lock을 잡은 상태에서 호출)"""
+    database_path = _database_path()
+    tmp_dir = _tmp_dir()
+    snapshot = tmp_dir / f"snapshot-{uuid.uuid4().hex}.db"
+    archive = snapshot.with_suffix(".part")
+    try:
+        started = time.perf_counter()
+        _copy_database(database_path, snapshot)
+        db_sha256 = _file_sha256(snapshot)
+
+        if skip_unchanged:
+            latest = next(iter(list_backups()), None)
+            if latest and latest.get("db_sha256") == db_sha256:
+                logger.info(f"변경 사항이 없어 백업 생략 (마지막 백업: {latest['id']})")
+                return None
+
+        password = settings.DATABASE_ENCRYPTION_KEY or None
+        _write_archive(snapshot, archive, db_sha256, password)
+
+        created_at = datetime.now()
+        backup_id, suffix = _new_backup_id(kind, created_at)
+        directory = _backup_root() / kind
+        directory.mkdir(parents=True, exist_ok=True)
+        file_name = f"backup_{suffix}{'.enc' if password else '.bak'}"
+        os.replace(archive, directory / file_name)
+
+        metadata = {
+            "id": backup_id,
+            "kind": kind,
+            "file": file_name,
+            "description": description,
+            "created_at": created_at.isoformat(timespec="seconds"),
+            "size": (directory / file_name).stat().st_size,
+            "db_size": snapshot.stat().st_size,
+            "db_sha256": db_sha256,
+            "encrypted": bool(password)
+        }
+        metadata_tmp = tmp_dir / f"{backup_id}.json"
+        metadata_tmp.write_text(json.dumps(metadata, ensure_ascii=False, indent=2), encoding="utf-8")
+        os.replace(metadata_tmp, directory / f"backup_{suffix}.json")
+
+        logger.info(f"백업 완료: {backup_id} ({metadata['size']} bytes, "
+                    f"{time.perf_counter() - started:.1f}초)")
+        return metadata
+    finally:
+        _remove(snapshot)
+        _remove(archive)
+
+
+def _prune_auto_backups() -> List[str]:
+    """GFS 정책에 포함되지 않는 자동 백업 삭제 (_lock을 잡은 상태에서 호출)"""
+    backups = list_backups("auto")
+    keep = _gfs_keep(backups)
+    removed = []
+    for metadata in backups:
+        if metadata["id"] in keep:
+            continue
+        directory = _backup_root() / "auto"
+        _remove(directory / metadata["file"])
+        _remove(directory / f"backup_{_id_suffix(metadata['id'])}.json")
+        removed.append(metadata["id"])
+    return removed
+
+
+def _gfs_keep(backups: List[Dict[str, Any]]) -> set:
+    """
+    GFS 보관 대상 백업 ID (backups는 최신순)
+
+    기간(일/주/월/연)마다 가장 최근 백업 1개를 정해진 개수의 기간만큼 보관한다.
+    """
+    keep = set()
+    for period, count in RETENTION.items():
+        seen = set()
+        for metadata in backups:
+            bucket = _period_key(datetime.fromisoformat(metadata["created_at"]), period)
+            if bucket in seen:
+                continue
+            if count is not None and len(seen) >= count:
+                break
+            seen.add(bucket)
+            keep.add(metadata["id"])
+    return keep
+
+
+def _period_key(created_at: datetime, period: str) -> tuple:
+    if period == "daily":
+        return (created_at.year, created_at.month, created_at.day)
+    if period == "weekly":
+        return tuple(created_at.isocalendar()[:2])
+    if period == "monthly":
+        return (created_at.year, created_at.month)
+    return (created_at.year,)
+
+
+# ---------------------------------------------------------------------------
+# 검증/복구
+# ---------------------------------------------------------------------------
+
+def verify_backup(backup_id: str) -> Dict[str, Any]:
+    """
+    백업 파일 검증 (복호화/압축 해제/체크섬/DB 무결성)
+
+    Raises:
+        ValueError: 검증 실패
+    """
+    metadata = get_backup(backup_id)
+    with _lock:
+        _clean_tmp()
+        restored = _tmp_dir() / f"verify-{uuid.uuid4().hex}.db"
+        try:
+            _extract_archive(_backup_root() / metadata["kind"] / metadata["file"], restored)
+            _check_integrity(restored)
+        finally:
+            _remove(restored)
+    return {"id": backup_id, "valid": True, "db_sha256": metadata["db_sha256"]}
+
+
+def restore_backup(backup_id: str) -> Dict[str, Any]:
+    """
+    백업으로 데이터베이스 복구
+
+    백업 파일을 임시 DB로 풀어 체크섬과 무결성을 확인한 뒤,
+    현재 DB를 수동 백업으로 남기고 온라인 백업 API로 현재 DB에 덮어쓴다.
+    비동기 엔진의 연결 풀은 이벤트 루프에서 닫아야 하므로 호출자가 비운다.
+    (async_engine.dispose())
+
+    Raises:
+        ValueError: 검증 실패 (현재 DB는 바뀌지 않음)
+    """
+    metadata = get_backup(backup_id)
+    with _lock:
+        _clean_tmp()
+        restored = _tmp_dir() / f"restore-{uuid.uuid4().hex}.db"
+        try:
+            _extract_archive(_backup_root() / metadata["kind"] / metadata["file"], restored)
+            _check_integrity(restored)
+
+            safety = _create_backup("manual", f"복구 전 자동 백업 ({backup_id})", skip_unchanged=False)
+            _copy_database(restored, _database_path())
+        finally:
+            _remove(restored)
+
+        # 연결 풀을 비우고 복구된 DB에 현재 스키마 적용
+        engine.dispose()
+        Base.metadata.create_all(bind=engine)
+        run_migrations(engine)
+        detect_natural_key_index(engine)
+
+    # 복구 전 데이터로 만든 스냅샷/특성이 다시 쓰이지 않도록 모든 학교 버전을 올림
+    cohort_cache.invalidate_all()
+    logger.info(f"복구 완료: {backup_id} (복구 전 백업: {safety['id'] if safety else '-'})")
+    return {"restored": metadata, "safety_backup": safety}
+
+
+def _check_integrity(database_path: Path) -> None:
+    """SQLite 무결성 검사"""
+    connection = sqlite3.connect(str(database_path))
+    try:
+        result = [row[0] for row in connection.execute("PRAGMA integrity_check")]
+    except sqlite3.DatabaseError as e:
+        raise ValueError(f"백업 데이터베이스를 열 수 없습니다: {e}")
+    finally:
+        connection.close()
+    if result != ["ok"]:
+        raise ValueError(f"백업 데이터베이스 무결성 검사 실패: {'; '.join(result[:5])}")
+
+
+# ---------------------------------------------------------------------------
+# 스냅샷/파일 형식
+# ---------------------------------------------------------------------------
+
+def _copy_database(source_path: Path, target_path: Path) -> None:
+    """SQLite 온라인 백업 API로 복사 (BACKUP_STEP_PAGES 페이지씩, 단계 사이에 대기)"""
+    if not source_path.exists():
+        raise ValueError(f"데이터베이스 파일이 없습니다: {source_path}")
+    pause = settings.BACKUP_STEP_SLEEP_MS / 1000
+
+    def progress(status, remaining, total):
+        if remaining and pause:
+            time.sleep(pause)
+
+    source = sqlite3.connect(str(source_path), timeout=settings.SQLITE_BUSY_TIMEOUT_MS / 1000)
+    try:
+        target = sqlite3.connect(str(target_path), timeout=settings.SQLITE_BUSY_TIMEOUT_MS / 1000)
+        try:
+            source.backup(target, pages=max(1, settings.BACKUP_STEP_PAGES), progress=progress)
+        finally:
+            target.close()
+    finally:
+        source.close()
+
+
+def _iter_blocks(file: BinaryIO) -> Iterator[bytes]:
+    """파일을 CHUNK_SIZE씩 읽기 (블록 사이에 대기)"""
+    pause = settings.BACKUP_STEP_SLEEP_MS / 1000
+    while True:
+        block = file.read(CHUNK_SIZE)
+        if not block:
+            return
+        yield block
+        if pause:
+            time.sleep(pause)
+
+
+def _file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in _iter_blocks(file):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _derive_key(password: str, salt: bytes) -> bytes:
+    """비밀번호 → AES-256 키 (파일마다 다른 솔트)"""
+    kdf = PBKDF2HMAC(algorithm=hashes.SHA256(), length=32, salt=salt, iterations=KDF_ITERATIONS)
+    return kdf.derive(password.encode("utf-8"))
+
+
+def _frame_nonce(prefix: bytes, index: int) -> bytes:
+    return prefix + struct.pack(">I", index)
+
+
+def _frame_aad(header: bytes, index: int, final: bool) -> bytes:
+    # 헤더/순서/마지막 여부를 인증해 프레임 교체, 재배열, 잘라내기를 막음
+    return header + struct.pack(">IB", index, 1 if final else 0)
+
+
+class _FrameWriter:
+    """압축된 데이터를 CHUNK_SIZE 프레임으로 (암호화해) 기록"""
+
+    def __init__(self, file: BinaryIO, header: bytes, key: Optional[bytes], nonce_prefix: bytes):
+        self._file = file
+        self._header = header
+        self._cipher = AESGCM(key) if key else None
+        self._nonce_prefix = nonce_prefix
+        self._buffer = bytearray()
+        self._index = 0
+
+    def write(self, data: bytes) -> None:
+        self._buffer += data
+        # 마지막 프레임 표시를 위해 CHUNK_SIZE를 넘는 부분만 기록
+        while len(self._buffer) > CHUNK_SIZE:
+            self._emit(bytes(self._buffer[:CHUNK_SIZE]), final=False)
+            del self._buffer[:CHUNK_SIZE]
+
+    def close(self) -> None:
+        self._emit(bytes(self._buffer), final=True)
+        self._buffer.clear()
+
+    def _emit(self, chunk: bytes, final: bool) -> None:
+        if self._cipher is not None:
+            chunk = self._cipher.encrypt(_frame_nonce(self._nonce_prefix, self._index), chunk,
+                                         _frame_aad(self._header, self._index, final))
+        self._file.write(struct.pack(">I", len(chunk) | (FINAL_FRAME if final else 0)))
+        self._file.write(chunk)
+        self._index += 1
+
+
+def _write_archive(snapshot: Path, target: Path, db_sha256: str, password: Optional[str]) -> None:
+    """스냅샷 → 압축 → (암호화) → 백업 파일 (스트리밍)"""
+    salt = os.urandom(16) if password else bytes(16)
+    nonce_prefix = os.urandom(8) if password else bytes(8)
+    flags = FLAG_ENCRYPTED if password else 0
+    header = FORMAT_MAGIC + bytes([FORMAT_VERSION, flags]) + salt + nonce_prefix + bytes.fromhex(db_sha256)
+    key = _derive_key(password, salt) if password else None
+
+    with open(snapshot, "rb") as source, open(target, "wb") as output:
+        output.write(header)
+        writer = _FrameWriter(output, header, key, nonce_prefix)
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # gzip 형식
+        for block in _iter_blocks(source):
+            writer.write(compressor.compress(block))
+        writer.write(compressor.flush())
+        writer.close()
+        output.flush()
+        os.fsync(output.fileno())
+
+
+def _iter_frames(file: BinaryIO, header: bytes, key: Optional[bytes], nonce_prefix: bytes) -> Iterator[bytes]:
+    """백업 파일 프레임 → (복호화된) 압축 데이터"""
+    cipher = AESGCM(key) if key else None
+    index = 0
+    while True:
+        raw_length = file.read(4)
+        if len(raw_length) < 4:
+            raise ValueError("백업 파일이 잘렸습니다")
+        length, = struct.unpack(">I", raw_length)
+        final = bool(length & FINAL_FRAME)
+        length &= ~FINAL_FRAME
+        chunk = file.read(length)
+        if len(chunk) < length:
+            raise ValueError("백업 파일이 잘렸습니다")
+        if cipher is not None:
+            try:
+                chunk = cipher.decrypt(_frame_nonce(nonce_prefix, index), chunk,
+                                       _frame_aad(header, index, final))
+            except InvalidTag:
+                raise ValueError("백업 파일을 복호화할 수 없습니다 (암호화 키가 다르거나 파일이 손상됨)")
+        yield chunk
+        index += 1
+        if final:
+            if file.read(1):
+                raise ValueError("백업 파일 끝에 알 수 없는 데이터가 있습니다")
+            return
+
+
+def _extract_archive(archive: Path, target: Path) -> None:
+    """
+    백업 파일 → DB 파일 (스트리밍, 스냅샷 SHA-256 확인)
+
+    Raises:
+        ValueError: 형식 오류, 복호화 실패, 체크섬 불일치
+    """
+    with open(archive, "rb") as source, open(target, "wb") as output:
+        header = source.read(HEADER_SIZE)
+        if len(header) < HEADER_SIZE or header[:4] != FORMAT_MAGIC:
+            raise ValueError("백업 파일 형식이 아닙니다")
+        if header[4] != FORMAT_VERSION:
+            raise ValueError(f"지원하지 않는 백업 파일 버전: {header[4]}")
+        encrypted = bool(header[5] & FLAG_ENCRYPTED)
+        salt, nonce_prefix, expected = header[6:22], header[22:30], header[30:62].hex()
+
+        key = None
+        if encrypted:
+            if not settings.DATABASE_ENCRYPTION_KEY:
+                raise ValueError("암호화된 백업입니다. DATABASE_ENCRYPTION_KEY를 설정하세요")
+            key = _derive_key(settings.DATABASE_ENCRYPTION_KEY, salt)
+
+        digest = hashlib.sha256()
+        decompressor = zlib.decompressobj(31)
+        for chunk in _iter_frames(source, header, key, nonce_prefix):
+            try:
+                data = decompressor.decompress(chunk)
+            except zlib.error as e:
+                raise ValueError(f"백업 파일 압축을 풀 수 없습니다: {e}")
+            digest.update(data)
+            output.write(data)
+        if not decompressor.eof or decompressor.unused_data:
+            raise ValueError("백업 파일 압축 데이터가 올바르지 않습니다")
+
+    if digest.hexdigest() != expected:
+        raise ValueError("백업 체크섬이 일치하지 않습니다")
+
+
+# ---------------------------------------------------------------------------
+# 자동 백업 스케줄러
+# ---------------------------------------------------------------------------
+
+def start_scheduler() -> None:
+    """자동 백업 스케줄러 시작 (앱 시작 시 호출, 백그라운드 스레드에서 실행)"""
+    global _scheduler
+    frequency = settings.BACKUP_FREQUENCY
+    if not settings.AUTO_BACKUP_ENABLED or frequency == "manual":
+        logger.info("자동 백업 사용 안 함")
+        return
+    if frequency not in BACKUP_FREQUENCIES:
+        logger.error(f"알 수 없는 백업 주기: {frequency} (hourly, daily, weekly, manual)")
+        return
+    try:
+        _database_path()
+        hour, minute = (int(part) for part in settings.BACKUP_TIME.split(":"))
+    except ValueError as e:
+        logger.error(f"자동 백업을 시작할 수 없음: {e}")
+        return
+
+    from apscheduler.schedulers.background import BackgroundScheduler
+    from apscheduler.triggers.cron import CronTrigger
+
+    if frequency == "hourly":
+        trigger = CronTrigger(minute=minute)
+    elif frequency == "daily":
+        trigger = CronTrigger(hour=hour, minute=minute)
+    else:
+        trigger = CronTrigger(day_of_week="mon", hour=hour, minute=minute)
+
+    _scheduler = BackgroundScheduler(daemon=True)
+    _scheduler.add_job(run_auto_backup, trigger, id="auto_backup",
+                       max_instances=1, coalesce=True, misfire_grace_time=3600)
+
+    # 앱이 꺼져 있어 지난 백업을 놓쳤으면 잠시 뒤 한 번 실행
+    latest = next(iter(list_backups("auto")), None)
+    if latest is None or datetime.now() - datetime.fromisoformat(latest["created_at"]) > BACKUP_FREQUENCIES[frequency]:
+        _scheduler.add_job(run_auto_backup, "date", id="auto_backup_catch_up",
+                           run_date=datetime.now() + timedelta(seconds=STARTUP_DELAY_SECONDS))
+
+    _scheduler.start()
+    logger.info(f"자동 백업 시작: {frequency} {settings.BACKUP_TIME}")
+
+
+def stop_scheduler() -> None:
+    """자동 백업 스케줄러 종료"""
+    global _scheduler
+    if _scheduler is not None:
+        _scheduler.shutdown(wait=False)
+        _scheduler = None
+
+
+def next_run_time() -> Optional[datetime]:
+    """다음 자동 백업 시각"""
+    job = _scheduler.get_job("auto_backup") if _scheduler is not None else None
+    return job.next_run_time if job is not None else None
+
+
+# ---------------------------------------------------------------------------
+# 경로
+# ---------------------------------------------------------------------------
+
+def _database_path() -> Path:
+    url = make_url(settings.DATABASE_URL)
+    if url.get_backend_name() != "sqlite" or not url.database or url.database == ":memory:":
+        raise ValueError("SQLite 파일 데이터베이스만 백업할 수 있습니다")
+    return Path(url.database)
+
+
+def _backup_root() -> Path:
+    return Path(settings.BACKUP_DIR)
+
+
+def _tmp_dir() -> Path:
+    directory = _backup_root() / "tmp"
+    directory.mkdir(parents=True, exist_ok=True)
+    return directory
+
+
+def _clean_tmp() -> None:
+    """이전에 중단된 작업의 임시 파일 삭제 (_lock을 잡은 상태에서 호출)"""
+    for path in _tmp_dir().iterdir():
+        _remove(path)
+
+
+def _id_suffix(backup_id: str) -> str:
+    """백업 ID → 파일 이름의 날짜/시각 부분"""
+    return backup_id.split("-", 1)[1]
+
+
+def _new_backup_id(kind: str, created_at: datetime) -> tuple:
+    """(백업 ID, 파일 이름 접미사) - 같은 초에 여러 번 만들면 번호를 붙임"""
+    suffix = created_at.strftime("%Y-%m-%d_%H-%M-%S")
+    directory = _backup_root() / kind
+    candidate, number = suffix, 1
+    while (directory / f"backup_{candidate}.json").exists():
+        number += 1
+        candidate = f"{suffix}-{number}"
+    return f"{kind}-{candidate}", candidate
+
+
+def _remove(path: Path) -> None:
+    try:
+        path.unlink()
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        logger.warning(f"파일 삭제 실패: {path} ({e})")
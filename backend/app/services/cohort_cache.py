@@ -0,0 +1,166 @@
+"""
+학년별 학생/규칙 스냅샷 캐시 (프로세스 내 메모리)
+
+반편성 생성 때마다 학생과 규칙을 다시 조회하지 않도록 (학교, 학년)별로
+세션에서 분리된 읽기 전용 스냅샷을 보관한다.
+
+학생/규칙/학교를 변경하는 API는 커밋 후 bump_version(school_id)을 호출해야 하며,
+학교 버전이 바뀌면 해당 학교의 스냅샷은 다음 조회 때 다시 만들어진다.
+(단일 프로세스 기준. 여러 워커 프로세스로 실행하면 프로세스마다 따로 관리된다.)
+
+인코딩된 학생 특성은 디스크의 피처 저장소(feature_store)에 두고 메모리 매핑으로 읽는다.
+"""
+from typing import Dict, Tuple, Optional, Any
+from collections import OrderedDict
+from dataclasses import dataclass
+import threading
+import logging
+
+from ..core.database import SessionLocal
+from ..models.student import Student
+from ..models.school import School
+from ..models.rule import ClassAssignmentRule
+from ..engine.student_record import StudentRecord, to_student_records
+from ..engine.field_encoder import EncodedFeatures
+from ..engine.rule_engine import encode_features
+from . import feature_store
+
+logger = logging.getLogger(__name__)
+
+# 보관할 최대 스냅샷 수 (가장 오래 사용하지 않은 것부터 삭제)
+MAX_SNAPSHOTS = 32
+
+
+@dataclass(frozen=True)
+class CohortSnapshot:
+    """
+    (학교, 학년) 반편성 입력 스냅샷 (읽기 전용, 요청 간 공유)
+    
+    students는 반편성 계산용 StudentRecord (읽기 전용),
+    rules는 세션에서 분리된 객체이므로 수정하면 안 된다.
+    """
+    school_id: int
+    grade: int
+    version: int
+    students: Tuple[StudentRecord, ...]
+    rules: Tuple[ClassAssignmentRule, ...]  # 활성 규칙
+    field_definitions: Tuple[Dict[str, Any], ...]
+
+
+_versions: Dict[int, int] = {}
+_base_version = 0  # _versions에 없는 학교의 버전 (invalidate_all()마다 증가)
+_snapshots: "OrderedDict[Tuple[int, int], CohortSnapshot]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def bump_version(school_id: Optional[int]) -> None:
+    """학교 데이터 변경 알림 (학생/규칙/학교 쓰기 API에서 커밋 후 호출)"""
+    if school_id is None:
+        return
+    with _lock:
+        _versions[school_id] = _versions.get(school_id, _base_version) + 1
+        for key in [key for key in _snapshots if key[0] == school_id]:
+            del _snapshots[key]
+        feature_store.invalidate(school_id)
+
+
+def current_version(school_id: int) -> int:
+    """학교 데이터 버전"""
+    with _lock:
+        return _versions.get(school_id, _base_version)
+
+
+def get_snapshot(school_id: int, grade: int) -> CohortSnapshot:
+    """
+    (학교, 학년) 스냅샷 조회 (없거나 오래되었으면 DB에서 다시 만듦)
+    
+    요청 세션과 별도의 세션으로 읽으므로 요청 트랜잭션에 영향을 주지 않는다.
+    """
+    key = (school_id, grade)
+    with _lock:
+        version = _versions.get(school_id, _base_version)
+        snapshot = _snapshots.get(key)
+        if snapshot is not None and snapshot.version == version:
+            _snapshots.move_to_end(key)
+            return snapshot
+    
+    snapshot = _load_snapshot(school_id, grade, version)
+    
+    with _lock:
+        # 읽는 동안 데이터가 바뀌었으면 보관하지 않음 (이번 요청에서만 사용)
+        if _versions.get(school_id, _base_version) == version:
+            _snapshots[key] = snapshot
+            _snapshots.move_to_end(key)
+            while len(_snapshots) > MAX_SNAPSHOTS:
+                _snapshots.popitem(last=False)
+    return snapshot
+
+
+def get_features(snapshot: CohortSnapshot) -> EncodedFeatures:
+    """
+    스냅샷 학생들의 인코딩된 특성 (저장소에 없거나 오래되었으면 다시 만들어 저장)
+    """
+    students = list(snapshot.students)
+    features = feature_store.load_features(snapshot.school_id, snapshot.grade)
+    if features is not None and features.matches(students):
+        return features
+    
+    features = encode_features(students, list(snapshot.field_definitions) or None)
+    try:
+        staged = feature_store.write_features(snapshot.school_id, snapshot.grade, features)
+    except OSError as e:
+        logger.warning(f"특성 저장 실패 (학교 {snapshot.school_id}, {snapshot.grade}학년): {e}")
+        return features
+    
+    with _lock:
+        # 인코딩하는 동안 데이터가 바뀌었으면 저장하지 않음
+        if _versions.get(snapshot.school_id, _base_version) == snapshot.version:
+            feature_store.publish_features(staged, snapshot.school_id, snapshot.grade)
+            staged = None
+    if staged is not None:
+        feature_store.discard_features(staged)
+    return features
+
+
+def invalidate_all() -> None:
+    """
+    모든 학교 데이터 변경 알림 (DB 복구 후 호출)
+    
+    스냅샷만 지우면 복구 전에 시작한 조회/인코딩이 같은 버전으로 다시 저장할 수 있으므로
+    아직 버전이 없는 학교까지 모든 학교의 버전을 올린다.
+    """
+    global _base_version
+    with _lock:
+        _base_version = max([_base_version, *_versions.values()]) + 1
+        _versions.clear()
+        _snapshots.clear()
+        feature_store.invalidate_all()
+
+
+def _load_snapshot(school_id: int, grade: int, version: int) -> CohortSnapshot:
+    """DB에서 스냅샷 생성 (세션을 닫으면 객체는 분리되고 읽은 값은 그대로 유지됨)"""
+    with SessionLocal() as session:
+        students = session.query(Student).filter(
+            Student.school_id == school_id,
+            Student.grade == grade
+        ).all()
+        
+        rules = session.query(ClassAssignmentRule).filter(
+            ClassAssignmentRule.school_id == school_id,
+            ClassAssignmentRule.is_active == True
+        ).all()
+        
+        school = session.query(School).filter(School.id == school_id).first()
+        field_definitions = tuple(school.custom_field_definitions or []) if school else ()
+        
+        session.expunge_all()
+    
+    logger.info(f"스냅샷 생성: 학교 {school_id}, {grade}학년, 학생 {len(students)}명, 규칙 {len(rules)}개")
+    return CohortSnapshot(
+        school_id=school_id,
+        grade=grade,
+        version=version,
+        students=tuple(to_student_records(students)),
+        rules=tuple(rules),
+        field_definitions=field_definitions
+    )
@@ -2,11 +2,23 @@
 Excel 파일 파싱 서비스
 """
 import pandas as pd
-from typing import List, Dict, Tuple
+import numpy as np
+import openpyxl
+from openpyxl import load_workbook, Workbook
+from openpyxl.writer.excel import ExcelWriter
+from openpyxl.drawing.spreadsheet_drawing import SpreadsheetDrawing
+from zipfile import ZipFile, ZIP_DEFLATED
+from typing import List, Dict, Tuple, Iterator, Iterable, Optional, BinaryIO, Union, Any
+from pathlib import Path
+from datetime import datetime
 import logging
+from ..engine.field_encoder import infer_field_encoding
 
 logger = logging.getLogger(__name__)
 
+# 시트 스트리밍은 openpyxl 3.1 내부 구현에 맞춰 작성됨 (다른 버전은 save()로 한꺼번에 씀)
+STREAMING_SUPPORTED = openpyxl.__version__.startswith('3.1.')
+
 
 class ExcelParser:
     """Excel 파일 파싱 및 검증"""
@@ -29,101 +41,500 @@ class ExcelParser:
         '여자': '여'
     }
     
+    # CSV 계열 확장자 → 구분자 (None이면 첫 줄로 추정)
+    CSV_SEPARATORS = {'.csv': None, '.tsv': '\t', '.txt': None}
+    
+    # 인코딩 감지에 사용할 앞부분 크기
+    ENCODING_SAMPLE_SIZE = 64 * 1024
+    
+    # 파싱 오류 리포트 컬럼 (엑셀 행 번호, 컬럼, 원래 값, 오류 내용)
+    ERROR_COLUMNS = ['row', 'column', 'value', 'error']
+    
+    # 선택(select) 필드로 보는 최대 고유값 수 (넘으면 text)
+    SELECT_MAX_OPTIONS = 10
+    
+    # 컬럼 프로파일에 보관하는 상위 값 수
+    PROFILE_TOP_VALUES = 10
+    
+    # 숫자 비율이 이 이상이면 숫자가 섞인 컬럼(mixed)도 숫자 필드로 봄
+    NUMERIC_MIN_RATIO = 0.9
+    
     @staticmethod
-    def parse_excel(file_path: str) -> Tuple[List[Dict], List[str], List[Dict]]:
+    def parse_excel(file_path: Union[str, BinaryIO], with_errors: bool = False,
+                    filename: Optional[str] = None, with_profile: bool = False) -> Tuple:
         """
         Excel 파일 파싱
         
         Args:
-            file_path: Excel 파일 경로
+            file_path: Excel 파일 경로 또는 파일 객체 (메모리 버퍼 등)
+            with_errors: True면 파싱 오류 행 리포트도 반환
+            filename: 파일 이름 (file_path가 파일 객체일 때 Excel/CSV 구분용)
+            with_profile: True면 컬럼 프로파일도 반환
             
         Returns:
-            (학생 데이터 리스트, 커스텀 컬럼 리스트, 필드 정의 리스트)
+            (학생 데이터 리스트, 커스텀 컬럼 리스트, 필드 정의 리스트[, 오류 DataFrame][, 컬럼 프로파일])
         """
         try:
-            # Excel 파일 읽기
-            df = pd.read_excel(file_path)
-            logger.info(f"Excel 파일 로드 완료: {len(df)}행, {len(df.columns)}열")
-            
-            # 컬럼명 정리 (공백 제거)
-            df.columns = df.columns.str.strip()
-            
-            # 필수 컬럼 확인
-            missing_cols = [col for col in ExcelParser.REQUIRED_COLUMNS 
-                           if col not in df.columns]
-            if missing_cols:
-                raise ValueError(f"필수 컬럼이 없습니다: {', '.join(missing_cols)}")
-            
-            # 커스텀 컬럼 추출
-            all_standard_cols = ExcelParser.REQUIRED_COLUMNS + ExcelParser.OPTIONAL_COLUMNS
-            custom_columns = [col for col in df.columns if col not in all_standard_cols]
-            logger.info(f"커스텀 컬럼: {custom_columns}")
-            
-            # 필드 정의 자동 생성
-            field_definitions = ExcelParser._generate_field_definitions(df, custom_columns)
-            
-            # 데이터 변환
-            students = []
-            for idx, row in df.iterrows():
-                try:
-                    student_data = ExcelParser._parse_student_row(row, custom_columns)
-                    students.append(student_data)
-                except Exception as e:
-                    logger.warning(f"행 {idx + 2} 파싱 오류: {e}")
-                    continue
+            # Excel/CSV 파일 읽기
+            df = ExcelParser.read_roster(file_path, filename)
+            logger.info(f"파일 로드 완료: {len(df)}행, {len(df.columns)}열")
             
-            logger.info(f"총 {len(students)}명의 학생 데이터 파싱 완료")
-            return students, custom_columns, field_definitions
+            students, custom_columns, field_definitions, errors, profile = ExcelParser.parse_dataframe(
+                df, with_profile=True
+            )
+            
+            result = (students, custom_columns, field_definitions)
+            if with_errors:
+                result += (errors,)
+            if with_profile:
+                result += (profile,)
+            return result
             
         except Exception as e:
             logger.error(f"Excel 파싱 오류: {e}")
             raise
     
     @staticmethod
-    def _parse_student_row(row: pd.Series, custom_columns: List[str]) -> Dict:
-        """개별 학생 행 파싱"""
+    def is_csv(filename: Optional[str]) -> bool:
+        """CSV/TSV 파일 여부 (확장자 기준)"""
+        return bool(filename) and Path(filename).suffix.lower() in ExcelParser.CSV_SEPARATORS
+    
+    @staticmethod
+    def read_roster(file: Union[str, BinaryIO], filename: Optional[str] = None,
+                    sheet_name: Optional[str] = None) -> pd.DataFrame:
+        """
+        명단 파일 전체 읽기 (확장자로 Excel/CSV 구분)
+        
+        Args:
+            file: 파일 경로 또는 파일 객체
+            filename: 파일 이름 (file이 파일 객체일 때 형식 판별용)
+            sheet_name: 읽을 Excel 시트 (기본값: 첫 번째 시트, CSV는 무시)
+        """
+        filename = filename or (file if isinstance(file, str) else None)
+        if not ExcelParser.is_csv(filename):
+            return pd.read_excel(file, sheet_name=sheet_name if sheet_name is not None else 0)
+        
+        encoding, separator = ExcelParser._sniff_csv(file, filename)
+        try:
+            import pyarrow  # noqa: F401  (설치되어 있으면 더 빠른 엔진 사용)
+            engine = 'pyarrow'
+        except ImportError:
+            engine = 'c'
+        return pd.read_csv(file, sep=separator, encoding=encoding, engine=engine)
+    
+    @staticmethod
+    def iter_file_chunks(file: Union[str, BinaryIO], filename: Optional[str] = None,
+                         chunk_size: int = 1000) -> Iterator[Tuple[str, pd.DataFrame]]:
+        """명단 파일을 묶음 단위로 읽기 (확장자로 Excel/CSV 구분)"""
+        filename = filename or (file if isinstance(file, str) else None)
+        if ExcelParser.is_csv(filename):
+            return ExcelParser.iter_csv_chunks(file, filename, chunk_size=chunk_size)
+        return ExcelParser.iter_excel_chunks(file, chunk_size=chunk_size)
+    
+    @staticmethod
+    def iter_csv_chunks(file: Union[str, BinaryIO], filename: Optional[str] = None,
+                        chunk_size: int = 1000) -> Iterator[Tuple[str, pd.DataFrame]]:
+        """
+        CSV/TSV 파일을 묶음 단위로 읽기 (pandas C 엔진)
+        
+        Yields:
+            (파일 이름, DataFrame) - DataFrame의 인덱스는 행 번호 - 2
+        """
+        filename = filename or (file if isinstance(file, str) else None)
+        encoding, separator = ExcelParser._sniff_csv(file, filename)
+        sheet_name = Path(filename).name if filename else 'CSV'
+        
+        with pd.read_csv(file, sep=separator, encoding=encoding, engine='c',
+                         chunksize=chunk_size) as reader:
+            for chunk in reader:
+                yield sheet_name, chunk
+    
+    @staticmethod
+    def detect_encoding(sample: bytes) -> str:
+        """
+        텍스트 인코딩 감지 (UTF-8 또는 CP949/EUC-KR)
+        
+        학교/NEIS에서 내려받은 CSV는 CP949인 경우가 많다.
+        """
+        if sample.startswith(b'\xef\xbb\xbf'):
+            return 'utf-8-sig'
+        try:
+            sample.decode('utf-8')
+            return 'utf-8'
+        except UnicodeDecodeError as e:
+            # 샘플 끝에서 잘린 멀티바이트 문자는 무시
+            if e.start >= len(sample) - 3 and e.reason == 'unexpected end of data':
+                return 'utf-8'
+        return 'cp949'
+    
+    @staticmethod
+    def _sniff_csv(file: Union[str, BinaryIO], filename: Optional[str]) -> Tuple[str, str]:
+        """CSV 인코딩과 구분자 추정 (파일 객체는 읽은 뒤 처음으로 되돌림)"""
+        if isinstance(file, str):
+            with open(file, 'rb') as f:
+                sample = f.read(ExcelParser.ENCODING_SAMPLE_SIZE)
+        else:
+            position = file.tell()
+            sample = file.read(ExcelParser.ENCODING_SAMPLE_SIZE)
+            file.seek(position)
+        
+        encoding = ExcelParser.detect_encoding(sample)
+        separator = ExcelParser.CSV_SEPARATORS.get(Path(filename).suffix.lower()) if filename else None
+        if separator is None:
+            first_line = sample.decode(encoding, errors='ignore').splitlines()[0] if sample else ''
+            separator = max([',', '\t', ';'], key=first_line.count)
+        return encoding, separator
+    
+    @staticmethod
+    def parse_dataframe(df: pd.DataFrame, with_profile: bool = False) -> Tuple:
+        """
+        DataFrame 파싱 (행 단위 반복 없이 컬럼 단위로 변환)
+        
+        Args:
+            df: 학생 명단 DataFrame (첫 행이 헤더)
+            with_profile: True면 컬럼 프로파일도 반환
+            
+        Returns:
+            (학생 데이터 리스트, 커스텀 컬럼 리스트, 필드 정의 리스트, 오류 DataFrame[, 컬럼 프로파일])
+        """
+        # 컬럼명 정리 (공백 제거)
+        df = df.copy()
+        df.columns = df.columns.astype(str).str.strip()
+        
+        # 필수 컬럼 확인
+        missing_cols = [col for col in ExcelParser.REQUIRED_COLUMNS 
+                       if col not in df.columns]
+        if missing_cols:
+            raise ValueError(f"필수 컬럼이 없습니다: {', '.join(missing_cols)}")
+        
+        # 커스텀 컬럼 추출
+        all_standard_cols = ExcelParser.REQUIRED_COLUMNS + ExcelParser.OPTIONAL_COLUMNS
+        custom_columns = [col for col in df.columns if col not in all_standard_cols]
+        logger.info(f"커스텀 컬럼: {custom_columns}")
+        
+        # 컬럼 프로파일 → 필드 정의 자동 생성
+        profile = ExcelParser.profile_columns(df)
+        field_definitions = ExcelParser._generate_field_definitions(profile, custom_columns)
+        
+        # 데이터 변환
+        students, errors = ExcelParser._parse_columns(df, custom_columns)
+        
+        if len(errors):
+            logger.warning(f"{errors['row'].nunique()}개 행 파싱 오류")
+        logger.info(f"총 {len(students)}명의 학생 데이터 파싱 완료")
+        if with_profile:
+            return students, custom_columns, field_definitions, errors, profile
+        return students, custom_columns, field_definitions, errors
+    
+    @staticmethod
+    def _parse_columns(df: pd.DataFrame, custom_columns: List[str]) -> Tuple[List[Dict], pd.DataFrame]:
+        """
+        컬럼 단위 학생 데이터 변환
+        
+        Returns:
+            (학생 데이터 리스트, 오류 DataFrame)
+        """
+        excel_rows = df.index.to_series() + 2  # 헤더 포함 엑셀 행 번호
+        error_frames = []
+        invalid = pd.Series(False, index=df.index)
+        
+        def integer_column(col: str, required: bool) -> pd.Series:
+            """정수 컬럼 변환 (변환 불가 행은 오류로 기록)"""
+            raw = df[col]
+            values = pd.to_numeric(raw, errors='coerce')
+            bad = values.isna() | (values % 1 != 0)
+            if not required:
+                bad &= raw.notna()
+            if bad.any():
+                error_frames.append(pd.DataFrame({
+                    'row': excel_rows[bad], 'column': col, 'value': raw[bad].astype(str),
+                    'error': f"{col}이(가) 정수가 아닙니다"
+                }))
+            nonlocal invalid
+            invalid |= bad
+            return values.where(~bad).astype('Int64')
+        
+        grades = integer_column('학년', required=True)
+        classes = integer_column('반', required=False) if '반' in df.columns else None
+        numbers = integer_column('번호', required=False) if '번호' in df.columns else None
+        
         # 성별 정규화
-        gender_raw = str(row['성별']).strip()
-        gender = ExcelParser.GENDER_MAPPING.get(gender_raw, gender_raw)
+        genders = df['성별'].astype(str).str.strip()
+        genders = genders.map(ExcelParser.GENDER_MAPPING).fillna(genders)
+        names = df['이름'].where(df['이름'].notna(), '').astype(str).str.strip()
         
-        student_data = {
-            'grade': int(row['학년']),
-            'name': str(row['이름']).strip(),
-            'gender': gender,
-            'custom_fields': {}
-        }
+        # 커스텀 필드: 컬럼별로 타입 변환 후 결측값은 None
+        custom_values = [ExcelParser._convert_custom_column(df[col]) for col in custom_columns]
         
-        # 선택 필드
-        if '반' in row.index and pd.notna(row['반']):
-            student_data['original_class'] = int(row['반'])
+        valid = ~invalid
+        columns = [
+            grades[valid].tolist(),
+            names[valid].tolist(),
+            genders[valid].tolist(),
+            classes[valid].tolist() if classes is not None else [None] * int(valid.sum()),
+            numbers[valid].tolist() if numbers is not None else [None] * int(valid.sum()),
+            [values[valid.to_numpy()] for values in custom_values],
+        ]
         
-        if '번호' in row.index and pd.notna(row['번호']):
-            student_data['number'] = int(row['번호'])
+        students = []
+        custom_rows = zip(*columns[5]) if custom_columns else ((),) * int(valid.sum())
+        for grade, name, gender, original_class, number, custom_row in zip(*columns[:5], custom_rows):
+            student_data = {
+                'grade': int(grade),
+                'name': name,
+                'gender': gender,
+                'custom_fields': {col: value for col, value in zip(custom_columns, custom_row)
+                                  if value is not None}
+            }
+            # 선택 필드
+            if original_class is not None and original_class is not pd.NA:
+                student_data['original_class'] = int(original_class)
+            if number is not None and number is not pd.NA:
+                student_data['number'] = int(number)
+            students.append(student_data)
         
-        # 커스텀 필드 추가
-        for col in custom_columns:
-            value = row[col]
-            if pd.notna(value):
-                # 타입 변환
-                if isinstance(value, (int, float)):
-                    student_data['custom_fields'][col] = float(value) if '.' in str(value) else int(value)
-                elif isinstance(value, bool):
-                    student_data['custom_fields'][col] = value
-                else:
-                    student_data['custom_fields'][col] = str(value).strip()
+        errors = (pd.concat(error_frames, ignore_index=True) if error_frames
+                  else pd.DataFrame(columns=ExcelParser.ERROR_COLUMNS))
+        return students, errors.sort_values('row', kind='stable').reset_index(drop=True)
+    
+    @staticmethod
+    def _convert_custom_column(series: pd.Series) -> np.ndarray:
+        """커스텀 컬럼 타입 변환 (정수/실수/불리언/문자열, 결측값은 None)"""
+        missing = series.isna().to_numpy()
+        
+        if pd.api.types.is_bool_dtype(series):
+            values = series.astype(object)
+        elif pd.api.types.is_numeric_dtype(series):
+            # 정수로 표현 가능한 값은 정수로
+            integral = (series % 1 == 0) | series.isna()
+            values = series.astype(object)
+            if integral.all():
+                values = series.astype('Int64').astype(object)
+        else:
+            # 문자열은 공백 제거, 문자열이 아닌 값(숫자 등)은 그대로
+            try:
+                stripped = series.str.strip()
+                values = stripped.where(stripped.notna(), series)
+            except AttributeError:
+                values = series
+        
+        result = values.to_numpy(dtype=object)
+        result[missing] = None
+        return result
+    
+    @staticmethod
+    def iter_excel_chunks(file: Union[str, BinaryIO], chunk_size: int = 1000,
+                          sheet_names: Optional[List[str]] = None) -> Iterator[Tuple[str, pd.DataFrame]]:
+        """
+        Excel 파일을 행 묶음 단위로 읽기 (openpyxl 읽기 전용 모드, 메모리 사용량 일정)
+        
+        Args:
+            file: Excel 파일 경로 또는 파일 객체
+            chunk_size: 묶음당 행 수
+            sheet_names: 읽을 시트 목록 (기본값: 모든 시트)
+            
+        Yields:
+            (시트 이름, DataFrame) - DataFrame의 인덱스는 엑셀 행 번호 - 2
+        """
+        workbook = load_workbook(file, read_only=True, data_only=True)
+        try:
+            for sheet_name in sheet_names or workbook.sheetnames:
+                rows = workbook[sheet_name].iter_rows(values_only=True)
+                
+                # 첫 번째 비어있지 않은 행을 헤더로 사용
+                header = None
+                header_row = 0
+                for header_row, row in enumerate(rows, 1):
+                    if any(cell is not None for cell in row):
+                        header = [str(cell).strip() if cell is not None else f"_열{i + 1}"
+                                  for i, cell in enumerate(row)]
+                        break
+                if header is None:
+                    continue
+                
+                buffer, index = [], []
+                for excel_row, row in enumerate(rows, header_row + 1):
+                    if all(cell is None for cell in row):
+                        continue
+                    # 헤더 길이에 맞추기
+                    row = tuple(row[:len(header)]) + (None,) * (len(header) - len(row))
+                    buffer.append(row)
+                    index.append(excel_row - 2)
+                    
+                    if len(buffer) >= chunk_size:
+                        yield sheet_name, pd.DataFrame(buffer, columns=header, index=index)
+                        buffer, index = [], []
+                
+                if buffer:
+                    yield sheet_name, pd.DataFrame(buffer, columns=header, index=index)
+        finally:
+            workbook.close()
+    
+    @staticmethod
+    def merge_field_definitions(base: List[Dict], other: List[Dict]) -> List[Dict]:
+        """
+        필드 정의 병합 (묶음/시트/파일별로 추론한 정의를 하나로)
         
-        return student_data
+        - 숫자 필드: 최소/최대 범위 확장
+        - 선택 필드: 선택지 합집합 (10개 초과 시 text), 인코딩 재추론
+        - 타입이 다르면 더 일반적인 타입 (number/boolean < select < text)
+        """
+        generality = {"boolean": 0, "number": 0, "select": 1, "text": 2}
+        merged = {d["name"]: dict(d) for d in base}
+        
+        for definition in other:
+            name = definition["name"]
+            if name not in merged:
+                merged[name] = dict(definition)
+                continue
+            
+            current = merged[name]
+            if current.get("type") == definition.get("type") == "number":
+                current["min"] = min(current.get("min", definition.get("min")), definition.get("min", current.get("min")))
+                current["max"] = max(current.get("max", definition.get("max")), definition.get("max", current.get("max")))
+                continue
+            if current.get("type") == definition.get("type") and current.get("type") in ("boolean", "text"):
+                continue
+            
+            options = list(dict.fromkeys(
+                [str(v) for v in current.get("options", [])] + [str(v) for v in definition.get("options", [])]
+            ))
+            general_type = max(current.get("type", "text"), definition.get("type", "text"),
+                               key=lambda t: generality.get(t, 2))
+            for key in ("options", "encoding", "levels", "categories", "min", "max"):
+                current.pop(key, None)
+            
+            if general_type == "text" or len(options) > ExcelParser.SELECT_MAX_OPTIONS:
+                current["type"] = "text"
+            else:
+                current["type"] = "select"
+                current["options"] = options
+                current.update(infer_field_encoding(options))
+        
+        return list(merged.values())
+    
+    @staticmethod
+    def profile_columns(df: pd.DataFrame) -> Dict[str, Dict[str, Any]]:
+        """
+        컬럼 프로파일 (모든 컬럼의 통계를 한 번에 계산)
+        
+        Returns:
+            {컬럼명: {"dtype", "rows", "count", "nulls", "null_rate", "distinct",
+                      "numeric_count", "numeric_ratio", "min", "max", "top_values"}}
+            - dtype: number / mixed(대부분 숫자) / boolean / string / empty
+            - top_values: [[값, 개수], ...] 빈도순 상위 PROFILE_TOP_VALUES개
+        """
+        # 공백만 있는 칸도 결측값으로
+        frame = df.replace(r'^\s*$', np.nan, regex=True)
+        present = frame.notna()
+        rows = len(frame)
+        
+        counts = present.sum()
+        numeric = frame.apply(pd.to_numeric, errors='coerce')
+        numeric_counts = numeric.notna().sum()
+        minimums, maximums = numeric.min(), numeric.max()
+        # 문자열로 맞춰서 고유값 계산 (1과 '1'은 같은 값)
+        labels = frame.astype(str).apply(lambda column: column.str.strip()).where(present)
+        distinct = labels.nunique()
+        
+        profile = {}
+        for col in frame.columns:
+            count = int(counts[col])
+            numeric_count = int(numeric_counts[col])
+            inferred = pd.api.types.infer_dtype(frame[col], skipna=True)
+            
+            if count == 0:
+                dtype = "empty"
+            elif inferred == "boolean":
+                dtype = "boolean"
+            elif numeric_count == count:
+                dtype = "number"
+            elif numeric_count >= count * ExcelParser.NUMERIC_MIN_RATIO:
+                dtype = "mixed"
+            else:
+                dtype = "string"
+            
+            # 숫자 컬럼은 숫자 값 기준, 그 외는 문자열 기준 빈도
+            values = numeric[col] if dtype == "number" else labels[col]
+            top = values.value_counts().head(ExcelParser.PROFILE_TOP_VALUES)
+            
+            profile[str(col)] = {
+                "dtype": dtype,
+                "rows": rows,
+                "count": count,
+                "nulls": rows - count,
+                "null_rate": round((rows - count) / rows, 4) if rows else 0.0,
+                "distinct": int(distinct[col]),
+                "numeric_count": numeric_count,
+                "numeric_ratio": round(numeric_count / count, 4) if count else 0.0,
+                "min": _json_scalar(minimums[col]) if numeric_count else None,
+                "max": _json_scalar(maximums[col]) if numeric_count else None,
+                "top_values": [[_json_scalar(value), int(n)] for value, n in top.items()]
+            }
+        
+        return profile
+    
+    @staticmethod
+    def merge_column_profiles(base: Dict[str, Dict], other: Dict[str, Dict]) -> Dict[str, Dict]:
+        """
+        컬럼 프로파일 병합 (묶음/시트/파일별 프로파일을 하나로)
+        
+        고유값 수는 양쪽 모두 상위 값 목록에 전부 들어있을 때만 정확하고, 그 외에는 하한값이다.
+        """
+        merged = {name: dict(column) for name, column in base.items()}
+        
+        for name, column in other.items():
+            current = merged.get(name)
+            if current is None:
+                merged[name] = dict(column)
+                continue
+            
+            rows = current["rows"] + column["rows"]
+            count = current["count"] + column["count"]
+            numeric_count = current["numeric_count"] + column["numeric_count"]
+            
+            top: Dict[Any, int] = {}
+            for value, n in current["top_values"] + column["top_values"]:
+                top[value] = top.get(value, 0) + n
+            complete = all(c["distinct"] <= len(c["top_values"]) for c in (current, column))
+            
+            if current["dtype"] == column["dtype"] or column["dtype"] == "empty":
+                dtype = current["dtype"]
+            elif current["dtype"] == "empty":
+                dtype = column["dtype"]
+            elif numeric_count == count:
+                dtype = "number"
+            elif numeric_count >= count * ExcelParser.NUMERIC_MIN_RATIO:
+                dtype = "mixed"
+            else:
+                dtype = "string"
+            
+            bounds = [c for c in (current, column) if c["min"] is not None]
+            merged[name] = {
+                "dtype": dtype,
+                "rows": rows,
+                "count": count,
+                "nulls": rows - count,
+                "null_rate": round((rows - count) / rows, 4) if rows else 0.0,
+                "distinct": len(top) if complete else max(current["distinct"], column["distinct"]),
+                "numeric_count": numeric_count,
+                "numeric_ratio": round(numeric_count / count, 4) if count else 0.0,
+                "min": min(c["min"] for c in bounds) if bounds else None,
+                "max": max(c["max"] for c in bounds) if bounds else None,
+                "top_values": [[value, n] for value, n in sorted(top.items(), key=lambda item: -item[1])]
+                              [:ExcelParser.PROFILE_TOP_VALUES]
+            }
+        
+        return merged
     
     @staticmethod
-    def _generate_field_definitions(df: pd.DataFrame, custom_columns: List[str]) -> List[Dict]:
-        """커스텀 필드 정의 자동 생성"""
+    def _generate_field_definitions(profile: Dict[str, Dict], custom_columns: List[str]) -> List[Dict]:
+        """커스텀 필드 정의 자동 생성 (컬럼 프로파일 기준)"""
         field_definitions = []
         
         for col in custom_columns:
-            # 샘플 데이터로 타입 추론
-            sample_values = df[col].dropna().head(10)
-            
-            if len(sample_values) == 0:
+            column = profile[col]
+            if column["count"] == 0:
                 continue
             
             field_def = {
@@ -131,24 +542,24 @@ class ExcelParser:
                 "required": False
             }
             
-            # 타입 추론
-            first_value = sample_values.iloc[0]
-            
-            if isinstance(first_value, bool):
+            if column["dtype"] == "boolean":
                 field_def["type"] = "boolean"
-            elif isinstance(first_value, (int, float)):
+                field_def["encoding"] = "boolean"
+            elif column["dtype"] in ("number", "mixed"):
+                # 대부분 숫자인 컬럼도 숫자로 (숫자가 아닌 값은 규칙 평가 시 결측값)
                 field_def["type"] = "number"
-                # 범위 추정
-                field_def["min"] = float(sample_values.min())
-                field_def["max"] = float(sample_values.max())
-            else:
+                field_def["encoding"] = "numeric"
+                field_def["min"] = float(column["min"])
+                field_def["max"] = float(column["max"])
+            elif column["distinct"] <= ExcelParser.SELECT_MAX_OPTIONS:
                 # 문자열 - 선택지가 적으면 select, 많으면 text
-                unique_values = df[col].dropna().unique()
-                if len(unique_values) <= 10:
-                    field_def["type"] = "select"
-                    field_def["options"] = [str(v) for v in unique_values]
-                else:
-                    field_def["type"] = "text"
+                options = [str(value) for value, _ in column["top_values"]]
+                field_def["type"] = "select"
+                field_def["options"] = options
+                # 규칙 엔진용 인코딩 (상/중/하 → 순서형, 예/아니오 → 참거짓, 그 외 → 원-핫)
+                field_def.update(infer_field_encoding(options))
+            else:
+                field_def["type"] = "text"
             
             field_definitions.append(field_def)
         
@@ -160,18 +571,27 @@ class ExcelParser:
         errors = []
         
         for idx, student in enumerate(students, 1):
-            # 이름 확인
-            if not student.get('name') or student['name'].strip() == '':
-                errors.append(f"행 {idx}: 이름이 비어있습니다")
-            
-            # 성별 확인
-            if student.get('gender') not in ['남', '여']:
-                errors.append(f"행 {idx}: 성별이 올바르지 않습니다 ({student.get('gender')})")
-            
-            # 학년 확인
-            grade = student.get('grade')
-            if not grade or grade < 1 or grade > 6:
-                errors.append(f"행 {idx}: 학년이 올바르지 않습니다 ({grade})")
+            errors.extend(f"행 {idx}: {message}" for message in ExcelParser.validate_student(student))
+        
+        return errors
+    
+    @staticmethod
+    def validate_student(student: Dict) -> List[str]:
+        """학생 한 명의 데이터 검증 (오류 메시지 목록)"""
+        errors = []
+        
+        # 이름 확인
+        if not student.get('name') or student['name'].strip() == '':
+            errors.append("이름이 비어있습니다")
+        
+        # 성별 확인
+        if student.get('gender') not in ['남', '여']:
+            errors.append(f"성별이 올바르지 않습니다 ({student.get('gender')})")
+        
+        # 학년 확인
+        grade = student.get('grade')
+        if not grade or grade < 1 or grade > 6:
+            errors.append(f"학년이 올바르지 않습니다 ({grade})")
         
         return errors
     
@@ -199,4 +619,120 @@ class ExcelParser:
         df = pd.DataFrame(rows)
         df.to_excel(output_path, index=False)
         logger.info(f"Excel 파일 저장 완료: {output_path}")
+    
+    @staticmethod
+    def write_assignment_workbook(output: Union[str, BinaryIO], assignment_info: Dict[str, Any],
+                                  rows: Iterable[Dict], custom_columns: List[str]):
+        """
+        반편성 결과를 Excel로 쓰기 (openpyxl 쓰기 전용 모드, 메모리 사용량 일정)
+        
+        반 시트는 다음 반으로 넘어가는 즉시 zip 항목으로 내보내므로,
+        output이 스트림이면 첫 반을 다 쓴 시점부터 바이트가 나간다.
+        (요약 시트와 통합 문서 정보는 마지막에 씀, STREAMING_SUPPORTED가 아니면 전부 마지막에 씀)
+        
+        Args:
+            output: 저장할 파일 경로 또는 파일 객체 (seek 불가능해도 됨)
+            assignment_info: {"name", "grade", "year", "num_classes", "total_score"}
+            rows: 배정 반 순서로 정렬된 학생 행
+                  ({"assigned_class", "grade", "original_class", "number", "name", "gender", "custom_fields"})
+            custom_columns: 내보낼 커스텀 필드
+        """
+        workbook = Workbook(write_only=True)
+        workbook.properties.modified = datetime.utcnow()
+        writer = None
+        if STREAMING_SUPPORTED:
+            writer = _StreamingExcelWriter(workbook, ZipFile(output, 'w', ZIP_DEFLATED, allowZip64=True))
+        
+        # 요약 시트는 맨 앞에 만들고 내용은 마지막에 채움
+        summary_sheet = workbook.create_sheet('요약')
+        header = ['새 반', '새 번호', '학년', '이전 반', '이전 번호', '이름', '성별'] + custom_columns
+        
+        class_sheet = None
+        current_class = None
+        class_stats: Dict[int, Dict[str, int]] = {}
+        
+        for row in rows:
+            if row['assigned_class'] != current_class:
+                if class_sheet is not None and writer is not None:
+                    writer.stream_worksheet(class_sheet)
+                current_class = row['assigned_class']
+                class_sheet = workbook.create_sheet(f'{current_class}반')
+                class_sheet.append(header)
+                class_stats[current_class] = {'total': 0, '남': 0, '여': 0}
+            
+            stats = class_stats[current_class]
+            stats['total'] += 1
+            stats[row['gender']] = stats.get(row['gender'], 0) + 1
+            
+            custom_fields = row.get('custom_fields') or {}
+            class_sheet.append([
+                current_class, stats['total'], row['grade'], row.get('original_class'),
+                row.get('number'), row['name'], row['gender']
+            ] + [ExcelParser._cell_value(custom_fields.get(col)) for col in custom_columns])
+        
+        summary_sheet.append(['반편성', assignment_info.get('name')])
+        summary_sheet.append(['학년도', assignment_info.get('year')])
+        summary_sheet.append(['학년', assignment_info.get('grade')])
+        summary_sheet.append(['반 개수', assignment_info.get('num_classes')])
+        summary_sheet.append(['총점', assignment_info.get('total_score')])
+        summary_sheet.append([])
+        summary_sheet.append(['반', '인원', '남', '여'])
+        for class_num, stats in class_stats.items():
+            summary_sheet.append([f'{class_num}반', stats['total'], stats['남'], stats['여']])
+        summary_sheet.append(['합계', sum(s['total'] for s in class_stats.values()),
+                              sum(s['남'] for s in class_stats.values()),
+                              sum(s['여'] for s in class_stats.values())])
+        
+        if writer is not None:
+            writer.save()
+        else:
+            workbook.save(output)
+        logger.info(f"반편성 Excel 생성 완료: {len(class_stats)}개 반")
+    
+    @staticmethod
+    def _cell_value(value: Any) -> Any:
+        """Excel 셀에 쓸 수 있는 값으로 변환 (리스트/딕셔너리는 문자열)"""
+        if value is None or isinstance(value, (str, int, float, bool)):
+            return value
+        return str(value)
+
+
+class _StreamingExcelWriter(ExcelWriter):
+    """
+    다 쓴 시트를 저장 전에 바로 zip에 쓰는 ExcelWriter (쓰기 전용 통합 문서용)
+    
+    openpyxl은 시트마다 임시 파일에 쓰고 save()에서 한꺼번에 zip을 만든다.
+    stream_worksheet()로 먼저 쓴 시트는 save() 때 목록/관계 정보만 추가한다.
+    (openpyxl 3.1 ExcelWriter.write_worksheet 기준)
+    """
+    
+    def __init__(self, workbook: Workbook, archive: ZipFile):
+        super().__init__(workbook, archive)
+        self._streamed = set()
+    
+    def stream_worksheet(self, ws) -> None:
+        """시트를 닫고 zip 항목으로 쓴 뒤 임시 파일 삭제"""
+        ws._id = self.workbook.worksheets.index(ws) + 1  # save()에서 매기는 번호와 같음
+        ws.close()
+        self._archive.write(ws._writer.out, ws.path[1:])
+        ws._writer.cleanup()
+        self._archive.fp.flush()
+        self._streamed.add(id(ws))
+    
+    def write_worksheet(self, ws):
+        if id(ws) not in self._streamed:
+            return super().write_worksheet(ws)
+        ws._drawing = SpreadsheetDrawing()
+        ws._drawing.charts = ws._charts
+        ws._drawing.images = ws._images
+        ws._rels = ws._writer._rels
+        self.manifest.append(ws)
+
 
+def _json_scalar(value: Any) -> Any:
+    """numpy 값 → JSON 저장 가능한 파이썬 값 (정수로 표현 가능한 실수는 정수로)"""
+    if hasattr(value, 'item'):
+        value = value.item()
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
@@ -0,0 +1,171 @@
+"""
+학년별 학생 특성 저장소 (DATA_DIR/features, 메모리 매핑 .npy)
+
+인코딩된 특성(실수 배열, 범주 코드, 성별, 참조 인덱스 쌍, 학생 ID)을
+(학교, 학년)별로 저장하고 np.load(mmap_mode='r')로 읽는다.
+여러 프로세스가 같은 파일을 열면 OS 페이지 캐시의 한 사본을 공유한다.
+
+파일 구성 (school_{학교 ID} 디렉터리):
+- grade_{학년}.json: 목록 파일 (필드별 인코딩, 범주, 배열 파일 이름)
+- grade_{학년}-{빌드 토큰}-*.npy: 배열
+
+학교 데이터가 바뀌면 invalidate()로 목록 파일을 지운다.
+배열 파일은 매번 새 이름으로 쓰므로 다른 프로세스가 열어둔 파일을 덮어쓰지 않는다.
+(열려 있어 지우지 못한 이전 파일은 다음 저장 때 다시 정리)
+"""
+from typing import Dict, Any, Optional
+from pathlib import Path
+from datetime import datetime
+import json
+import os
+import uuid
+import logging
+import numpy as np
+
+from ..core.config import settings
+from ..engine.field_encoder import EncodedFeatures
+
+logger = logging.getLogger(__name__)
+
+# 목록 파일 형식 버전 (바뀌면 이전 파일은 무시하고 다시 생성)
+FEATURE_FORMAT = 1
+
+
+def school_dir(school_id: int) -> Path:
+    """학교별 특성 디렉터리"""
+    return Path(settings.DATA_DIR) / "features" / f"school_{school_id}"
+
+
+def _manifest_path(school_id: int, grade: int) -> Path:
+    return school_dir(school_id) / f"grade_{grade}.json"
+
+
+def load_features(school_id: int, grade: int) -> Optional[EncodedFeatures]:
+    """
+    저장된 특성 읽기 (배열은 읽기 전용 메모리 매핑)
+
+    Returns:
+        없거나 형식이 다르거나 파일이 손상되었으면 None
+    """
+    manifest_path = _manifest_path(school_id, grade)
+    try:
+        manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+        if manifest.get("format") != FEATURE_FORMAT:
+            return None
+
+        directory = manifest_path.parent
+
+        def open_array(name: str) -> np.ndarray:
+            return np.load(directory / name, mmap_mode="r", allow_pickle=False)
+
+        features = EncodedFeatures(student_ids=open_array(manifest["student_ids"]))
+        for entry in manifest["fields"]:
+            field = entry["name"]
+            features.encodings[field] = entry["encoding"]
+            if "numeric" in entry:
+                features.numeric[field] = open_array(entry["numeric"])
+            if "codes" in entry:
+                features.codes[field] = (open_array(entry["codes"]), list(entry["categories"]))
+            if "relations" in entry:
+                features.relations[field] = open_array(entry["relations"])
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, KeyError) as e:
+        logger.warning(f"특성 파일을 읽을 수 없음 (학교 {school_id}, {grade}학년): {e}")
+        return None
+
+    return features
+
+
+def write_features(school_id: int, grade: int, features: EncodedFeatures) -> Path:
+    """
+    특성 배열과 임시 목록 파일 쓰기 (publish_features를 호출해야 사용됨)
+
+    Returns:
+        임시 목록 파일 경로
+    """
+    directory = school_dir(school_id)
+    directory.mkdir(parents=True, exist_ok=True)
+    prefix = f"grade_{grade}-{uuid.uuid4().hex[:12]}"
+
+    def save_array(name: str, array: np.ndarray) -> str:
+        file_name = f"{prefix}-{name}.npy"
+        np.save(directory / file_name, np.ascontiguousarray(array), allow_pickle=False)
+        return file_name
+
+    fields = []
+    for i, (field, encoding) in enumerate(features.encodings.items()):
+        entry: Dict[str, Any] = {"name": field, "encoding": encoding}
+        if field in features.numeric:
+            entry["numeric"] = save_array(f"n{i}", features.numeric[field])
+        if field in features.codes:
+            codes, categories = features.codes[field]
+            entry["codes"] = save_array(f"c{i}", codes)
+            entry["categories"] = list(categories)
+        if field in features.relations:
+            entry["relations"] = save_array(f"r{i}", features.relations[field])
+        fields.append(entry)
+
+    manifest = {
+        "format": FEATURE_FORMAT,
+        "school_id": school_id,
+        "grade": grade,
+        "count": int(len(features.student_ids)),
+        "built_at": datetime.now().isoformat(),
+        "student_ids": save_array("ids", features.student_ids),
+        "fields": fields
+    }
+    staged = directory / f"{prefix}.json.tmp"
+    staged.write_text(json.dumps(manifest, ensure_ascii=False), encoding="utf-8")
+    return staged
+
+
+def publish_features(staged: Path, school_id: int, grade: int) -> None:
+    """임시 목록 파일을 현재 목록으로 교체하고 이전 배열 파일 정리"""
+    manifest_path = _manifest_path(school_id, grade)
+    os.replace(staged, manifest_path)
+
+    current = staged.name[:-len(".json.tmp")]
+    for path in school_dir(school_id).glob(f"grade_{grade}-*.npy"):
+        if not path.name.startswith(current + "-"):
+            _remove(path)
+    logger.info(f"특성 저장: 학교 {school_id}, {grade}학년 ({manifest_path})")
+
+
+def discard_features(staged: Path) -> None:
+    """사용하지 않게 된 임시 목록 파일과 배열 삭제"""
+    prefix = staged.name[:-len(".json.tmp")]
+    for path in staged.parent.glob(f"{prefix}-*.npy"):
+        _remove(path)
+    _remove(staged)
+
+
+def invalidate(school_id: int) -> None:
+    """학교의 저장된 특성 무효화 (목록 파일 삭제, 배열 파일은 가능한 만큼 삭제)"""
+    directory = school_dir(school_id)
+    if not directory.exists():
+        return
+    for path in directory.glob("grade_*.json"):
+        _remove(path)
+    for path in directory.glob("grade_*.npy"):
+        _remove(path)
+
+
+def invalidate_all() -> None:
+    """모든 학교의 저장된 특성 무효화 (DB 복구 후 호출)"""
+    root = Path(settings.DATA_DIR) / "features"
+    if not root.exists():
+        return
+    for directory in root.glob("school_*"):
+        for path in list(directory.glob("grade_*.json")) + list(directory.glob("grade_*.npy")):
+            _remove(path)
+
+
+def _remove(path: Path) -> None:
+    """파일 삭제 (다른 프로세스가 메모리 매핑 중이라 지울 수 없으면 무시)"""
+    try:
+        path.unlink()
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        logger.debug(f"파일 삭제 실패 (사용 중): {path} ({e})")
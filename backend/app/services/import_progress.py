@@ -0,0 +1,48 @@
+"""
+임포트 진행 상황 저장소 (프로세스 내 메모리)
+
+업로드 요청과 별도로 GET 요청으로 진행률을 조회할 수 있도록 작업 ID별로 보관한다.
+"""
+from typing import Dict, Any, Optional
+from datetime import datetime
+import threading
+
+# 보관할 최대 작업 수 (오래된 작업부터 삭제)
+MAX_JOBS = 100
+
+_jobs: Dict[str, Dict[str, Any]] = {}
+_lock = threading.Lock()
+
+
+def start_job(job_id: str, **info) -> None:
+    """작업 시작 등록"""
+    with _lock:
+        if len(_jobs) >= MAX_JOBS:
+            oldest = min(_jobs, key=lambda k: _jobs[k]["updated_at"])
+            _jobs.pop(oldest, None)
+        _jobs[job_id] = {
+            "job_id": job_id,
+            "status": "running",
+            "processed_rows": 0,
+            "imported": 0,
+            "skipped": 0,
+            "updated_at": datetime.utcnow().isoformat(),
+            **info
+        }
+
+
+def update_job(job_id: str, **changes) -> None:
+    """진행 상황 갱신"""
+    with _lock:
+        job = _jobs.get(job_id)
+        if job is None:
+            return
+        job.update(changes)
+        job["updated_at"] = datetime.utcnow().isoformat()
+
+
+def get_job(job_id: str) -> Optional[Dict[str, Any]]:
+    """진행 상황 조회"""
+    with _lock:
+        job = _jobs.get(job_id)
+        return dict(job) if job else None
@@ -0,0 +1,136 @@
+"""
+목록 조회 공통 기능 (커서 기반 페이지네이션, 필드 선택, 정렬)
+
+- 커서: 마지막 행의 (정렬 값, ID)를 인코딩한 문자열. OFFSET 없이 다음 페이지를 조회한다.
+- 정렬: "name" (오름차순), "-name" (내림차순). 같은 값은 ID순으로 정렬한다.
+- NULL은 SQLite 규칙대로 오름차순에서 맨 앞, 내림차순에서 맨 뒤에 온다.
+"""
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from sqlalchemy import Select, and_, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+import base64
+import json
+
+# 페이지당 최대 행 수
+MAX_PAGE_SIZE = 1000
+
+
+def parse_fields(fields: Optional[str], columns: Dict[str, Any], default: List[str]) -> List[str]:
+    """
+    fields 파라미터 ("id,name,gender") → 필드 이름 목록
+    
+    Raises:
+        ValueError: 알 수 없는 필드
+    """
+    if not fields:
+        return list(default)
+    
+    names = list(dict.fromkeys(name.strip() for name in fields.split(',') if name.strip()))
+    unknown = [name for name in names if name not in columns]
+    if unknown:
+        raise ValueError(f"알 수 없는 필드: {', '.join(unknown)} (사용 가능: {', '.join(columns)})")
+    return names
+
+
+def parse_sort(sort: Optional[str], resolve: Callable[[str], Any], default: str) -> Tuple[Any, bool]:
+    """
+    sort 파라미터 → (정렬 식, 내림차순 여부)
+    
+    Args:
+        sort: 정렬 키 ("-"로 시작하면 내림차순)
+        resolve: 정렬 키 → SQL 식 (알 수 없는 키는 ValueError)
+        default: 기본 정렬 키
+    """
+    key = (sort or default).strip()
+    descending = key.startswith('-')
+    return resolve(key.lstrip('-')), descending
+
+
+def encode_cursor(sort_value: Any, row_id: int) -> str:
+    """(정렬 값, ID) → 커서 문자열"""
+    payload = json.dumps([sort_value, row_id], ensure_ascii=False, default=str)
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[Any, int]:
+    """
+    커서 문자열 → (정렬 값, ID)
+    
+    Raises:
+        ValueError: 잘못된 커서
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded).decode('utf-8'))
+        return sort_value, int(row_id)
+    except (ValueError, TypeError) as e:
+        raise ValueError("잘못된 커서입니다") from e
+
+
+def _after_cursor(sort_expr: Any, id_column: Any, descending: bool, sort_value: Any, row_id: int):
+    """커서 다음 행 조건 (정렬 값, ID) 기준"""
+    if descending:
+        if sort_value is None:
+            return and_(sort_expr.is_(None), id_column < row_id)
+        return or_(sort_expr < sort_value, and_(sort_expr == sort_value, id_column < row_id),
+                   sort_expr.is_(None))
+    if sort_value is None:
+        return or_(sort_expr.is_not(None), and_(sort_expr.is_(None), id_column > row_id))
+    return or_(sort_expr > sort_value, and_(sort_expr == sort_value, id_column > row_id))
+
+
+async def fetch_list(
+    db: AsyncSession,
+    columns: Dict[str, Any],
+    fields: List[str],
+    conditions: List[Any],
+    sort_expr: Any,
+    descending: bool,
+    id_column: Any,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None
+) -> Any:
+    """
+    목록 조회 (선택한 컬럼만 조회, ORM 객체 생성 없음)
+    
+    Args:
+        db: 비동기 데이터베이스 세션
+        columns: 필드 이름 → 컬럼/식
+        fields: 응답에 포함할 필드
+        conditions: WHERE 조건 목록
+        sort_expr: 정렬 식
+        descending: 내림차순 여부
+        id_column: 동일 값 정렬 및 커서용 고유 컬럼
+        limit: 페이지 크기 (None이면 페이지 없이 전체 목록 반환)
+        cursor: 이전 페이지 응답의 next_cursor
+        
+    Returns:
+        limit가 없으면 행 목록, 있으면 {"items", "total", "limit", "next_cursor"}
+    """
+    order = [sort_expr.desc(), id_column.desc()] if descending else [sort_expr.asc(), id_column.asc()]
+    statement: Select = (
+        select(*[columns[name].label(name) for name in fields],
+               sort_expr.label('_sort_value'), id_column.label('_row_id'))
+        .where(*conditions)
+        .order_by(*order)
+    )
+    
+    if limit is None:
+        return [{name: row._mapping[name] for name in fields} for row in await db.execute(statement)]
+    
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    total = (await db.execute(select(func.count()).select_from(id_column.table).where(*conditions))).scalar_one()
+    
+    if cursor:
+        statement = statement.where(_after_cursor(sort_expr, id_column, descending, *decode_cursor(cursor)))
+    rows = (await db.execute(statement.limit(limit + 1))).all()
+    
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    last = rows[-1]._mapping if rows else None
+    return {
+        "items": [{name: row._mapping[name] for name in fields} for row in rows],
+        "total": total,
+        "limit": limit,
+        "next_cursor": encode_cursor(last['_sort_value'], last['_row_id']) if has_more else None
+    }
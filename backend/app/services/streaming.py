@@ -0,0 +1,94 @@
+"""
+파일 생성 결과를 스트리밍 응답으로 전달하는 유틸리티
+
+파일을 쓰는 함수(write)를 별도 스레드에서 실행하고,
+write()/flush()로 넘어온 바이트를 바로 응답 본문으로 내보낸다 (전체 파일을 메모리/디스크에 모으지 않음).
+첫 바이트가 나가는 시점은 write가 언제 쓰기 시작하는지에 달려 있다.
+"""
+from typing import Callable, Iterator, BinaryIO
+import queue
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 스레드 간 버퍼에 쌓아둘 최대 조각 수
+MAX_PENDING_CHUNKS = 16
+
+_DONE = object()
+
+
+class _Cancelled(Exception):
+    """클라이언트 연결이 끊겨 생성을 중단"""
+
+
+class _QueueWriter:
+    """write()로 받은 바이트를 큐로 전달하는 쓰기 전용 파일 객체 (seek 불가)"""
+
+    def __init__(self, chunks: queue.Queue, cancelled: threading.Event, chunk_size: int):
+        self._chunks = chunks
+        self._cancelled = cancelled
+        self._chunk_size = chunk_size
+        self._buffer = bytearray()
+
+    def write(self, data: bytes) -> int:
+        self._buffer.extend(data)
+        if len(self._buffer) >= self._chunk_size:
+            self.flush()
+        return len(data)
+
+    def flush(self):
+        if self._buffer:
+            self._put(bytes(self._buffer))
+            self._buffer.clear()
+
+    def _put(self, item):
+        while True:
+            if self._cancelled.is_set():
+                raise _Cancelled()
+            try:
+                self._chunks.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+
+def iter_written_bytes(write: Callable[[BinaryIO], None], chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+    """
+    write(파일 객체)가 쓰는 바이트를 조각 단위로 반환하는 반복자
+
+    Args:
+        write: 파일 객체에 내용을 쓰는 함수 (별도 스레드에서 실행)
+        chunk_size: 조각 크기
+    """
+    chunks: queue.Queue = queue.Queue(maxsize=MAX_PENDING_CHUNKS)
+    cancelled = threading.Event()
+    writer = _QueueWriter(chunks, cancelled, chunk_size)
+
+    def run():
+        try:
+            write(writer)
+            writer.flush()
+            writer._put(_DONE)
+        except _Cancelled:
+            logger.info("스트리밍 중단 (연결 종료)")
+        except Exception as e:
+            logger.error(f"스트리밍 파일 생성 오류: {e}")
+            try:
+                writer._put(e)
+            except _Cancelled:
+                pass
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+
+    try:
+        while True:
+            item = chunks.get()
+            if item is _DONE:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        cancelled.set()
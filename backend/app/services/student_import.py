@@ -0,0 +1,483 @@
+"""
+학생 명단 임포트 서비스
+"""
+from typing import List, Dict, Any, Optional, Callable, BinaryIO, Union, Tuple
+from concurrent.futures import ProcessPoolExecutor, wait, as_completed, FIRST_COMPLETED
+from contextlib import ExitStack
+from pathlib import Path
+from datetime import datetime
+import io
+import os
+import shutil
+import tempfile
+import zipfile
+import pandas as pd
+from sqlalchemy import inspect, select, update, bindparam
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+import logging
+
+from ..models.student import Student
+from ..models.school import School
+from .excel_parser import ExcelParser
+
+logger = logging.getLogger(__name__)
+
+# 응답에 포함할 최대 오류 행 수
+MAX_REPORTED_ERRORS = 1000
+
+# 학생 자연키 (같은 학교/학년도/학년/반/번호/이름이면 같은 학생으로 보고 갱신)
+NATURAL_KEY = ('school_id', 'year', 'grade', 'original_class', 'number', 'name')
+
+# 재업로드 시 갱신하는 컬럼
+UPDATE_COLUMNS = ('gender', 'custom_fields')
+
+# 일괄 임포트에서 읽는 명단 파일 확장자 (zip 안의 다른 파일은 무시)
+ROSTER_EXTENSIONS = ('.xlsx', '.xlsm', '.xls', '.csv', '.tsv')
+
+# 이 크기 이상인 통합 문서만 시트별로 나눠 병렬 파싱 (작은 파일은 파일 하나가 작업 하나)
+ROSTER_SPLIT_MIN_BYTES = 8 * 1024 * 1024
+
+# 자연키 유니크 인덱스 (마이그레이션 0004에서 생성)
+NATURAL_KEY_INDEX = 'uq_students_natural_key'
+
+# 자연키 유니크 인덱스 사용 가능 여부 (ON CONFLICT 사용 조건)
+_upsert_supported = True
+
+
+def detect_natural_key_index(engine: Engine) -> bool:
+    """
+    자연키 유니크 인덱스가 있는지 확인 (마이그레이션 적용 후 호출)
+    
+    기존 데이터에 중복된 학생 행이 있으면 마이그레이션이 인덱스를 만들지 않으므로,
+    이 경우 ON CONFLICT 대신 조회 후 갱신 방식으로 동작한다.
+    """
+    global _upsert_supported
+    indexes = inspect(engine).get_indexes(Student.__tablename__)
+    _upsert_supported = any(index['name'] == NATURAL_KEY_INDEX for index in indexes)
+    if not _upsert_supported:
+        logger.warning("학생 자연키 인덱스가 없어 조회 후 갱신 방식으로 저장합니다 (중복 데이터 확인 필요)")
+    return _upsert_supported
+
+
+def store_field_profile(school: School, profile: Dict[str, Dict]) -> None:
+    """
+    컬럼 프로파일을 학교 설정에 저장 (마지막 임포트 기준)
+    
+    규칙 편집기와 반편성 엔진이 학생 데이터를 다시 읽지 않고 필드 통계를 쓸 수 있도록
+    custom_field_definitions와 함께 갱신한다.
+    """
+    school.settings = {
+        **(school.settings or {}),
+        "field_profile": {"updated_at": datetime.now().isoformat(), "columns": profile}
+    }
+
+
+def bulk_upsert_students(db: Session, school_id: int, students_data: List[Dict],
+                         year: int) -> Dict[str, int]:
+    """
+    학생 일괄 저장 (자연키 기준 upsert)
+    
+    Args:
+        db: 데이터베이스 세션 (커밋은 호출자가 수행)
+        school_id: 학교 ID
+        students_data: ExcelParser가 반환한 학생 데이터 리스트
+        year: 학년도
+        
+    Returns:
+        {"inserted": 신규, "updated": 변경, "unchanged": 동일}
+    """
+    # 같은 파일 안의 중복 행은 마지막 행 기준
+    rows: Dict[Tuple, Dict] = {}
+    for student_data in students_data:
+        row = {'school_id': school_id, 'year': year, 'original_class': None, 'number': None,
+               'custom_fields': {}, **student_data}
+        rows[tuple(row[column] for column in NATURAL_KEY)] = row
+    
+    summary = {"inserted": 0, "updated": 0, "unchanged": 0}
+    if not rows:
+        return summary
+    
+    # 기존 학생 한 번에 조회
+    grades = {row['grade'] for row in rows.values()}
+    existing = {
+        tuple(record[:len(NATURAL_KEY)]): record[len(NATURAL_KEY):]
+        for record in db.execute(
+            select(*[Student.__table__.c[column] for column in NATURAL_KEY],
+                   Student.id, Student.gender, Student.custom_fields)
+            .where(Student.school_id == school_id, Student.year == year, Student.grade.in_(grades))
+        )
+    }
+    
+    upserts, updates_by_id = [], []
+    for key, row in rows.items():
+        current = existing.get(key)
+        if current is None:
+            summary["inserted"] += 1
+            upserts.append(row)
+            continue
+        
+        student_id, gender, custom_fields = current
+        if gender == row['gender'] and (custom_fields or {}) == row['custom_fields']:
+            summary["unchanged"] += 1
+            continue
+        
+        summary["updated"] += 1
+        # NULL이 포함된 키는 유니크 인덱스로 충돌이 감지되지 않으므로 ID로 갱신
+        if _upsert_supported and None not in key:
+            upserts.append(row)
+        else:
+            updates_by_id.append({'_id': student_id, **{c: row[c] for c in UPDATE_COLUMNS}})
+    
+    if upserts:
+        if _upsert_supported:
+            statement = sqlite_insert(Student)
+            statement = statement.on_conflict_do_update(
+                index_elements=list(NATURAL_KEY),
+                set_={column: statement.excluded[column] for column in UPDATE_COLUMNS}
+            )
+        else:
+            statement = sqlite_insert(Student)
+        db.execute(statement, upserts)
+    
+    if updates_by_id:
+        db.execute(
+            update(Student.__table__)
+            .where(Student.__table__.c.id == bindparam('_id'))
+            .values({column: bindparam(column) for column in UPDATE_COLUMNS}),
+            updates_by_id
+        )
+    
+    logger.info(f"학생 저장: 신규 {summary['inserted']}, 변경 {summary['updated']}, 동일 {summary['unchanged']}")
+    return summary
+
+
+def import_roster_stream(
+    db: Session,
+    school: School,
+    file: Union[str, BinaryIO],
+    year: int,
+    filename: Optional[str] = None,
+    chunk_size: int = 1000,
+    on_progress: Optional[Callable[[Dict[str, Any]], None]] = None
+) -> Dict[str, Any]:
+    """
+    Excel/CSV 명단을 묶음 단위로 읽어 검증 후 저장 (메모리 사용량은 묶음 크기에 비례)
+    
+    Args:
+        db: 데이터베이스 세션
+        school: 학교
+        file: 파일 경로 또는 파일 객체 (.xlsx, .csv, .tsv)
+        year: 학년도
+        filename: 파일 이름 (형식 판별용)
+        chunk_size: 묶음당 행 수
+        on_progress: 묶음마다 호출되는 진행 상황 콜백
+        
+    Returns:
+        {"count", "inserted", "updated", "unchanged", "chunks", "processed_rows", "sources",
+         "skipped_count", "skipped_rows", "custom_columns", "field_definitions"}
+        - sources: 시트별 {"file", "sheet", "count", "skipped"} (skipped: 시트 전체를 건너뛴 이유)
+    """
+    school_id = school.id
+    summary = {
+        "count": 0,
+        "inserted": 0,
+        "updated": 0,
+        "unchanged": 0,
+        "chunks": 0,
+        "processed_rows": 0,
+        "sources": [],
+        "skipped_count": 0,
+        "skipped_rows": [],
+        "custom_columns": [],
+        "field_definitions": []
+    }
+    profile = {}
+    sources = {}
+    
+    for sheet_name, chunk in ExcelParser.iter_file_chunks(file, filename, chunk_size=chunk_size):
+        source = sources.get(sheet_name)
+        if source is None:
+            source = sources[sheet_name] = {"file": filename, "sheet": sheet_name, "count": 0, "skipped": None}
+            summary["sources"].append(source)
+        if source["skipped"]:
+            continue
+        
+        try:
+            students_data, custom_columns, field_definitions, parse_errors, chunk_profile = ExcelParser.parse_dataframe(
+                chunk, with_profile=True
+            )
+        except ValueError as e:
+            # 안내문 시트 등 명단이 아닌 시트는 통째로 건너뜀 (헤더가 같으므로 나머지 묶음도 동일)
+            source["skipped"] = str(e)
+            logger.info(f"시트 건너뜀 ({sheet_name}): {e}")
+            continue
+        profile = ExcelParser.merge_column_profiles(profile, chunk_profile)
+        
+        # 파싱 오류 행
+        errors = [{"sheet": sheet_name, **error} for error in parse_errors.to_dict(orient="records")]
+        
+        # 검증 (유효한 행만 저장)
+        error_rows = set(parse_errors["row"].tolist())
+        parsed_rows = [row for row in (chunk.index + 2).tolist() if row not in error_rows]
+        valid_students = []
+        for row, student_data in zip(parsed_rows, students_data):
+            messages = ExcelParser.validate_student(student_data)
+            if messages:
+                errors.append({"sheet": sheet_name, "row": row, "column": None,
+                               "value": None, "error": ", ".join(messages)})
+            else:
+                valid_students.append(student_data)
+        
+        summary["custom_columns"] = list(dict.fromkeys(summary["custom_columns"] + custom_columns))
+        summary["field_definitions"] = ExcelParser.merge_field_definitions(
+            summary["field_definitions"], field_definitions
+        )
+        
+        # 커스텀 필드 정의와 컬럼 프로파일도 묶음과 같은 트랜잭션에서 갱신
+        # (이후 묶음이 실패해도 이미 저장된 학생과 필드 정의가 어긋나지 않도록)
+        chunk_summary = bulk_upsert_students(db, school_id, valid_students, year)
+        school.custom_field_definitions = summary["field_definitions"]
+        store_field_profile(school, profile)
+        db.commit()
+        for key, value in chunk_summary.items():
+            summary[key] += value
+        
+        summary["chunks"] += 1
+        summary["count"] += len(valid_students)
+        summary["processed_rows"] += len(chunk)
+        summary["skipped_count"] += len(errors)
+        source["count"] += len(valid_students)
+        room = MAX_REPORTED_ERRORS - len(summary["skipped_rows"])
+        summary["skipped_rows"].extend(errors[:max(room, 0)])
+        
+        logger.info(f"묶음 {summary['chunks']} 저장 ({sheet_name}): 누적 {summary['count']}명")
+        if on_progress:
+            on_progress({
+                "sheet": sheet_name,
+                "chunks": summary["chunks"],
+                "processed_rows": summary["processed_rows"],
+                "imported": summary["count"],
+                "skipped": summary["skipped_count"]
+            })
+    
+    if not summary["chunks"]:
+        raise ValueError("학생 명단이 있는 시트가 없습니다")
+    
+    return summary
+
+
+def expand_roster_sources(files: List[Tuple[str, BinaryIO]], stack: ExitStack,
+                          workers: int = 1) -> List[Tuple[str, BinaryIO, Optional[List[str]]]]:
+    """
+    업로드 파일 → 파싱 작업 목록 (보통 파일마다 작업 하나)
+    
+    zip은 안의 명단 파일로 풀고(임시 파일은 stack이 닫음), Excel은 시트 목록을 한 번만 읽는다.
+    ROSTER_SPLIT_MIN_BYTES 이상인 통합 문서만 시트를 최대 workers개 묶음으로 나눈다.
+    
+    Args:
+        files: (파일 이름, 파일 객체) 리스트
+        stack: zip에서 푼 임시 파일을 등록할 ExitStack
+        workers: 파싱 프로세스 수
+        
+    Returns:
+        (파일 이름, 파일 객체, 시트 이름 목록 또는 None(CSV)) 리스트
+    """
+    tasks = []
+    for filename, handle in files:
+        suffix = Path(filename).suffix.lower()
+        handle.seek(0)
+        if suffix == '.zip':
+            members = []
+            with zipfile.ZipFile(handle) as archive:
+                for info in archive.infolist():
+                    name = Path(info.filename)
+                    if (info.is_dir() or name.suffix.lower() not in ROSTER_EXTENSIONS
+                            or name.name.startswith(('.', '~$'))):
+                        continue
+                    member = stack.enter_context(tempfile.SpooledTemporaryFile(max_size=ROSTER_SPLIT_MIN_BYTES))
+                    with archive.open(info) as source:
+                        shutil.copyfileobj(source, member)
+                    members.append((info.filename, member))
+            tasks.extend(expand_roster_sources(members, stack, workers))
+        elif ExcelParser.is_csv(filename):
+            tasks.append((filename, handle, None))
+        else:
+            with pd.ExcelFile(handle) as workbook:
+                sheets = list(workbook.sheet_names)
+            size = handle.seek(0, io.SEEK_END)
+            groups = min(len(sheets), workers) if size >= ROSTER_SPLIT_MIN_BYTES else 1
+            per_group = -(-len(sheets) // max(groups, 1))  # 시트 순서를 유지하도록 연속된 묶음으로
+            tasks.extend((filename, handle, sheets[i:i + per_group])
+                         for i in range(0, len(sheets), max(per_group, 1)))
+    return tasks
+
+
+def parse_roster_file(filename: str, content: Union[bytes, BinaryIO],
+                      sheets: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """
+    파일 하나의 시트들(CSV는 파일 전체) 파싱 (프로세스 풀 작업자에서도 실행)
+    
+    통합 문서는 한 번만 열고 지정한 시트를 차례로 읽는다.
+    
+    Returns:
+        시트별 parse_roster_frame 결과 리스트
+    """
+    handle = io.BytesIO(content) if isinstance(content, bytes) else content
+    handle.seek(0)
+    if sheets is None:
+        return [parse_roster_frame(filename, None, ExcelParser.read_roster(handle, filename))]
+    with pd.ExcelFile(handle) as workbook:
+        return [
+            parse_roster_frame(filename, sheet, ExcelParser.read_roster(workbook, filename, sheet))
+            for sheet in sheets
+        ]
+
+
+def parse_roster_frame(filename: str, sheet_name: Optional[str], df: pd.DataFrame) -> Dict[str, Any]:
+    """
+    시트 하나(CSV는 파일 하나)의 DataFrame 파싱
+    
+    Returns:
+        {"file", "sheet", "students", "rows", "custom_columns", "field_definitions", "profile",
+         "errors", "skipped"}
+        - rows: 학생별 원래 행 번호
+        - skipped: 필수 컬럼이 없는 등 시트 전체를 건너뛴 이유 (없으면 None)
+    """
+    result = {"file": filename, "sheet": sheet_name, "students": [], "rows": [],
+              "custom_columns": [], "field_definitions": [], "profile": {}, "errors": [], "skipped": None}
+    
+    df = df.dropna(how='all')
+    if df.empty:
+        result["skipped"] = "빈 시트"
+        return result
+    
+    try:
+        students, custom_columns, field_definitions, errors, profile = ExcelParser.parse_dataframe(
+            df, with_profile=True
+        )
+    except ValueError as e:
+        # 안내문 시트 등 명단이 아닌 시트
+        result["skipped"] = str(e)
+        return result
+    
+    error_rows = set(errors["row"].tolist())
+    result.update(
+        students=students,
+        rows=[row for row in (df.index + 2).tolist() if row not in error_rows],
+        custom_columns=custom_columns,
+        field_definitions=field_definitions,
+        profile=profile,
+        errors=errors.to_dict(orient="records")
+    )
+    return result
+
+
+def _parse_in_pool(tasks: List[Tuple[str, BinaryIO, Optional[List[str]]]],
+                   workers: int) -> List[List[Dict[str, Any]]]:
+    """
+    작업을 프로세스 풀에서 파싱 (결과는 작업 순서)
+    
+    파일 내용은 작업을 보낼 때 읽고, 동시에 보낸 작업은 workers개로 제한해
+    메모리에 올라오는 파일 내용을 줄인다.
+    """
+    results: List[Optional[List[Dict[str, Any]]]] = [None] * len(tasks)
+    pending = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for index, (filename, handle, sheets) in enumerate(tasks):
+            if len(pending) >= workers:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    results[pending.pop(future)] = future.result()
+            handle.seek(0)
+            pending[pool.submit(parse_roster_file, filename, handle.read(), sheets)] = index
+        for future in as_completed(pending):
+            results[pending[future]] = future.result()
+    return results
+
+
+def import_roster_batch(
+    db: Session,
+    school: School,
+    files: List[Tuple[str, BinaryIO]],
+    year: int,
+    max_workers: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    여러 시트/파일(zip 포함) 명단을 병렬로 파싱해 하나의 트랜잭션으로 저장
+    
+    시트와 파일은 프로세스 풀에서 동시에 파싱하고, 필드 정의는 모두 병합한다.
+    검증 오류 행은 건너뛰고 보고하며, 저장 중 오류가 나면 아무것도 저장하지 않는다.
+    
+    Args:
+        db: 데이터베이스 세션
+        school: 학교
+        files: (파일 이름, 파일 객체) 리스트 (.xlsx, .xls, .csv, .tsv, .zip)
+        year: 학년도
+        max_workers: 파싱 프로세스 수 (기본값: CPU 코어 수)
+        
+    Returns:
+        {"count", "inserted", "updated", "unchanged", "sources", "skipped_count",
+         "skipped_rows", "custom_columns", "field_definitions"}
+    """
+    workers = max_workers or os.cpu_count() or 1
+    with ExitStack() as stack:
+        tasks = expand_roster_sources(files, stack, workers)
+        if not tasks:
+            raise ValueError("명단 파일이 없습니다")
+        
+        # 작업이 하나뿐이면 프로세스에 보내지 않고 업로드 파일에서 바로 파싱
+        workers = min(len(tasks), workers)
+        if workers > 1:
+            parsed = _parse_in_pool(tasks, workers)
+        else:
+            parsed = [parse_roster_file(*task) for task in tasks]
+    results = [result for file_results in parsed for result in file_results]
+    
+    # 결과 병합 (업로드 순서 유지)
+    students_data, errors, source_summaries = [], [], []
+    custom_columns, field_definitions, profile = [], [], {}
+    for result in results:
+        source = {"file": result["file"], "sheet": result["sheet"]}
+        source_summaries.append({**source, "count": len(result["students"]), "skipped": result["skipped"]})
+        if result["skipped"]:
+            continue
+        
+        errors.extend({**source, **error} for error in result["errors"])
+        for row, student_data in zip(result["rows"], result["students"]):
+            messages = ExcelParser.validate_student(student_data)
+            if messages:
+                errors.append({**source, "row": row, "column": None, "value": None,
+                               "error": ", ".join(messages)})
+            else:
+                students_data.append(student_data)
+        
+        custom_columns = list(dict.fromkeys(custom_columns + result["custom_columns"]))
+        field_definitions = ExcelParser.merge_field_definitions(field_definitions, result["field_definitions"])
+        profile = ExcelParser.merge_column_profiles(profile, result["profile"])
+    
+    if all(result["skipped"] for result in results):
+        raise ValueError("학생 명단이 있는 시트가 없습니다")
+    
+    try:
+        summary = bulk_upsert_students(db, school.id, students_data, year)
+        school.custom_field_definitions = field_definitions
+        store_field_profile(school, profile)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    
+    # 여러 시트/파일에 같은 학생이 있으면 한 번만 셈 (inserted + updated + unchanged와 같음)
+    count = sum(summary.values())
+    logger.info(f"일괄 임포트: {len(results)}개 시트/파일, {count}명 ({workers}개 프로세스)")
+    return {
+        "count": count,
+        **summary,
+        "sources": source_summaries,
+        "skipped_count": len(errors),
+        "skipped_rows": errors[:MAX_REPORTED_ERRORS],
+        "custom_columns": custom_columns,
+        "field_definitions": field_definitions
+    }
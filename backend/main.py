@@ -10,8 +10,11 @@ import logging
 from pathlib import Path
 
 from app.core.config import settings
-from app.core.database import engine, Base
-from app.api import students, rules, assignments, schools, auth, sample_data
+from app.core.database import engine, async_engine, Base
+from app.api import students, rules, assignments, schools, auth, sample_data, backup
+from app.core.migrations import run_migrations
+from app.services.student_import import detect_natural_key_index
+from app.services import backup as backup_service
 
 # 로깅 설정
 logging.basicConfig(
@@ -33,6 +36,9 @@ async def lifespan(app: FastAPI):
     
     # 데이터베이스 테이블 생성
     Base.metadata.create_all(bind=engine)
+    # 인덱스 등 스키마 변경 적용
+    run_migrations(engine)
+    detect_natural_key_index(engine)
     logger.info("✅ 데이터베이스 초기화 완료")
     
     # 필요한 디렉토리 생성
@@ -40,9 +46,14 @@ async def lifespan(app: FastAPI):
     Path("logs").mkdir(exist_ok=True)
     logger.info("✅ 디렉토리 생성 완료")
     
+    # 자동 백업 (백그라운드 스레드)
+    backup_service.start_scheduler()
+    
     yield
     
     # 종료 시
+    backup_service.stop_scheduler()
+    await async_engine.dispose()
     logger.info("👋 애플리케이션 종료")
 
 
@@ -75,6 +86,7 @@ app.include_router(students.router, prefix="/api/students", tags=["학생"])
 app.include_router(rules.router, prefix="/api/rules", tags=["규칙"])
 app.include_router(assignments.router, prefix="/api/assignments", tags=["반편성"])
 app.include_router(sample_data.router, prefix="/api/sample", tags=["샘플데이터"])
+app.include_router(backup.router, prefix="/api/backup", tags=["백업"])
 
 
 @app.get("/")
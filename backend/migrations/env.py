@@ -0,0 +1,61 @@
+"""
+Alembic 마이그레이션 환경
+
+앱에서 실행할 때는 run_migrations()가 넘겨준 연결을 사용하고,
+명령줄(alembic upgrade head)에서는 설정의 DATABASE_URL로 연결한다.
+"""
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import create_engine
+
+from app.core.config import settings
+from app.core.database import Base
+from app.models import assignment, assignment_pack, assignment_version, rule, school, student  # noqa: F401  (메타데이터 등록)
+
+config = context.config
+target_metadata = Base.metadata
+
+
+def run_migrations_offline() -> None:
+    """SQL 스크립트 출력 모드"""
+    context.configure(
+        url=settings.DATABASE_URL,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        render_as_batch=True,  # SQLite는 ALTER 지원이 제한적이므로 배치 모드
+        dialect_opts={"paramstyle": "named"},
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    """DB에 직접 적용"""
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        _run_with_connection(connection)
+        return
+
+    if config.config_file_name is not None:
+        fileConfig(config.config_file_name)
+    engine = create_engine(settings.DATABASE_URL)
+    with engine.connect() as connection:
+        _run_with_connection(connection)
+    engine.dispose()
+
+
+def _run_with_connection(connection) -> None:
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        render_as_batch=True,
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,41 @@
+"""
+자주 쓰는 조회 조건에 복합 인덱스 추가
+
+- 학생 목록/반편성 생성: Student(school_id, grade)
+- 반편성 상세/내보내기: StudentAssignment(assignment_id, assigned_class)
+- 반편성 목록 (최신순): ClassAssignment(school_id, created_at)
+- 활성 규칙 조회 (우선순위순): ClassAssignmentRule(school_id, is_active, priority)
+
+테이블은 create_all로 이미 만들어져 있을 수 있으므로 인덱스가 있으면 건너뛴다.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+# (인덱스 이름, 테이블, 컬럼)
+INDEXES = [
+    ('ix_students_school_grade', 'students', ['school_id', 'grade']),
+    ('ix_student_assignments_assignment_class', 'student_assignments', ['assignment_id', 'assigned_class']),
+    ('ix_class_assignments_school_created', 'class_assignments', ['school_id', 'created_at']),
+    ('ix_assignment_rules_school_active_priority', 'assignment_rules', ['school_id', 'is_active', 'priority']),
+]
+
+
+def upgrade() -> None:
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, if_not_exists=True)
+    # 쿼리 플래너 통계 갱신
+    op.execute('ANALYZE')
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
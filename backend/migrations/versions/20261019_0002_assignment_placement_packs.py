@@ -0,0 +1,38 @@
+"""
+반편성 결과 압축 저장 테이블 추가
+
+(학생 ID, 배정 반) 쌍 전체를 반편성 하나당 BLOB 한 행으로 저장한다.
+기존 StudentAssignment 행은 그대로 두며, 조회 시 압축 배열이 없으면 행에서 읽는다.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+TABLE = 'assignment_placement_packs'
+
+
+def upgrade() -> None:
+    # create_all로 이미 만들어졌을 수 있음
+    if not op.get_context().as_sql and sa.inspect(op.get_bind()).has_table(TABLE):
+        return
+    op.create_table(
+        TABLE,
+        sa.Column('assignment_id', sa.Integer(), sa.ForeignKey('class_assignments.id', ondelete='CASCADE'),
+                  primary_key=True),
+        sa.Column('encoding', sa.String(20), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.Column('data', sa.LargeBinary(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table(TABLE)
@@ -0,0 +1,48 @@
+"""
+반편성 초안 버전 테이블 추가
+
+기존 반편성에서 파생된 초안은 부모 대비 이동한 학생만 저장하고,
+일정 단계마다 전체 배정 결과를 체크포인트로 저장한다.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+TABLE = 'assignment_versions'
+
+
+def upgrade() -> None:
+    # create_all로 이미 만들어졌을 수 있음
+    if not op.get_context().as_sql and sa.inspect(op.get_bind()).has_table(TABLE):
+        return
+    op.create_table(
+        TABLE,
+        sa.Column('assignment_id', sa.Integer(), sa.ForeignKey('class_assignments.id', ondelete='CASCADE'),
+                  primary_key=True),
+        sa.Column('root_id', sa.Integer(), nullable=False),
+        sa.Column('parent_id', sa.Integer(), sa.ForeignKey('class_assignments.id', ondelete='SET NULL'),
+                  nullable=True),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.Column('depth', sa.Integer(), nullable=False),
+        sa.Column('moved', sa.Integer(), nullable=False),
+        sa.Column('encoding', sa.String(20), nullable=True),
+        sa.Column('data', sa.LargeBinary(), nullable=True),
+        sa.Column('note', sa.String(200), nullable=True),
+    )
+    op.create_index('ix_assignment_versions_root_id', TABLE, ['root_id'])
+    op.create_index('ix_assignment_versions_parent_id', TABLE, ['parent_id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_assignment_versions_parent_id', table_name=TABLE)
+    op.drop_index('ix_assignment_versions_root_id', table_name=TABLE)
+    op.drop_table(TABLE)
@@ -0,0 +1,45 @@
+"""
+학생 자연키 유니크 인덱스 추가
+
+같은 학교/학년도/학년/반/번호/이름의 학생을 한 명으로 보고 재업로드 시 갱신(ON CONFLICT)하는 데 사용한다.
+이미 중복된 학생 행이 있으면 인덱스를 만들지 않고 경고만 남긴다.
+(앱은 인덱스가 없으면 조회 후 갱신 방식으로 동작하며, 중복을 정리한 뒤
+`alembic downgrade 0003 && alembic upgrade head`로 다시 적용할 수 있다)
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19
+"""
+import logging
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+logger = logging.getLogger('alembic.runtime.migration')
+
+INDEX = 'uq_students_natural_key'
+COLUMNS = ['school_id', 'year', 'grade', 'original_class', 'number', 'name']
+
+
+def upgrade() -> None:
+    if not op.get_context().as_sql:
+        # NULL은 서로 다른 값으로 취급되므로 모든 컬럼이 있는 행만 중복 검사
+        duplicate = op.get_bind().execute(sa.text(
+            f"SELECT 1 FROM students WHERE {' AND '.join(f'{c} IS NOT NULL' for c in COLUMNS)} "
+            f"GROUP BY {', '.join(COLUMNS)} HAVING COUNT(*) > 1 LIMIT 1"
+        )).first()
+        if duplicate is not None:
+            logger.warning("중복된 학생 행이 있어 자연키 유니크 인덱스를 만들지 않습니다")
+            return
+    # 이전 버전 앱이 시작할 때 이미 만들었을 수 있음
+    op.create_index(INDEX, 'students', COLUMNS, unique=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    op.drop_index(INDEX, table_name='students', if_exists=True)
@@ -0,0 +1,22 @@
+"""
+테스트 공통 설정
+"""
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.models import assignment, assignment_pack, assignment_version, rule, school, student  # noqa: F401  (메타데이터 등록)
+
+
+@pytest.fixture
+def db(tmp_path):
+    """테스트마다 새 SQLite 데이터베이스 세션"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
@@ -0,0 +1,123 @@
+"""
+반편성 초안 저장 테스트 (이동만 저장, 체크포인트, 삭제 시 파생 초안 보존)
+"""
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from app.core.config import settings
+from app.models.assignment_pack import AssignmentPlacementPack
+from app.models.assignment_version import AssignmentVersion
+from app.services import assignment_store
+
+ROOT_ID = 1
+NUM_STUDENTS = 12
+
+
+@pytest.fixture(params=assignment_store.STORAGE_MODES)
+def root(db, request, monkeypatch):
+    """학생 12명을 3개 반에 나눈 최초 반편성 (체크포인트 간격 3)"""
+    monkeypatch.setattr(settings, "ASSIGNMENT_STORAGE", request.param)
+    monkeypatch.setattr(settings, "ASSIGNMENT_CHECKPOINT_INTERVAL", 3)
+    assignment = {class_num: [] for class_num in (1, 2, 3)}
+    for student_id in range(1, NUM_STUDENTS + 1):
+        assignment[student_id % 3 + 1].append(SimpleNamespace(id=student_id))
+    assignment_store.save_placements(db, ROOT_ID, assignment)
+    db.commit()
+    return _placements(db, ROOT_ID)
+
+
+def _placements(db, assignment_id):
+    student_ids, classes = assignment_store.load_placements(db, assignment_id)
+    return dict(zip(student_ids.tolist(), classes.tolist()))
+
+
+def _draft(db, parent_id, assignment_id, moves):
+    """부모 결과에 moves({학생 ID: 새 반})를 적용한 초안 저장 → (버전, 기대 결과)"""
+    student_ids, classes = assignment_store.load_placements(db, parent_id)
+    expected = dict(zip(student_ids.tolist(), classes.tolist()))
+    expected.update(moves)
+    draft_classes = np.array([expected[student_id] for student_id in student_ids.tolist()])
+    version = assignment_store.save_draft(
+        db, assignment_id, parent_id, student_ids, draft_classes,
+        np.array(list(moves.keys())), np.array(list(moves.values())), note=f"draft {assignment_id}"
+    )
+    db.commit()
+    return version, expected
+
+
+def _chain(db, length):
+    """
+    최초 반편성에서 이어지는 초안 length개 (ID 2부터) → {ID: 기대 결과}
+    
+    이어지는 초안 두 개씩 같은 학생을 옮기므로 이동을 적용하는 순서가 틀리면 결과가 달라진다.
+    """
+    expected = {ROOT_ID: _placements(db, ROOT_ID)}
+    for assignment_id in range(ROOT_ID + 1, ROOT_ID + 1 + length):
+        student_id = assignment_id // 2 % 2 + 1
+        new_class = expected[assignment_id - 1][student_id] % 3 + 1
+        _, expected[assignment_id] = _draft(db, assignment_id - 1, assignment_id, {student_id: new_class})
+    return expected
+
+
+def test_chain_reconstructs_across_checkpoints(db, root):
+    expected = _chain(db, 7)
+
+    depths = [db.get(AssignmentVersion, assignment_id).depth for assignment_id in range(2, 9)]
+    assert depths == [1, 2, 0, 1, 2, 0, 1]
+    for assignment_id, placements in expected.items():
+        assert _placements(db, assignment_id) == placements
+
+
+def test_delta_stores_only_moves(db, root):
+    version, _ = _draft(db, ROOT_ID, 2, {3: root[3] % 3 + 1})
+
+    assert version.depth == 1 and version.moved == 1
+    assert version.root_id == ROOT_ID and version.version == 2
+    assert db.get(AssignmentPlacementPack, 2) is None
+    moved_ids, moved_classes = assignment_store.unpack_placements(version.data, version.encoding)
+    assert moved_ids.tolist() == [3] and moved_classes.tolist() == [root[3] % 3 + 1]
+
+
+def test_large_move_is_saved_as_checkpoint(db, root):
+    moves = {student_id: root[student_id] % 3 + 1 for student_id in range(1, NUM_STUDENTS // 2 + 1)}
+    version, expected = _draft(db, ROOT_ID, 2, moves)
+
+    assert version.depth == 0 and version.data is None
+    assert _placements(db, 2) == expected
+
+
+def test_branches_get_distinct_versions(db, root):
+    first, _ = _draft(db, ROOT_ID, 2, {1: root[1] % 3 + 1})
+    second, _ = _draft(db, ROOT_ID, 3, {2: root[2] % 3 + 1})
+    child, _ = _draft(db, 2, 4, {5: root[5] % 3 + 1})
+
+    assert [first.version, second.version, child.version] == [2, 3, 4]
+    assert {first.root_id, second.root_id, child.root_id} == {ROOT_ID}
+    assert child.parent_id == 2 and child.depth == 2
+
+
+def test_delete_middle_version_keeps_descendants(db, root):
+    expected = _chain(db, 5)  # 2(변경분) ← 3(변경분) ← 4(체크포인트) ← 5, 6
+
+    assignment_store.delete_placements(db, 2)
+    db.commit()
+
+    assert db.get(AssignmentVersion, 2) is None
+    child = db.get(AssignmentVersion, 3)
+    assert child.parent_id is None and child.depth == 0 and child.data is None
+    for assignment_id in (1, 3, 4, 5, 6):
+        assert _placements(db, assignment_id) == expected[assignment_id]
+
+
+def test_delete_root_keeps_descendants(db, root):
+    expected = _chain(db, 2)
+
+    assignment_store.delete_placements(db, ROOT_ID)
+    db.commit()
+
+    child = db.get(AssignmentVersion, 2)
+    assert child.parent_id is None and child.depth == 0
+    for assignment_id in (2, 3):
+        assert _placements(db, assignment_id) == expected[assignment_id]
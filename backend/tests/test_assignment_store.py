@@ -0,0 +1,72 @@
+"""
+반편성 결과 저장소 테스트 (압축 배열 형식, 저장 방식별 저장/조회)
+"""
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from app.services import assignment_store
+
+
+def _students(*ids):
+    return [SimpleNamespace(id=student_id) for student_id in ids]
+
+
+def test_pack_round_trip():
+    student_ids = np.array([5, 1, 2 ** 31 - 1, 7])
+    classes = np.array([2, 1, 3, 1])
+
+    data = assignment_store.pack_placements(student_ids, classes)
+    unpacked_ids, unpacked_classes = assignment_store.unpack_placements(data)
+
+    assert len(data) == len(student_ids) * 8
+    assert unpacked_ids.tolist() == student_ids.tolist()
+    assert unpacked_classes.tolist() == classes.tolist()
+
+
+def test_pack_layout_is_little_endian_pairs():
+    data = assignment_store.pack_placements(np.array([1, 258]), np.array([2, 3]))
+    assert data == bytes([1, 0, 0, 0, 2, 0, 0, 0, 2, 1, 0, 0, 3, 0, 0, 0])
+
+
+def test_pack_empty():
+    data = assignment_store.pack_placements(np.array([], dtype=np.int64), np.array([], dtype=np.int64))
+    student_ids, classes = assignment_store.unpack_placements(data)
+    assert data == b""
+    assert len(student_ids) == len(classes) == 0
+
+
+def test_unpack_rejects_unknown_encoding():
+    data = assignment_store.pack_placements(np.array([1]), np.array([1]))
+    with pytest.raises(ValueError):
+        assignment_store.unpack_placements(data, "int64-pairs-le")
+
+
+@pytest.mark.parametrize("storage", assignment_store.STORAGE_MODES)
+def test_save_and_load_orders_by_class(db, storage):
+    assignment = {2: _students(10, 11), 1: _students(12), 3: _students(13, 14)}
+
+    assignment_store.save_placements(db, 1, assignment, storage=storage)
+    db.commit()
+    student_ids, classes = assignment_store.load_placements(db, 1)
+
+    assert student_ids.tolist() == [12, 10, 11, 13, 14]
+    assert classes.tolist() == [1, 2, 2, 3, 3]
+
+
+def test_save_rejects_unknown_storage(db):
+    with pytest.raises(ValueError):
+        assignment_store.save_placements(db, 1, {1: _students(1)}, storage="json")
+
+
+def test_delete_placements(db):
+    assignment_store.save_placements(db, 1, {1: _students(1, 2)}, storage="packed")
+    assignment_store.save_placements(db, 2, {1: _students(3)}, storage="packed")
+    db.commit()
+
+    assignment_store.delete_placements(db, 1)
+    db.commit()
+
+    assert len(assignment_store.load_placements(db, 1)[0]) == 0
+    assert assignment_store.load_placements(db, 2)[0].tolist() == [3]
@@ -0,0 +1,163 @@
+"""
+백업 파일 형식 테스트 (압축/암호화 프레임 쓰기와 복원, 손상 검출, 복구 후 캐시 무효화)
+"""
+import os
+import struct
+
+import pytest
+
+from app.core.config import settings
+from app.services import backup, cohort_cache
+
+
+@pytest.fixture(autouse=True)
+def fast_backup(monkeypatch):
+    """작은 프레임으로 여러 프레임을 만들고, 키 유도와 대기 시간은 줄임"""
+    monkeypatch.setattr(backup, "CHUNK_SIZE", 4096)
+    monkeypatch.setattr(backup, "KDF_ITERATIONS", 1000)
+    monkeypatch.setattr(settings, "BACKUP_STEP_SLEEP_MS", 0)
+    monkeypatch.setattr(settings, "DATABASE_ENCRYPTION_KEY", None)
+
+
+@pytest.fixture
+def snapshot(tmp_path):
+    """압축되지 않는 부분과 잘 압축되는 부분이 섞인 원본 (여러 프레임)"""
+    path = tmp_path / "snapshot.db"
+    path.write_bytes(os.urandom(20000) + b"student" * 5000 + os.urandom(5000))
+    return path
+
+
+def _archive(snapshot, tmp_path, password=None):
+    target = tmp_path / "backup.bak"
+    backup._write_archive(snapshot, target, backup._file_sha256(snapshot), password)
+    return target
+
+
+def _frame_lengths(archive):
+    """프레임별 (길이 필드 위치, 길이, 마지막 여부)"""
+    data = archive.read_bytes()
+    frames, offset = [], backup.HEADER_SIZE
+    while offset < len(data):
+        length, = struct.unpack(">I", data[offset:offset + 4])
+        final = bool(length & backup.FINAL_FRAME)
+        length &= ~backup.FINAL_FRAME
+        frames.append((offset, length, final))
+        offset += 4 + length
+    return frames
+
+
+def test_round_trip_without_key(snapshot, tmp_path):
+    archive = _archive(snapshot, tmp_path)
+    restored = tmp_path / "restored.db"
+
+    backup._extract_archive(archive, restored)
+
+    assert restored.read_bytes() == snapshot.read_bytes()
+    assert archive.read_bytes()[5] & backup.FLAG_ENCRYPTED == 0
+    assert len(_frame_lengths(archive)) > 1
+
+
+def test_round_trip_with_key(snapshot, tmp_path, monkeypatch):
+    archive = _archive(snapshot, tmp_path, password="secret")
+    restored = tmp_path / "restored.db"
+    monkeypatch.setattr(settings, "DATABASE_ENCRYPTION_KEY", "secret")
+
+    backup._extract_archive(archive, restored)
+
+    assert restored.read_bytes() == snapshot.read_bytes()
+    assert archive.read_bytes()[5] & backup.FLAG_ENCRYPTED
+    frames = _frame_lengths(archive)
+    assert len(frames) > 1 and frames[-1][2] and not any(final for _, _, final in frames[:-1])
+
+
+def test_plain_archive_ignores_configured_key(snapshot, tmp_path, monkeypatch):
+    archive = _archive(snapshot, tmp_path)
+    monkeypatch.setattr(settings, "DATABASE_ENCRYPTION_KEY", "secret")
+
+    backup._extract_archive(archive, tmp_path / "restored.db")
+
+    assert (tmp_path / "restored.db").read_bytes() == snapshot.read_bytes()
+
+
+def test_wrong_key(snapshot, tmp_path, monkeypatch):
+    archive = _archive(snapshot, tmp_path, password="secret")
+    monkeypatch.setattr(settings, "DATABASE_ENCRYPTION_KEY", "other")
+
+    with pytest.raises(ValueError, match="복호화"):
+        backup._extract_archive(archive, tmp_path / "restored.db")
+
+
+def test_missing_key(snapshot, tmp_path):
+    archive = _archive(snapshot, tmp_path, password="secret")
+
+    with pytest.raises(ValueError, match="DATABASE_ENCRYPTION_KEY"):
+        backup._extract_archive(archive, tmp_path / "restored.db")
+
+
+@pytest.mark.parametrize("password", [None, "secret"])
+def test_truncated_inside_frame(snapshot, tmp_path, monkeypatch, password):
+    archive = _archive(snapshot, tmp_path, password=password)
+    monkeypatch.setattr(settings, "DATABASE_ENCRYPTION_KEY", password)
+    archive.write_bytes(archive.read_bytes()[:-10])
+
+    with pytest.raises(ValueError, match="잘렸"):
+        backup._extract_archive(archive, tmp_path / "restored.db")
+
+
+@pytest.mark.parametrize("password", [None, "secret"])
+def test_truncated_at_frame_boundary(snapshot, tmp_path, monkeypatch, password):
+    archive = _archive(snapshot, tmp_path, password=password)
+    monkeypatch.setattr(settings, "DATABASE_ENCRYPTION_KEY", password)
+    last_offset = _frame_lengths(archive)[-1][0]
+    archive.write_bytes(archive.read_bytes()[:last_offset])
+
+    with pytest.raises(ValueError, match="잘렸"):
+        backup._extract_archive(archive, tmp_path / "restored.db")
+
+
+@pytest.mark.parametrize("password", [None, "secret"])
+def test_corrupted_byte(snapshot, tmp_path, monkeypatch, password):
+    archive = _archive(snapshot, tmp_path, password=password)
+    monkeypatch.setattr(settings, "DATABASE_ENCRYPTION_KEY", password)
+    offset, length, _ = _frame_lengths(archive)[1]
+    data = bytearray(archive.read_bytes())
+    data[offset + 4 + length // 2] ^= 0xFF
+    archive.write_bytes(bytes(data))
+
+    with pytest.raises(ValueError):
+        backup._extract_archive(archive, tmp_path / "restored.db")
+
+
+def test_trailing_data(snapshot, tmp_path):
+    archive = _archive(snapshot, tmp_path)
+    archive.write_bytes(archive.read_bytes() + b"x")
+
+    with pytest.raises(ValueError, match="알 수 없는 데이터"):
+        backup._extract_archive(archive, tmp_path / "restored.db")
+
+
+def test_not_a_backup(tmp_path):
+    archive = tmp_path / "backup.bak"
+    archive.write_bytes(b"SQLite format 3\x00" + bytes(100))
+
+    with pytest.raises(ValueError, match="형식"):
+        backup._extract_archive(archive, tmp_path / "restored.db")
+
+
+def test_restore_invalidates_every_school(tmp_path, monkeypatch):
+    """복구 후에는 버전이 없던 학교까지 모든 학교의 버전이 복구 전과 달라야 함"""
+    monkeypatch.setattr(settings, "DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(cohort_cache, "_versions", {})
+    monkeypatch.setattr(cohort_cache, "_base_version", 0)
+    cohort_cache.bump_version(1)
+    cohort_cache.bump_version(1)
+    before = {school_id: cohort_cache.current_version(school_id) for school_id in (1, 2)}
+
+    cohort_cache.invalidate_all()
+
+    for school_id, version in before.items():
+        assert cohort_cache.current_version(school_id) > version
+    # 복구 뒤 한 학교만 바뀌어도 다른 학교가 이전 버전으로 돌아가지 않음
+    cohort_cache.bump_version(2)
+    assert cohort_cache.current_version(1) > before[1]
+    assert cohort_cache.current_version(2) > before[2] + 1
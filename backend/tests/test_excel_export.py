@@ -0,0 +1,49 @@
+"""
+반편성 결과 Excel 쓰기 테스트 (반 시트 스트리밍, openpyxl 버전이 다를 때 일반 저장)
+"""
+from io import BytesIO
+
+import pytest
+from openpyxl import load_workbook
+
+from app.services import excel_parser
+from app.services.excel_parser import ExcelParser
+
+CLASS_SIZES = {1: 5, 2: 3, 3: 4}
+CUSTOM_COLUMNS = ["성적", "메모"]
+
+
+def _rows():
+    for class_num, size in CLASS_SIZES.items():
+        for number in range(1, size + 1):
+            yield {
+                "assigned_class": class_num, "grade": 1, "original_class": number % 2 + 1,
+                "number": number, "name": f"{class_num}반{number}", "gender": "남" if number % 2 else "여",
+                "custom_fields": {"성적": 50 + number, "메모": ["목록"]}
+            }
+
+
+@pytest.fixture(params=[True, False], ids=["streaming", "save"])
+def streaming(request, monkeypatch):
+    monkeypatch.setattr(excel_parser, "STREAMING_SUPPORTED", request.param)
+    return request.param
+
+
+def test_multi_class_export_reloads(streaming):
+    output = BytesIO()
+    info = {"name": "2026 1학년", "grade": 1, "year": 2026, "num_classes": 3, "total_score": 12.5}
+
+    ExcelParser.write_assignment_workbook(output, info, _rows(), CUSTOM_COLUMNS)
+
+    workbook = load_workbook(BytesIO(output.getvalue()))
+    assert workbook.sheetnames == ["요약", "1반", "2반", "3반"]
+    for class_num, size in CLASS_SIZES.items():
+        rows = list(workbook[f"{class_num}반"].iter_rows(values_only=True))
+        assert len(rows) == size + 1
+        assert rows[0] == ("새 반", "새 번호", "학년", "이전 반", "이전 번호", "이름", "성별", "성적", "메모")
+        assert [row[1] for row in rows[1:]] == list(range(1, size + 1))
+        assert rows[1][-2:] == (51, "['목록']")
+
+    summary = list(workbook["요약"].iter_rows(values_only=True))
+    assert summary[0] == ("반편성", "2026 1학년", None, None)
+    assert summary[-4:] == [("1반", 5, 3, 2), ("2반", 3, 2, 1), ("3반", 4, 2, 2), ("합계", 12, 7, 5)]
@@ -0,0 +1,108 @@
+"""
+명단 임포트 테스트 (명단이 아닌 시트 건너뛰기, 묶음마다 필드 정의 저장, 일괄 임포트 인원)
+"""
+from io import BytesIO
+
+import pytest
+from openpyxl import Workbook
+
+from app.core.migrations import run_migrations
+from app.models.school import School
+from app.models.student import Student
+from app.services import student_import
+
+YEAR = 2026
+
+
+@pytest.fixture
+def school(db, monkeypatch):
+    """앱 시작과 같이 마이그레이션 후 자연키 인덱스 확인 (모듈 상태는 테스트 뒤 복원)"""
+    monkeypatch.setattr(student_import, "_upsert_supported", student_import._upsert_supported)
+    run_migrations(db.get_bind())
+    student_import.detect_natural_key_index(db.get_bind())
+    school = School(name="테스트학교")
+    db.add(school)
+    db.commit()
+    return school
+
+
+def _roster(*sheets):
+    """(시트 이름, 행 리스트) → 메모리의 xlsx 파일"""
+    workbook = Workbook()
+    workbook.remove(workbook.active)
+    for title, rows in sheets:
+        sheet = workbook.create_sheet(title)
+        for row in rows:
+            sheet.append(row)
+    output = BytesIO()
+    workbook.save(output)
+    output.seek(0)
+    return output
+
+
+def _class_rows(class_num, count):
+    header = ["학년", "반", "번호", "이름", "성별", "성적"]
+    return [header] + [[1, class_num, number, f"{class_num}반{number}", "남" if number % 2 else "여", 50 + number]
+                       for number in range(1, count + 1)]
+
+
+COVER = ("안내", [["학생 명단 양식"], ["각 반 시트에 학생을 입력하세요"]])
+
+
+def test_cover_sheet_is_skipped(db, school):
+    roster = _roster(COVER, ("1반", _class_rows(1, 5)), ("2반", _class_rows(2, 4)))
+
+    summary = student_import.import_roster_stream(db, school, roster, YEAR, "roster.xlsx", chunk_size=2)
+
+    assert summary["count"] == 9
+    assert summary["inserted"] == 9
+    assert db.query(Student).count() == 9
+    assert [(source["sheet"], source["count"], bool(source["skipped"])) for source in summary["sources"]] == [
+        ("안내", 0, True), ("1반", 5, False), ("2반", 4, False)
+    ]
+    assert [field["name"] for field in school.custom_field_definitions] == ["성적"]
+    assert "성적" in school.settings["field_profile"]["columns"]
+
+
+def test_field_definitions_saved_with_committed_chunks(db, school, monkeypatch):
+    upsert = student_import.bulk_upsert_students
+    calls = []
+
+    def failing_upsert(*args, **kwargs):
+        calls.append(1)
+        if len(calls) == 3:
+            raise RuntimeError("저장 실패")
+        return upsert(*args, **kwargs)
+
+    monkeypatch.setattr(student_import, "bulk_upsert_students", failing_upsert)
+    roster = _roster(COVER, ("1반", _class_rows(1, 6)))
+
+    with pytest.raises(RuntimeError):
+        student_import.import_roster_stream(db, school, roster, YEAR, "roster.xlsx", chunk_size=2)
+    db.rollback()
+
+    # 앞선 두 묶음과 그 필드 정의는 함께 저장되어 있음
+    assert db.query(Student).count() == 4
+    db.refresh(school)
+    assert [field["name"] for field in school.custom_field_definitions] == ["성적"]
+    assert "성적" in school.settings["field_profile"]["columns"]
+
+
+def test_no_roster_sheet(db, school):
+    with pytest.raises(ValueError):
+        student_import.import_roster_stream(db, school, _roster(COVER), YEAR, "roster.xlsx")
+
+
+def test_batch_counts_duplicate_students_once(db, school):
+    # 두 파일에 1반 명단이 겹쳐 있음
+    files = [
+        ("1반.xlsx", _roster(COVER, ("1반", _class_rows(1, 5)))),
+        ("전체.xlsx", _roster(("1반", _class_rows(1, 5)), ("2반", _class_rows(2, 4)))),
+    ]
+
+    summary = student_import.import_roster_batch(db, school, files, YEAR, max_workers=1)
+
+    assert summary["count"] == 9
+    assert summary["count"] == summary["inserted"] + summary["updated"] + summary["unchanged"]
+    assert db.query(Student).count() == 9
+    assert [source["count"] for source in summary["sources"]] == [0, 5, 5, 4]
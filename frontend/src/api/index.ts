@@ -5,7 +5,14 @@ import type {
   Rule, 
   Assignment, 
   AssignmentRequest,
-  AssignmentDetail 
+  AssignmentDetail,
+  AssignmentDetailColumnar,
+  AssignmentDiff,
+  AssignmentHistory,
+  DraftRequest,
+  FieldProfile,
+  Page,
+  StudentListParams 
 } from '../types';
 
 // 학교 API
@@ -15,6 +22,8 @@ export const schoolApi = {
   create: (data: Partial<School>) => apiClient.post<School>('/api/schools/', data),
   update: (id: number, data: Partial<School>) => 
     apiClient.put<School>(`/api/schools/${id}`, data),
+  getFieldProfile: (id: number) =>
+    apiClient.get<FieldProfile>(`/api/schools/${id}/field-profile`),
 };
 
 // 학생 API
@@ -23,6 +32,11 @@ export const studentApi = {
     const params = grade ? { school_id: schoolId, grade } : { school_id: schoolId };
     return apiClient.get<Student[]>('/api/students/', { params });
   },
+  getPage: (params: StudentListParams) =>
+    apiClient.get<Page<Partial<Student>>>('/api/students/', {
+      params,
+      paramsSerializer: { indexes: null },  // custom=a&custom=b
+    }),
   getById: (id: number) => apiClient.get<Student>(`/api/students/${id}`),
   create: (data: Partial<Student>) => apiClient.post<Student>('/api/students/', data),
   update: (id: number, data: Partial<Student>) => 
@@ -36,6 +50,14 @@ export const studentApi = {
       headers: { 'Content-Type': 'multipart/form-data' },
     });
   },
+  uploadBatch: (schoolId: number, files: File[]) => {
+    const formData = new FormData();
+    files.forEach((file) => formData.append('files', file));
+    return apiClient.post('/api/students/upload-batch', formData, {
+      params: { school_id: schoolId },
+      headers: { 'Content-Type': 'multipart/form-data' },
+    });
+  },
 };
 
 // 규칙 API
@@ -55,9 +77,16 @@ export const assignmentApi = {
   getAll: (schoolId: number) => 
     apiClient.get<Assignment[]>('/api/assignments/', { params: { school_id: schoolId } }),
   getById: (id: number) => apiClient.get<AssignmentDetail>(`/api/assignments/${id}`),
+  getColumnar: (id: number) =>
+    apiClient.get<AssignmentDetailColumnar>(`/api/assignments/${id}`, { params: { format: 'columnar' } }),
   generate: (data: AssignmentRequest) => 
     apiClient.post('/api/assignments/generate', data),
   delete: (id: number) => apiClient.delete(`/api/assignments/${id}`),
+  saveDraft: (id: number, data: DraftRequest) =>
+    apiClient.post(`/api/assignments/${id}/drafts`, data),
+  getHistory: (id: number) => apiClient.get<AssignmentHistory>(`/api/assignments/${id}/history`),
+  getDiff: (id: number, against?: number) =>
+    apiClient.get<AssignmentDiff>(`/api/assignments/${id}/diff`, { params: { against } }),
 };
 
 // 샘플 데이터 API
@@ -51,7 +51,8 @@ export const Students = () => {
 
     try {
       setLoading(true);
-      await studentApi.uploadExcel(currentSchool.id, file);
+      // 여러 시트/zip 파일도 한 번에 임포트
+      await studentApi.uploadBatch(currentSchool.id, [file]);
       message.success('Excel 파일이 성공적으로 업로드되었습니다.');
       loadStudents();
     } catch (error: any) {
@@ -141,7 +142,7 @@ export const Students = () => {
         <Space>
           <Upload
             beforeUpload={handleUpload}
-            accept=".xlsx,.xls,.csv"
+            accept=".xlsx,.xls,.csv,.tsv,.zip"
             showUploadList={false}
           >
             <Button icon={<UploadOutlined />}>Excel 업로드</Button>
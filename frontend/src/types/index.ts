@@ -14,6 +14,31 @@ export interface FieldDefinition {
   options?: string[];
   min?: number;
   max?: number;
+  encoding?: 'numeric' | 'ordinal' | 'boolean' | 'onehot';
+  levels?: string[];
+  categories?: string[];
+}
+
+// 컬럼 프로파일 (마지막 임포트 기준 통계)
+export interface ColumnProfile {
+  dtype: 'number' | 'mixed' | 'boolean' | 'string' | 'empty';
+  rows: number;
+  count: number;
+  nulls: number;
+  null_rate: number;
+  distinct: number;
+  numeric_count: number;
+  numeric_ratio: number;
+  min: number | null;
+  max: number | null;
+  top_values: [string | number | boolean, number][];
+}
+
+export interface FieldProfile {
+  school_id: number;
+  updated_at: string | null;
+  field_definitions: FieldDefinition[];
+  columns: Record<string, ColumnProfile>;
 }
 
 // 학생
@@ -34,7 +59,7 @@ export interface Rule {
   school_id: number;
   name: string;
   description?: string;
-  rule_type: 'balance' | 'constraint' | 'distribution' | 'complex';
+  rule_type: 'balance' | 'constraint' | 'distribution' | 'complex' | 'graph';
   priority: number;
   weight: number;
   rule_definition: RuleDefinition;
@@ -45,7 +70,8 @@ export type RuleDefinition =
   | BalanceRule
   | ConstraintRule
   | DistributionRule
-  | ComplexRule;
+  | ComplexRule
+  | GraphRule;
 
 export interface BalanceRule {
   type: 'balance';
@@ -108,6 +134,7 @@ export interface AssignmentRequest {
   name: string;
   method?: 'random' | 'greedy' | 'genetic';
   iterations?: number;
+  workers?: number;
 }
 
 export interface AssignmentDetail {
@@ -115,3 +142,95 @@ export interface AssignmentDetail {
   classes: Record<number, Student[]>;
 }
 
+// 반편성 상세 (컬럼 형식: 같은 인덱스가 같은 학생)
+export interface AssignmentDetailColumnar {
+  assignment: Assignment;
+  format: 'columnar';
+  students: {
+    id: number[];
+    name: string[];
+    gender: string[];
+    grade: number[];
+    original_class: (number | null)[];
+    number: (number | null)[];
+    assigned_class: number[];
+    fields: Record<string, any[]>;
+  };
+}
+
+// 반편성 초안 (부모 대비 이동한 학생)
+export interface DraftRequest {
+  moves: Array<{
+    student_id: number;
+    to_class: number;
+  }>;
+  name?: string;
+  note?: string;
+}
+
+export interface AssignmentVersion {
+  id: number;
+  name: string;
+  version: number;
+  parent_id: number | null;
+  moved: number;
+  checkpoint: boolean;
+  note: string | null;
+  total_score?: number;
+  created_at?: string;
+}
+
+export interface AssignmentHistory {
+  root_id: number;
+  current_id: number;
+  versions: AssignmentVersion[];
+}
+
+export interface AssignmentDiff {
+  assignment_id: number;
+  against: number;
+  moved: number;
+  changes: Array<{
+    student_id: number;
+    name: string | null;
+    gender: string | null;
+    original_class: number | null;
+    number: number | null;
+    from_class: number | null;
+    to_class: number | null;
+  }>;
+}
+
+export interface GraphRule {
+  type: 'graph';
+  mode: 'separate' | 'friends';
+  edges?: Array<{
+    source: string | number;
+    target: string | number;
+    weight?: number;
+  }>;
+  fields?: string[];
+  min_friends?: number;
+}
+
+// 페이지 단위 목록 응답 (limit 지정 시)
+export interface Page<T> {
+  items: T[];
+  total: number;
+  limit: number;
+  next_cursor: string | null;
+}
+
+export interface StudentListParams {
+  school_id: number;
+  grade?: number;
+  year?: number;
+  name?: string;
+  gender?: string;
+  original_class?: number;
+  custom?: string[];  // "필드=값"
+  sort?: string;      // "name", "-original_class", "custom.성적"
+  fields?: string;    // "id,name,gender"
+  limit?: number;
+  cursor?: string;
+}